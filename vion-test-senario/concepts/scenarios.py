@@ -6,6 +6,8 @@ from scenario_tester.services import time
 
 
 class ConceptTestScenario(BaseScenario):
+    tags = frozenset({"concepts", "partner1", "pdf", "destructive", "slow"})
+
     def run(self):
         # Log in as partner
         self.set_step("Step 1: Login")
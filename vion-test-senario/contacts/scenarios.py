@@ -7,6 +7,8 @@ class ContactsTestScenario(BaseScenario):
     """
     Create and test Contact module
     """
+    tags = frozenset({"contacts", "partner1", "destructive", "smoke"})
+
     def run(self):
         # Log in as partner
         self.set_step("Step 1: Login")
@@ -52,7 +54,7 @@ class ContactsTestScenario(BaseScenario):
         for bad_data in bad_data_tests:
             update_data = self.update_contact_data(updated_data.copy(), bad_data)
             _, status_code = self.call(update_contact_endpoint, update_data)
-            Assert.assertEqual(status_code, 400, f"Mismatch in {bad_data.keys()}. Expected 400, but got {status_code}")
+            Assert.assertEqual(status_code, 400, "Mismatch in {}. Expected 400, but got {}", bad_data.keys(), status_code)
             updated_data = update_data
 
         # Delete Contact
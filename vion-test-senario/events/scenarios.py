@@ -5,8 +5,8 @@ from scenario_tester.services import time
 
 
 class BaseEventScenario(BaseScenario):
-    def is_abstract(self):
-        return True
+    abstract = True
+    tags = frozenset({"events", "destructive"})
 
     def create_or_get_event(self, filters):
         """
@@ -149,8 +149,7 @@ class SimpleEventRegistrationScenario(BaseEventScenario):
     """
     Gets an event with the given filters and if there is none, creates one. Registers to that event with a partner user and gets the PDF
     """
-    def is_abstract(self):
-        return False
+    tags = frozenset({"backoffice", "partner1", "pdf"})
 
     def run(self):
         # Login as backoffice user
@@ -1,5 +1,6 @@
 from scenario_tester.scenarios import BaseScenario
 from scenario_tester.assertions import Assert
+from scenario_tester.assets import upload_assets
 from scenario_tester.services import time
 from .endpoints import GalleryEndpoints
 import os
@@ -7,6 +8,8 @@ from django.apps import apps
 
 
 class CreateGallery(BaseScenario):
+    tags = frozenset({"gallery", "backoffice", "partner1", "upload", "destructive"})
+
     def run(self):
         # Login as backoffice user
         _, status_code = self.login("backoffice", GalleryEndpoints.LOGIN)
@@ -98,11 +101,12 @@ class CreateGallery(BaseScenario):
         for image_name in image_names:
             image_path = os.path.join(photos_dir, image_name)
             try:
-                with open(image_path, "rb") as file:
-                    files = {"file": file}
-                    response, status_code = self.call(GalleryEndpoints.FILECENTER_PHOTO, params=None, files=files)
-                    Assert.assertEqual(status_code, 201)
-                    uploaded_images.append(response["uuid"])
+                asset = upload_assets.get(image_path)
+                files = {"file": asset.upload()}
+                response, status_code = self.call(GalleryEndpoints.FILECENTER_PHOTO, params=None, files=files)
+                Assert.assertEqual(status_code, 201)
+                self.assert_uploaded(asset, response["file"])
+                uploaded_images.append(response["uuid"])
             except FileNotFoundError:
                 raise FileNotFoundError(f"File not found: {image_path}")
             except Exception as e:
@@ -3,9 +3,14 @@
 import os
 import sys
 
+# Commands that run scenarios from the command line, they use settings without the admin and Swagger
+RUNNER_COMMANDS = ('run_scenarios', 'run_worker', 'run_fake_server', 'benchmark')
+
 
 def main():
     """Run administrative tasks."""
+    if len(sys.argv) > 1 and sys.argv[1] in RUNNER_COMMANDS:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_api_vion.settings_runner')
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'test_api_vion.settings')
     try:
         from django.core.management import execute_from_command_line
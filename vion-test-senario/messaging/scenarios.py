@@ -1,6 +1,7 @@
 from scenario_tester.scenarios import BaseScenario
 from .endpoints import MessagingEndpoints
 from scenario_tester.assertions import Assert
+from scenario_tester.assets import upload_assets
 from scenario_tester.services import time
 import os
 from django.apps import apps
@@ -9,6 +10,8 @@ class MessagingTestScenario(BaseScenario):
     """
     Create and test Messaging module
     """
+    tags = frozenset({"messaging", "partner1", "partner2", "upload", "destructive"})
+
     def run(self):
         # Log in as partner 1
         self.set_step("Login")
@@ -104,11 +107,12 @@ class MessagingTestScenario(BaseScenario):
         image_path = os.path.join(photos_dir, image_name)
         
         try:
-            with open(image_path, "rb") as file:
-                files = {"image": file}
-                message_res, status_code = self.call(MessagingEndpoints.SEND_PRIVATE_MESSAGE, message_data, files=files)
-                Assert.assertEqual(status_code, 200, message_res)
-                return message_res
+            asset = upload_assets.get(image_path)
+            files = {"image": asset.upload()}
+            message_res, status_code = self.call(MessagingEndpoints.SEND_PRIVATE_MESSAGE, message_data, files=files)
+            Assert.assertEqual(status_code, 200, message_res)
+            self.assert_uploaded(asset, message_res["image"])
+            return message_res
         except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {image_path}")
         except Exception as e:
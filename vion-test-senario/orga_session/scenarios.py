@@ -8,6 +8,7 @@ class OrgaSessionTestScenario(BaseScenario):
     """
     Test Orga-session
     """
+    tags = frozenset({"orga_session", "partner2", "destructive", "slow"})
 
     def run(self):
         # Log in as partner
@@ -10,6 +10,6 @@ class SalesEndpoints:
     SAVING_MONEY = EndPoint(HTTPMethods.PUT, "/wishes_and_goals/saving-money/{slug}/")
     FEEDBACK = EndPoint(HTTPMethods.PUT, "/wishes_and_goals/feedback/{slug}/")
     FINALIZE = EndPoint(HTTPMethods.PUT, "/wishes_and_goals/finalize/{slug}/")
-    PDF = EndPoint(HTTPMethods.GET, "/wishes_and_goals/download-summary-pdf/{slug}/")
+    PDF = EndPoint(HTTPMethods.GET, "/wishes_and_goals/download-summary-pdf/{slug}/", stream=True)
     DELETE_FORM = EndPoint(HTTPMethods.DELETE, "/wishes_and_goals/{slug}/")
     GET_FORM = EndPoint(HTTPMethods.GET, "/wishes_and_goals/{slug}/")
\ No newline at end of file
@@ -5,6 +5,8 @@ from scenario_tester.services import time
 
 
 class SalesTestScenario(BaseScenario):
+    tags = frozenset({"sales", "partner1", "pdf", "destructive", "slow"})
+
     def run(self):
         # Log in as partner
         _, status_code = self.login("partner1", SalesEndpoints.LOGIN)
@@ -302,7 +304,7 @@ class SalesTestScenario(BaseScenario):
         for test in invalid_contact_details:
             data = {"contact_details": {**contact_detaild_data["contact_details"], **test["data"]}}
             _, status_code = self.call(contact_detaild_endpoint, data)
-            Assert.assertEqual(status_code, test["expected_status"], f"Failed test for {test['field']}. Expected {status_code}, but got {test["expected_status"]}")
+            Assert.assertEqual(status_code, test["expected_status"], "Failed test for {}. Expected {}, but got {}", test["field"], test["expected_status"], status_code)
 
         # Test invalid Goals
         invalid_goals = [
@@ -314,7 +316,7 @@ class SalesTestScenario(BaseScenario):
         for test in invalid_goals:
             data = {"goals": {**goals_data["goals"], **test["data"]}}
             _, status_code = self.call(goals_endpoint, data)
-            Assert.assertEqual(status_code, test["expected_status"], f"Failed test for {test['field']}. Expected {status_code}, but got {test["expected_status"]}")
+            Assert.assertEqual(status_code, test["expected_status"], "Failed test for {}. Expected {}, but got {}", test["field"], test["expected_status"], status_code)
 
         # Test invalid Household Bills
         invalid_household_bills = [
@@ -326,7 +328,7 @@ class SalesTestScenario(BaseScenario):
         for test in invalid_household_bills:
             data = {"household_bill": {**household_bill_data["household_bill"], **test["data"]}}
             _, status_code = self.call(household_bill_endpoint, data)
-            Assert.assertEqual(status_code, test["expected_status"], f"Failed test for {test['field']}. Expected {status_code}, but got {test["expected_status"]}")
+            Assert.assertEqual(status_code, test["expected_status"], "Failed test for {}. Expected {}, but got {}", test["field"], test["expected_status"], status_code)
 
         # Test invalid Assets and Liability
         invalid_assets_liability = [
@@ -337,7 +339,7 @@ class SalesTestScenario(BaseScenario):
         for test in invalid_assets_liability:
             data = {"assets_liability": {**asset_data["assets_liability"], **test["data"]}}
             _, status_code = self.call(assets_endpoint, data)
-            Assert.assertEqual(status_code, test["expected_status"], f"Failed test for {test['field']}. Expected {status_code}, but got {test["expected_status"]}")
+            Assert.assertEqual(status_code, test["expected_status"], "Failed test for {}. Expected {}, but got {}", test["field"], test["expected_status"], status_code)
 
         # Test invalid Saving Money
         invalid_saving_money = [
@@ -350,7 +352,7 @@ class SalesTestScenario(BaseScenario):
         for test in invalid_saving_money:
             data = {"saving_money": {**saving_money_data["saving_money"], **test["data"]}}
             _, status_code = self.call(saving_money_endpoint, data)
-            Assert.assertEqual(status_code, test["expected_status"], f"Failed test for {test['field']}. Expected {status_code}, but got {test["expected_status"]}")
+            Assert.assertEqual(status_code, test["expected_status"], "Failed test for {}. Expected {}, but got {}", test["field"], test["expected_status"], status_code)
 
         # --------------------End of Failed Tests--------------------
         
@@ -369,31 +371,31 @@ class SalesTestScenario(BaseScenario):
         expected_household_bill = household_bill_data["household_bill"]
         actual_household_bill = form_summary["household_bill"]
         for key, value in expected_household_bill.items():
-            Assert.assertIn(key, actual_household_bill, msg=f"No {key} in household_bill field")
+            Assert.assertIn(key, actual_household_bill, "No {} in household_bill field", key)
             if key in ["custom_household_incomes", "custom_household_expenses"]:
                 for exp, act in zip(value, actual_household_bill[key]):
-                    Assert.assertEqual(float(exp["amount"]), float(act["amount"]), msg=f"Mismatch in {key} amount. Expected {exp['amount']}, but got {act['amount']}")
-                    Assert.assertEqual(exp["title"], act["title"], msg=f"Mismatch in {key} title. Expected {exp['title']}, but got {act['title']}")
+                    Assert.assertEqual(float(exp["amount"]), float(act["amount"]), "Mismatch in {} amount. Expected {}, but got {}", key, exp["amount"], act["amount"])
+                    Assert.assertEqual(exp["title"], act["title"], "Mismatch in {} title. Expected {}, but got {}", key, exp["title"], act["title"])
             else:
                 # Convert both to floats for numerical comparison if they are numbers
                 expected_value = float(value) if isinstance(value, str) and value.replace('.', '', 1).isdigit() else value
                 actual_value = float(actual_household_bill[key]) if isinstance(actual_household_bill[key], str) and actual_household_bill[key].replace('.', '', 1).isdigit() else actual_household_bill[key]
-                Assert.assertEqual(expected_value, actual_value, msg=f"Mismatch in {key}. Expected {expected_value}, but got {actual_value}")
+                Assert.assertEqual(expected_value, actual_value, "Mismatch in {}. Expected {}, but got {}", key, expected_value, actual_value)
 
         # Validate Assets and Liability in Summary
         expected_assets = asset_data["assets_liability"]
         actual_assets = form_summary["assets_liability"]
         for key, value in expected_assets.items():
-            Assert.assertIn(key, actual_assets, msg=f"No {key} in assets_liability field")
+            Assert.assertIn(key, actual_assets, "No {} in assets_liability field", key)
             if key in ["custom_assets", "custom_credits_loans"]:
                 for exp, act in zip(value, actual_assets[key]):
-                    Assert.assertEqual(float(exp["amount"]), float(act["amount"]), msg=f"Mismatch in {key} amount. Expected {exp['amount']}, but got {act['amount']}")
-                    Assert.assertEqual(exp["title"], act["title"], msg=f"Mismatch in {key} title. Expected {exp['title']}, but got {act['title']}")
+                    Assert.assertEqual(float(exp["amount"]), float(act["amount"]), "Mismatch in {} amount. Expected {}, but got {}", key, exp["amount"], act["amount"])
+                    Assert.assertEqual(exp["title"], act["title"], "Mismatch in {} title. Expected {}, but got {}", key, exp["title"], act["title"])
             else:
                 # Convert both to floats for numerical comparison if they are numbers
                 expected_value = float(value) if isinstance(value, str) and value.replace('.', '', 1).isdigit() else value
                 actual_value = float(actual_assets[key]) if isinstance(actual_assets[key], str) and actual_assets[key].replace('.', '', 1).isdigit() else actual_assets[key]
-                Assert.assertEqual(expected_value, actual_value, msg=f"Mismatch in {key}. Expected {expected_value}, but got {actual_value}")
+                Assert.assertEqual(expected_value, actual_value, "Mismatch in {}. Expected {}, but got {}", key, expected_value, actual_value)
 
 
         # Download PDF
@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.urls import reverse
 from django.utils.html import format_html
 from django.utils.http import urlencode
-from .models import Session, Scenario, Log
+from .models import Session, Scenario, Log, WorkItem, EndpointUsage, RequestRecord
 
 @admin.register(Session)
 class SessionAdmin(admin.ModelAdmin):
@@ -67,3 +67,27 @@ class LogAdmin(admin.ModelAdmin):
     @admin.display(description="Log Snippet")
     def text_snippet(self, obj):
         return obj.text[:50] + "..." if len(obj.text) > 50 else obj.text
+
+
+@admin.register(WorkItem)
+class WorkItemAdmin(admin.ModelAdmin):
+    list_display = ('id', 'session', 'scenario_path', 'state', 'worker', 'lease_expires_at', 'attempts')
+    search_fields = ('scenario_path', 'worker', 'session__id')
+    list_filter = ('state',)
+    ordering = ('session', 'position')
+
+
+@admin.register(EndpointUsage)
+class EndpointUsageAdmin(admin.ModelAdmin):
+    list_display = ('id', 'app_name', 'scenario_name', 'method', 'template', 'last_seen_at')
+    search_fields = ('scenario_name', 'template')
+    list_filter = ('app_name', 'method')
+    ordering = ('app_name', 'scenario_name', 'template')
+
+
+@admin.register(RequestRecord)
+class RequestRecordAdmin(admin.ModelAdmin):
+    list_display = ('id', 'scenario', 'step', 'method', 'template', 'status_code', 'ttfb_ms', 'total_ms', 'created_at')
+    search_fields = ('template', 'scenario__scenario_name')
+    list_filter = ('server', 'method', 'status_code')
+    ordering = ('-created_at',)
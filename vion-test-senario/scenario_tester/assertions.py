@@ -1,99 +1,136 @@
-import inspect
+import sys
+
+
+class AssertionFailure(AssertionError):
+    """
+    AssertionError raised by `Assert`. The message, including the call context,
+    is only rendered when the error is converted to a string.
+
+    Only the caller's code location is captured when the check fails (a direct
+    frame lookup, no source lines are read from disk).
+    """
+
+    def __init__(self, frame, standard_msg: str, standard_args: tuple, msg=None, msg_args: tuple = ()):
+        super().__init__()
+        self.filename = frame.f_code.co_filename
+        self.lineno = frame.f_lineno
+        self.function = frame.f_code.co_name
+        caller = frame.f_locals.get("self", None)
+        self.class_name = caller.__class__.__name__ if caller is not None else None
+        self._standard_msg = standard_msg
+        self._standard_args = standard_args
+        self._msg = msg
+        self._msg_args = msg_args
+        self._message = None
+
+    @property
+    def context(self) -> str:
+        context = f"{self.filename}:{self.lineno} - "
+        context += f"{self.class_name}.{self.function}" if self.class_name else self.function
+        return context
+
+    def __str__(self):
+        if self._message is None:
+            self._message = Assert._format_message(
+                self._msg, f"{self.context} - {self._standard_msg.format(*self._standard_args)}", *self._msg_args
+            )
+        return self._message
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({str(self)!r})"
+
 
 class Assert:
-    
+    """
+    Assertions for scenarios.
+
+    A passing check only evaluates its condition. The optional `msg` is used instead of the
+    standard message on failure and can be:
+    - A string, or any object (e.g. a response dict).
+    - A template with `str.format` placeholders, filled with the extra positional arguments:
+      `Assert.assertEqual(status_code, 400, "Failed test for Case {}. Got {}", index, status_code)`
+    - A callable without arguments returning the message: `msg=lambda: f"..."`
+    """
+
     @staticmethod
-    def _format_message(msg, standard_msg):
+    def _format_message(msg, standard_msg, *msg_args):
         """
         Formats the message to include additional context if provided.
         """
-        return msg if msg else standard_msg
+        if callable(msg):
+            msg = msg()
+        elif msg_args:
+            msg = msg.format(*msg_args)
+        return str(msg) if msg else standard_msg
 
     @staticmethod
     def _get_call_context():
         """
         Retrieves the calling context, including the class name, method name, file name, and line number.
         """
-        stack = inspect.stack()
-        # Get the previous frame (caller of the assert method)
-        caller_frame = stack[2]
-        caller_class = caller_frame.frame.f_locals.get('self', None)
-        class_name = caller_class.__class__.__name__ if caller_class else None
-        method_name = caller_frame.function
-        file_name = caller_frame.filename
-        line_number = caller_frame.lineno
-
-        context = f"{file_name}:{line_number} - "
-        context += f"{class_name}.{method_name}" if class_name else method_name
-        return context
+        return AssertionFailure(sys._getframe(2), "", ()).context
 
     @staticmethod
-    def assertEqual(first, second, msg=None):
+    def assertEqual(first, second, msg=None, *msg_args):
         """
         Checks if the first arg matches the second arg.
         Raises an AssertionError if the check fails, including the file and line number.
         """
         if first != second:
-            context = Assert._get_call_context()
-            standard_msg = f"{context} - Expected {second}, but got {first}."
-            raise AssertionError(Assert._format_message(msg, standard_msg))
+            raise AssertionFailure(sys._getframe(1), "Expected {1}, but got {0}.", (first, second), msg, msg_args)
 
     @staticmethod
-    def assertNotEqual(first, second, msg=None):
+    def assertNotEqual(first, second, msg=None, *msg_args):
         """
         Checks if the first arg does not match the second arg.
         """
         if first == second:
-            context = Assert._get_call_context()
-            standard_msg = f"{context} - Did not expect {second}, but got it."
-            raise AssertionError(Assert._format_message(msg, standard_msg))
+            raise AssertionFailure(sys._getframe(1), "Did not expect {0}, but got it.", (second,), msg, msg_args)
 
     @staticmethod
-    def assertIn(item, collection, msg=None):
+    def assertIn(item, collection, msg=None, *msg_args):
         """
         Checks if an item is in a collection.
         """
         if item not in collection:
-            context = Assert._get_call_context()
-            standard_msg = f"{context} - Expected {item} to be in {collection}."
-            raise AssertionError(Assert._format_message(msg, standard_msg))
+            raise AssertionFailure(sys._getframe(1), "Expected {0} to be in {1}.", (item, collection), msg, msg_args)
 
     @staticmethod
-    def assertNotIn(item, collection, msg=None):
+    def assertNotIn(item, collection, msg=None, *msg_args):
         """
         Checks if an item is not in a collection.
         """
         if item in collection:
-            context = Assert._get_call_context()
-            standard_msg = f"{context} - Did not expect {item} to be in {collection}."
-            raise AssertionError(Assert._format_message(msg, standard_msg))
+            raise AssertionFailure(
+                sys._getframe(1), "Did not expect {0} to be in {1}.", (item, collection), msg, msg_args
+            )
 
     @staticmethod
-    def assertGreaterThan(value, greater_value, msg=None):
+    def assertGreaterThan(value, greater_value, msg=None, *msg_args):
         """
         Checks if a value is greater than a greater_value.
         """
         if value <= greater_value:
-            context = Assert._get_call_context()
-            standard_msg = f"{context} - Expected {value} to be greater than {greater_value}."
-            raise AssertionError(Assert._format_message(msg, standard_msg))
+            raise AssertionFailure(
+                sys._getframe(1), "Expected {0} to be greater than {1}.", (value, greater_value), msg, msg_args
+            )
 
     @staticmethod
-    def assertLessThan(value, lesser_value, msg=None):
+    def assertLessThan(value, lesser_value, msg=None, *msg_args):
         """
         Checks if a value is less than a lesser_value.
         """
         if value >= lesser_value:
-            context = Assert._get_call_context()
-            standard_msg = f"{context} - Expected {value} to be less than {lesser_value}."
-            raise AssertionError(Assert._format_message(msg, standard_msg))
+            raise AssertionFailure(
+                sys._getframe(1), "Expected {0} to be less than {1}.", (value, lesser_value), msg, msg_args
+            )
 
     @staticmethod
-    def assertNotNull(value, msg=None):
+    def assertNotNull(value, msg=None, *msg_args):
         """
         Checks if a value is not null (None).
         """
         if value is None:
-            context = Assert._get_call_context()
-            standard_msg = f"{context} - Expected value to not be null, but got None."
-            raise AssertionError(Assert._format_message(msg, standard_msg))
+            raise AssertionFailure(
+                sys._getframe(1), "Expected value to not be null, but got None.", (), msg, msg_args
+            )
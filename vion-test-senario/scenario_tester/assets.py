@@ -0,0 +1,151 @@
+import hashlib
+import mimetypes
+import mmap
+import os
+import uuid
+from threading import Lock
+
+from django.conf import settings
+
+
+class UploadAsset:
+    """
+    A fixture file uploaded by scenarios, memory-mapped once per process.
+
+    Attributes:
+        name: File name sent with the upload.
+        size, sha256, md5: Of the content, compared with the stored file by `BaseScenario.assert_uploaded`.
+        content_type: Guessed from the name, "application/octet-stream" when unknown.
+        data: The content, a read-only memoryview of the mapped file shared by every upload.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.content_type = mimetypes.guess_type(self.name)[0] or "application/octet-stream"
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size:
+                self.data = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+            else:
+                self.data = memoryview(b"")  # Empty files can not be mapped
+        self.size = self.data.nbytes
+        self.sha256 = hashlib.sha256(self.data).hexdigest()
+        self.md5 = hashlib.md5(self.data).hexdigest()
+
+    def upload(self) -> tuple:
+        """
+        The value of a `files` field. `BaseScenario.call` sends it in a `MultipartBody`, which reads `data`
+        from the mapping as the body is sent.
+        """
+        return self.name, self.data, self.content_type
+
+    def __repr__(self):
+        return f"<UploadAsset {self.name} {self.size} bytes>"
+
+
+class UploadAssetCache:
+    """
+    Loads every upload fixture once per process, repeated uploads (load tests) read no file.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._assets = {}
+
+    def get(self, path) -> UploadAsset:
+        """
+        Raises FileNotFoundError like `open` when the file does not exist.
+        """
+        path = os.path.abspath(path)
+        asset = self._assets.get(path)
+        if asset is None:
+            with self._lock:
+                asset = self._assets.get(path)
+                if asset is None:
+                    asset = self._assets[path] = UploadAsset(path)
+        return asset
+
+    def clear(self):
+        with self._lock:
+            self._assets.clear()
+
+
+class MultipartBody:
+    """
+    A multipart/form-data body referencing the content of its files instead of copying it, sent by
+    `BaseScenario.call` for uploads: the `files` argument of requests and httpx builds the whole body in memory.
+
+    requests sends the chunks of `iter(body)` to the socket as they are, httpx reads `aiter(body)`
+    (h11 copies each chunk it sends, `STREAM_CHUNK_SIZE` bytes at most). The fields and files take the
+    forms requests accepts, fields and files that are None are skipped.
+    """
+
+    def __init__(self, fields=None, files=None):
+        self.boundary = uuid.uuid4().hex
+        self._pieces = []
+        for name, values in (fields or {}).items():
+            for value in values if isinstance(values, (list, tuple)) else [values]:
+                if value is not None:
+                    self._add_part(name, value if isinstance(value, bytes) else str(value).encode())
+        for name, file in (files or {}).items():
+            filename, content, content_type = self._unpack(name, file)
+            if content is not None:
+                self._add_part(name, content, filename, content_type)
+        self._pieces.append(memoryview(f"--{self.boundary}--\r\n".encode()))
+
+    @property
+    def headers(self) -> dict:
+        return {
+            "Content-Type": f"multipart/form-data; boundary={self.boundary}",
+            "Content-Length": str(len(self)),
+        }
+
+    def __len__(self):
+        return sum(piece.nbytes for piece in self._pieces)
+
+    def __iter__(self):
+        chunk_size = settings.STREAM_CHUNK_SIZE
+        for piece in self._pieces:
+            for start in range(0, piece.nbytes, chunk_size):
+                yield piece[start:start + chunk_size]
+
+    async def __aiter__(self):
+        for chunk in self:
+            yield chunk
+
+    @staticmethod
+    def _unpack(name: str, file) -> tuple:
+        """
+        (filename, content, content type) of a `files` value: a (filename, content[, content type]) tuple
+        or the content, bytes-like, str or a file object.
+        """
+        filename = content_type = None
+        if isinstance(file, tuple):
+            filename, file, *rest = file
+            content_type = rest[0] if rest else None
+        if isinstance(file, str):
+            file = file.encode()
+        elif file is not None and hasattr(file, "read"):
+            filename = filename or os.path.basename(getattr(file, "name", "") or "")
+            file = file.read()
+        filename = filename or name
+        content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        return filename, file, content_type
+
+    def _add_part(self, name: str, content, filename: str = None, content_type: str = None):
+        disposition = f'form-data; name="{self._quote(name)}"'
+        if filename is not None:
+            disposition += f'; filename="{self._quote(filename)}"'
+        head = f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n"
+        if content_type is not None:
+            head += f"Content-Type: {content_type}\r\n"
+        self._pieces.append(memoryview(f"{head}\r\n".encode()))
+        self._pieces.append(memoryview(content).cast("B"))
+        self._pieces.append(memoryview(b"\r\n"))
+
+    @staticmethod
+    def _quote(value: str) -> str:
+        return value.replace('"', "%22").replace("\r", "%0D").replace("\n", "%0A")
+
+
+upload_assets = UploadAssetCache()
@@ -0,0 +1,154 @@
+import asyncio
+import inspect
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier, Lock, current_thread
+
+import httpx
+from django.conf import settings
+from django.db import connections
+
+from .scheduling import ResourceScheduler
+from .transport import http_session_pool
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHTTPClient:
+    """
+    Shares one `httpx.AsyncClient` per event loop and base URL.
+
+    All scenarios running on the loop multiplex their requests over the
+    client's connection pool, limited by `settings.ASYNC_MAX_CONNECTIONS`.
+    """
+
+    def __init__(self):
+        self._clients = {}
+        # Sessions running at the same time each have their own loop in their own thread
+        self._lock = Lock()
+
+    def get_client(self, base_url: str) -> httpx.AsyncClient:
+        key = (asyncio.get_running_loop(), base_url)
+        client = self._clients.get(key)
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.ASYNC_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.ASYNC_MAX_CONNECTIONS,
+                ),
+                # Same behaviour as the requests based `call`, which has no timeout
+                timeout=httpx.Timeout(None),
+            )
+            with self._lock:
+                self._clients[key] = client
+        return client
+
+    async def aclose(self):
+        """
+        Closes every client bound to the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = [self._clients.pop(key) for key in list(self._clients) if key[0] is loop]
+        for client in clients:
+            await client.aclose()
+
+
+async_http_client = AsyncHTTPClient()
+
+
+class AsyncScenarioRunner:
+    """
+    Runs scenarios as asyncio tasks with at most `concurrency` scenarios in flight.
+
+    - Scenarios whose `run` is a coroutine are awaited on the event loop through
+      `BaseScenario.aexecute` and make their requests with `acall`.
+    - Synchronous `run` bodies are adapted by running `sync_runner` in a pool of `sync_workers`
+      threads (`ASYNC_SYNC_WORKERS`, `THREAD_WORKERS` by default), so existing scenarios keep
+      working unchanged. Every pool thread closes its HTTP sessions and database connections at the end.
+    - Database writes of coroutine scenarios go through a single-thread executor,
+      which keeps them ordered and off the event loop.
+    - Scenarios are picked by a `ResourceScheduler`, scenarios sharing a resource never overlap.
+    """
+
+    # Seconds to wait before looking again when every pending scenario waits for a resource
+    resource_poll_interval = 0.05
+
+    def __init__(self, base_url: str, session, concurrency: int = None, sync_workers: int = None):
+        self.base_url = base_url
+        self.session = session
+        self.concurrency = concurrency or settings.ASYNC_CONCURRENCY
+        self.sync_workers = sync_workers or settings.ASYNC_SYNC_WORKERS or settings.THREAD_WORKERS
+
+    def run(self, scenarios: list, sync_runner):
+        """
+        Blocks until every scenario has finished.
+
+        Args:
+            scenarios: Scenario classes to execute.
+            sync_runner: Callable `(base_url, scenario_class, session)` used for synchronous scenarios,
+                it is also responsible for recording their progress.
+        """
+        asyncio.run(self._run_all(scenarios, sync_runner))
+
+    async def _run_all(self, scenarios, sync_runner):
+        scheduler = ResourceScheduler(scenarios, self.base_url)
+        workers = min(self.concurrency, len(scenarios))
+        sync_threads = []
+        with ThreadPoolExecutor(
+            max_workers=max(min(self.sync_workers, len(scenarios)), 1),
+            initializer=lambda: sync_threads.append(current_thread()),
+        ) as sync_executor, ThreadPoolExecutor(max_workers=1) as db_executor:
+            try:
+                await asyncio.gather(
+                    *(self._worker(scheduler, sync_executor, db_executor, sync_runner) for _ in range(workers)),
+                )
+            finally:
+                await async_http_client.aclose()
+                await self._close_thread_resources(sync_executor, len(sync_threads))
+                db_executor.submit(connections.close_all)
+
+    @staticmethod
+    async def _close_thread_resources(executor, threads: int):
+        """
+        Closes the HTTP sessions and database connections of each of the executor's `threads` threads.
+        Every job waits for the others, so each thread runs exactly one.
+        """
+        if not threads:
+            return
+        barrier = Barrier(threads)
+
+        def close():
+            http_session_pool.close()
+            connections.close_all()
+            barrier.wait()
+
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, close) for _ in range(threads)))
+
+    async def _worker(self, scheduler, sync_executor, db_executor, sync_runner):
+        while True:
+            scenario_class = scheduler.take()
+            if scenario_class is None:
+                if not scheduler.pending:
+                    return
+                await asyncio.sleep(self.resource_poll_interval)
+                continue
+            try:
+                await self._run_one(scenario_class, sync_executor, db_executor, sync_runner)
+            except Exception:
+                # `aexecute` records the scenario's own errors, keep the worker alive for the rest
+                logger.exception("Scenario %s failed to run", scenario_class.__name__)
+            finally:
+                scheduler.release(scenario_class)
+
+    async def _run_one(self, scenario_class, sync_executor, db_executor, sync_runner):
+        loop = asyncio.get_running_loop()
+        if inspect.iscoroutinefunction(scenario_class.run):
+            if await loop.run_in_executor(db_executor, self.session.is_cancelled):
+                return
+            instance = scenario_class(self.base_url)
+            await instance.aexecute(self.session, db_executor)
+            await loop.run_in_executor(db_executor, self.session.record_progress, instance.scenario.status)
+        else:
+            await loop.run_in_executor(sync_executor, sync_runner, self.base_url, scenario_class, self.session)
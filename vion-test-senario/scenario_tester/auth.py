@@ -0,0 +1,135 @@
+import asyncio
+import base64
+import json
+import time
+from threading import Lock
+from weakref import WeakKeyDictionary
+
+from django.conf import settings
+
+
+def get_token_expiry(access_token: str):
+    """
+    Returns the `exp` claim (unix timestamp) of a JWT, or None if it can not be decoded.
+    The signature is not verified, the value is only used to schedule a refresh.
+    """
+    try:
+        payload = access_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class CachedToken:
+    def __init__(self, response_json: dict):
+        self.response_json = response_json
+        self.expires_at = get_token_expiry(response_json["access"])
+        if self.expires_at is None:
+            self.expires_at = time.time() + settings.AUTH_TOKEN_DEFAULT_TTL
+
+    def is_fresh(self) -> bool:
+        """
+        False once the token is within `AUTH_TOKEN_REFRESH_MARGIN` seconds of expiring.
+        """
+        return time.time() < self.expires_at - settings.AUTH_TOKEN_REFRESH_MARGIN
+
+
+class TokenBroker:
+    """
+    Shares login responses between all scenarios and threads, keyed by (environment, role).
+
+    `BaseScenario.login` asks the broker first and only hits the login endpoint when
+    there is no cached token or the cached one is about to expire. Concurrent logins
+    for the same key wait for a single request instead of all logging in: threads on a
+    per-key lock, coroutines on a per-key `asyncio.Lock` of their event loop.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._tokens = {}
+        self._key_locks = {}
+        self._async_key_locks = WeakKeyDictionary()  # event loop -> {key: asyncio.Lock}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, environment: str, role: str):
+        """
+        Returns the cached login response for the key, or None if it is missing or stale.
+        """
+        if not settings.AUTH_TOKEN_CACHE:
+            return None
+        with self._lock:
+            token = self._tokens.get((environment, role))
+            return token.response_json if token and token.is_fresh() else None
+
+    def store(self, environment: str, role: str, response_json, status_code: int):
+        """
+        Caches a successful login response.
+        """
+        if status_code != 200 or not response_json or "access" not in response_json:
+            return
+        with self._lock:
+            self._tokens[(environment, role)] = CachedToken(response_json)
+
+    def login(self, environment: str, role: str, fetch):
+        """
+        Returns (response_json, status_code) from the cache, or from `fetch()` on a miss.
+        """
+        response_json = self.get(environment, role)
+        if response_json is None:
+            with self._key_lock(environment, role):
+                # Another thread may have logged in while we were waiting
+                response_json = self.get(environment, role)
+                if response_json is None:
+                    self._count("misses")
+                    response_json, status_code = fetch()
+                    self.store(environment, role, response_json, status_code)
+                    return response_json, status_code
+        self._count("hits")
+        return response_json, 200
+
+    async def alogin(self, environment: str, role: str, fetch):
+        """
+        Async counterpart of `login`, `fetch` is a coroutine function.
+        """
+        response_json = self.get(environment, role)
+        if response_json is None:
+            async with self._async_key_lock(environment, role):
+                # Another coroutine may have logged in while we were waiting
+                response_json = self.get(environment, role)
+                if response_json is None:
+                    self._count("misses")
+                    response_json, status_code = await fetch()
+                    self.store(environment, role, response_json, status_code)
+                    return response_json, status_code
+        self._count("hits")
+        return response_json, 200
+
+    def invalidate(self, environment: str = None, role: str = None):
+        """
+        Drops the cached token of one key, or every cached token when called without arguments.
+        """
+        with self._lock:
+            if environment is None:
+                self._tokens.clear()
+            else:
+                self._tokens.pop((environment, role), None)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _key_lock(self, environment: str, role: str) -> Lock:
+        with self._lock:
+            return self._key_locks.setdefault((environment, role), Lock())
+
+    def _async_key_lock(self, environment: str, role: str) -> asyncio.Lock:
+        # asyncio locks belong to the loop they are first used in, every run of the asyncio engine has its own
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            return self._async_key_locks.setdefault(loop, {}).setdefault((environment, role), asyncio.Lock())
+
+
+token_broker = TokenBroker()
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark of the per-assert cost of `Assert`, compared with the previous
+implementation (eager f-string messages and `inspect.stack()` on failure).
+
+Usage:
+    python -m scenario_tester.benchmarks.assertions [--number N]
+"""
+import argparse
+import inspect
+import timeit
+
+from scenario_tester.assertions import Assert
+
+
+class LegacyAssert:
+    """
+    The `Assert.assertEqual` implementation before lazy messages, kept for comparison.
+    """
+
+    @staticmethod
+    def _get_call_context():
+        stack = inspect.stack()
+        caller_frame = stack[2]
+        caller_class = caller_frame.frame.f_locals.get('self', None)
+        class_name = caller_class.__class__.__name__ if caller_class else None
+        method_name = caller_frame.function
+        context = f"{caller_frame.filename}:{caller_frame.lineno} - "
+        context += f"{class_name}.{method_name}" if class_name else method_name
+        return context
+
+    @staticmethod
+    def assertEqual(first, second, msg=None):
+        if first != second:
+            context = LegacyAssert._get_call_context()
+            standard_msg = f"{context} - Expected {second}, but got {first}."
+            raise AssertionError(msg if msg else standard_msg)
+
+
+def legacy_pass(key="amount", expected=100.0, actual=100.0):
+    LegacyAssert.assertEqual(expected, actual, msg=f"Mismatch in {key}. Expected {expected}, but got {actual}")
+
+
+def lazy_pass(key="amount", expected=100.0, actual=100.0):
+    Assert.assertEqual(expected, actual, "Mismatch in {}. Expected {}, but got {}", key, expected, actual)
+
+
+def legacy_fail():
+    try:
+        LegacyAssert.assertEqual(200, 400)
+    except AssertionError as assert_err:
+        return str(assert_err)
+
+
+def lazy_fail():
+    try:
+        Assert.assertEqual(200, 400)
+    except AssertionError as assert_err:
+        return str(assert_err)
+
+
+CASES = [
+    ("pass, formatted message", legacy_pass, lazy_pass),
+    ("fail, message rendered", legacy_fail, lazy_fail),
+]
+
+
+def per_call_ns(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+def run(number: int) -> list:
+    results = []
+    for name, legacy, lazy in CASES:
+        # inspect.stack() is orders of magnitude slower, keep its run short
+        legacy_number = number if legacy is not legacy_fail else max(number // 100, 1)
+        results.append({
+            "case": name,
+            "before_ns": per_call_ns(legacy, legacy_number),
+            "after_ns": per_call_ns(lazy, number),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=100_000, help="Calls per measurement")
+    args = parser.parse_args()
+
+    print(f"{'case':<26}{'before (ns)':>14}{'after (ns)':>14}{'speedup':>10}")
+    for result in run(args.number):
+        speedup = result["before_ns"] / result["after_ns"]
+        print(f"{result['case']:<26}{result['before_ns']:>14.0f}{result['after_ns']:>14.0f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Benchmarks of the time the framework adds on top of the network: per call (`BaseScenario.call` and its
+`RequestRecord`), per log, per scenario (the `Scenario` row created and finalized), scenario discovery,
+session rendering, and whole runs per engine and worker count. Synthetic scenarios run against a local
+HTTP stub answering right away, so the numbers are the framework's and the database's.
+
+Usage:
+    python manage.py benchmark [--output results.json] [--compare baseline.json]
+"""
+import json
+import platform
+import subprocess
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import requests
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from scenario_tester.assertions import Assert
+from scenario_tester.endpoints import EndPoint, HTTPMethods
+from scenario_tester.index import scenario_index
+from scenario_tester.models import Log, Scenario, Session
+from scenario_tester.scenarios import BaseScenario
+from scenario_tester.services import ScenarioService
+from scenario_tester.writers import background_writer
+
+DEFAULT_ENGINES = ("sequential", "thread", "asyncio", "process")
+# Server the benchmark sessions are recorded under
+SERVER = "Benchmark"
+
+STUB_ENDPOINT = EndPoint(HTTPMethods.GET, "/benchmark/")
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, without TCP_NODELAY every response waits for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """
+    Keep-alive JSON server on a free local port, answering every GET with {"path": <path>}.
+    """
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+        self._server.daemon_threads = True
+        Thread(target=self._server.serve_forever, name="benchmark-stub", daemon=True).start()
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class EmptyScenario(BaseScenario):
+    def run(self):
+        pass
+
+
+class CallScenario(BaseScenario):
+    calls = 100
+
+    def run(self):
+        for _ in range(self.calls):
+            self.call(STUB_ENDPOINT)
+
+
+class LogScenario(BaseScenario):
+    logs = 100
+
+    def run(self):
+        for number in range(self.logs):
+            self.info(f"Message {number}")
+
+
+class MixedScenario(BaseScenario):
+    """
+    A typical scenario: steps with a call, assertions and a log each.
+    """
+
+    def run(self):
+        for step in range(5):
+            self.set_step(f"Step {step}")
+            response, status_code = self.call(STUB_ENDPOINT, params={"step": step})
+            Assert.assertEqual(status_code, 200)
+            Assert.assertIn("path", response)
+            self.info(f"Got {response['path']}")
+
+
+def best_of(func, repeat: int) -> float:
+    """
+    Shortest duration of `repeat` calls of `func`, in seconds.
+    """
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return min(durations)
+
+
+def _execute(scenario_class, base_url: str, session: Session, times: int = 1):
+    for _ in range(times):
+        scenario_class(base_url).execute(session)
+    # Persisting the logs and request records is part of the cost
+    background_writer.drain()
+
+
+def bench_calls(base_url: str, session: Session, number: int, repeat: int) -> dict:
+    http = requests.Session()
+    raw = best_of(lambda: [http.get(f"{base_url}{STUB_ENDPOINT.url}") for _ in range(number)], repeat) / number
+    http.close()
+    calls = type("CallScenario", (CallScenario,), {"calls": number})
+    empty = best_of(lambda: _execute(EmptyScenario, base_url, session), repeat)
+    framework = (best_of(lambda: _execute(calls, base_url, session), repeat) - empty) / number
+    return {"calls": number, "raw_us": raw * 1e6, "framework_us": framework * 1e6, "overhead_us": (framework - raw) * 1e6}
+
+
+def bench_logs(base_url: str, session: Session, number: int, repeat: int) -> dict:
+    logs = type("LogScenario", (LogScenario,), {"logs": number})
+    empty = best_of(lambda: _execute(EmptyScenario, base_url, session), repeat)
+    per_log = (best_of(lambda: _execute(logs, base_url, session), repeat) - empty) / number
+    return {"logs": number, "per_log_us": per_log * 1e6}
+
+
+def bench_scenarios(base_url: str, session: Session, number: int, repeat: int) -> dict:
+    per_scenario = best_of(lambda: _execute(EmptyScenario, base_url, session, number), repeat) / number
+    return {"scenarios": number, "per_scenario_ms": per_scenario * 1e3}
+
+
+def bench_discovery(repeat: int) -> dict:
+    """
+    `find_scenarios` with the modules parsed, with the index read from its cache file, and cached.
+    Modules are only imported by the first call of the process, the later ones reuse them.
+    """
+
+    def discover():
+        ScenarioService.find_scenarios.cache_clear()
+        scenario_index.clear()
+        return ScenarioService.find_scenarios()
+
+    with override_settings(SCENARIO_INDEX_CACHE=None):
+        first = best_of(discover, 1)
+        parsed = best_of(discover, repeat)
+    # Written by the first discovery, read by the next ones
+    discover()
+    index_cache = best_of(discover, repeat)
+    cached = best_of(ScenarioService.find_scenarios, repeat)
+    return {
+        "scenarios": len(ScenarioService.find_scenarios()),
+        "first_ms": first * 1e3,
+        "parsed_ms": parsed * 1e3,
+        "index_cache_ms": index_cache * 1e3,
+        "cached_ms": cached * 1e3,
+    }
+
+
+def bench_rendering(scenarios: int, logs: int, repeat: int) -> dict:
+    """
+    Serializes a session of `scenarios` scenarios with `logs` logs each, as the session details view does.
+    """
+    from scenario_tester.serializers import SessionSerializer
+
+    session = Session.objects.create(server=SERVER)
+    rows = Scenario.objects.bulk_create(
+        Scenario(session=session, scenario_name=f"Scenario{number}", status="passed", end_time=timezone.now())
+        for number in range(scenarios)
+    )
+    Log.objects.bulk_create(
+        Log(scenario=row, text=f"Message {number}") for row in rows for number in range(logs)
+    )
+
+    def render():
+        return SessionSerializer(Session.objects.with_scenario_details().get(pk=session.pk)).data
+
+    with CaptureQueriesContext(connection) as queries:
+        render()
+    return {
+        "scenarios": scenarios,
+        "logs": scenarios * logs,
+        "queries": len(queries),
+        "render_ms": best_of(render, repeat) * 1e3,
+    }
+
+
+def bench_engines(base_url: str, engines, workers, scenarios: int) -> dict:
+    """
+    Runs `scenarios` `MixedScenario`s with every engine and worker count. Returns {"<engine>/<workers>": result}.
+    """
+    results = {}
+    for engine in engines:
+        worker_setting = ScenarioService.WORKER_SETTINGS.get(engine)
+        for worker_count in workers if worker_setting else [1]:
+            overrides = {worker_setting: worker_count} if worker_setting else {}
+            with override_settings(**overrides):
+                session = Session.objects.create(server=SERVER)
+                started = time.perf_counter()
+                ScenarioService.execute_scenarios(
+                    base_url, SERVER, engine=engine, session=session, scenarios=[MixedScenario] * scenarios
+                )
+                seconds = time.perf_counter() - started
+            session.refresh_from_db()
+            results[f"{engine}/{worker_count}"] = {
+                "scenarios": scenarios,
+                "failed": session.failed_scenarios,
+                "seconds": seconds,
+                "scenarios_per_second": scenarios / seconds,
+                "per_scenario_ms": seconds / scenarios * 1e3,
+            }
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(number: int = 200, repeat: int = 3, scenarios: int = 40, engines=DEFAULT_ENGINES,
+                   workers=(1, 4, 8)) -> dict:
+    """
+    Runs every benchmark against a fresh stub and returns {"meta": ..., "results": ...}.
+    Writes to the configured database, run it on a throwaway one (`manage.py benchmark` does).
+
+    Args:
+        number: Calls, logs and scenarios measured by the per-item benchmarks.
+        repeat: The per-item benchmarks keep the best of `repeat` measurements.
+        scenarios: Scenarios of every engine run.
+        engines, workers: Engines and worker counts of the engine runs.
+    """
+    options = {"number": number, "repeat": repeat, "scenarios": scenarios, "engines": list(engines), "workers": list(workers)}
+    with StubServer() as stub:
+        session = Session.objects.create(server=SERVER)
+        results = {
+            "call": bench_calls(stub.url, session, number, repeat),
+            "log": bench_logs(stub.url, session, number, repeat),
+            "scenario": bench_scenarios(stub.url, session, number, repeat),
+            "discovery": bench_discovery(repeat),
+            "rendering": bench_rendering(scenarios, 20, repeat),
+            "engines": bench_engines(stub.url, engines, workers, scenarios),
+        }
+        session.finalize()
+    return {
+        "meta": {
+            "commit": _commit(),
+            "created_at": timezone.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "database": connection.vendor,
+            "options": options,
+        },
+        "results": results,
+    }
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    """
+    {"call.overhead_us": 12.3, "engines.thread/4.seconds": 0.8, ...}, the numeric values of `results`.
+    """
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(current: dict, baseline: dict) -> list:
+    """
+    Returns (metric, baseline value, current value, relative change) for the metrics of both runs.
+    """
+    before, after = flatten(baseline["results"]), flatten(current["results"])
+    return [
+        (metric, before[metric], value, (value - before[metric]) / before[metric] if before[metric] else None)
+        for metric, value in after.items()
+        if metric in before
+    ]
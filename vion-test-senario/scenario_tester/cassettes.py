@@ -0,0 +1,266 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import tempfile
+from datetime import timedelta
+from threading import Lock
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from requests.structures import CaseInsensitiveDict
+
+FORMAT_VERSION = 2
+# Describe the body as it was received, not as it is stored
+_DROPPED_HEADERS = ("Content-Encoding", "Content-Length", "Transfer-Encoding", "Connection", "Keep-Alive")
+
+
+class CassetteMiss(LookupError):
+    pass
+
+
+def body_hash(params=None, files=None) -> str:
+    """
+    Hash of the call arguments rather than of the encoded body, which differs between runs for multipart
+    uploads (random boundary). Params are hashed as sorted JSON, files by field name and content.
+    """
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode())
+    for name, file in sorted((files or {}).items()):
+        digest.update(name.encode())
+        if isinstance(file, tuple):  # (filename, file, ...) as accepted by requests
+            file = file[1]
+        if isinstance(file, (bytes, bytearray, memoryview)):
+            digest.update(file)
+        elif isinstance(file, str):
+            digest.update(file.encode())
+        elif file is not None:
+            # The request already read the file, rewind it for the hash then restore its position
+            position = file.tell()
+            file.seek(0)
+            while chunk := file.read(1 << 16):
+                digest.update(chunk)
+            file.seek(position)
+    return digest.hexdigest()[:16]
+
+
+class MappedBody(io.RawIOBase):
+    """
+    Readable view on a slice of a memory-mapped bodies file, used as the `raw` of replayed responses.
+    `response.iter_content()` streams it chunk by chunk, only `response.content` copies it whole.
+    """
+
+    def __init__(self, buffer: memoryview):
+        super().__init__()
+        self._buffer = buffer
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, target) -> int:
+        chunk = self._buffer[self._position:self._position + len(target)]
+        target[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+
+class Cassette:
+    """
+    The calls of one scenario run, stored in one `<name>.cassette` file named after the scenario's class path:
+    - Its first line, the JSON index: the interactions in call order, each with its method, endpoint template,
+      path, body hash, status, headers, request size and the offset and length of its response body.
+    - Then the response bodies, concatenated. Identical bodies (e.g. every login) are stored once.
+
+    The index and the bodies are replaced together, a reader never gets the index of one recording with the
+    bodies of another. The file is memory-mapped, replayed bodies are read from the page cache on demand.
+    """
+
+    def __init__(self, index: dict, bodies: memoryview):
+        self.index = index
+        self.bodies = bodies
+        # Interaction numbers in call order by (method, template) and by (method, template, body hash)
+        self.by_endpoint = {}
+        self.by_body = {}
+        for number, interaction in enumerate(self.interactions):
+            key = (interaction["method"], interaction["template"])
+            self.by_endpoint.setdefault(key, []).append(number)
+            self.by_body.setdefault((*key, interaction["body_hash"]), []).append(number)
+
+    @property
+    def interactions(self) -> list:
+        return self.index["interactions"]
+
+    @staticmethod
+    def path(directory, name: str) -> str:
+        return os.path.join(directory, f"{name}.cassette")
+
+    @classmethod
+    def load(cls, directory, name: str) -> "Cassette":
+        path = cls.path(directory, name)
+        with open(path, "rb") as file:
+            try:
+                index = json.loads(file.readline())
+            except ValueError:
+                index = {}
+            if index.get("version") != FORMAT_VERSION:
+                raise CassetteMiss(f"Cassette {path} was recorded with another format, record it again.")
+            bodies_start = file.tell()
+            if os.fstat(file.fileno()).st_size > bodies_start:
+                bodies = memoryview(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))[bodies_start:]
+            else:
+                bodies = memoryview(b"")  # Empty files can not be mapped
+        return cls(index, bodies)
+
+
+class CassetteRecorder:
+    """
+    Collects the calls of one scenario run, `close()` writes them (replacing the previous recording).
+    """
+
+    replaying = False
+
+    def __init__(self, directory, name: str, base_url: str):
+        self.directory = directory
+        self.name = name
+        self.base_url = base_url
+        self._interactions = []
+        self._bodies = io.BytesIO()
+        self._offsets = {}  # Body digest -> offset, to store identical bodies once
+
+    def record(self, endpoint, url: str, params, files, response, content: bytes = None):
+        """
+        Adds a call, `response` is a requests or httpx response. The `content` of streamed responses
+        is passed separately, they were read already.
+        """
+        content = response.content if content is None else content
+        digest = hashlib.sha256(content).digest()
+        if digest not in self._offsets:
+            self._offsets[digest] = self._bodies.tell()
+            self._bodies.write(content)
+        self._interactions.append({
+            "method": endpoint.method.value,
+            "template": endpoint.template,
+            "path": url[len(self.base_url):],
+            "body_hash": body_hash(params, files),
+            "status": response.status_code,
+            "headers": {
+                name: value for name, value in response.headers.items()
+                if name.title() not in _DROPPED_HEADERS
+            },
+            "request_bytes": int(response.request.headers.get("Content-Length") or 0),
+            "offset": self._offsets[digest],
+            "length": len(content),
+        })
+
+    def close(self):
+        os.makedirs(self.directory, exist_ok=True)
+        index = {
+            "version": FORMAT_VERSION,
+            "scenario": self.name,
+            "recorded_at": timezone.now().isoformat(),
+            "interactions": self._interactions,
+        }
+        # Runs of the same scenario may end at the same time (load tests), each replaces the file whole
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, prefix=".cassette-")
+        with os.fdopen(descriptor, "wb") as temporary_file:
+            temporary_file.write(json.dumps(index).encode() + b"\n")
+            temporary_file.write(self._bodies.getbuffer())
+        os.replace(temporary_path, Cassette.path(self.directory, self.name))
+
+
+class CassettePlayer:
+    """
+    Serves the calls of one scenario run from a `Cassette`, without network.
+
+    A call gets the first interaction not served yet with the same method, endpoint template and body hash,
+    or else the first one with the same method and template: bodies holding the time or random names do not
+    match their recording, the calls to an endpoint are then served in their recorded order.
+    """
+
+    replaying = True
+
+    def __init__(self, cassette: Cassette):
+        self.cassette = cassette
+        self._served = set()
+
+    def replay(self, endpoint, url: str, params, files, headers: dict) -> requests.Response:
+        key = (endpoint.method.value, endpoint.template)
+        number = self._first_unserved(self.cassette.by_body.get((*key, body_hash(params, files)), ()))
+        if number is None:
+            number = self._first_unserved(self.cassette.by_endpoint.get(key, ()))
+        if number is None:
+            raise CassetteMiss(
+                f"No recorded call left for {' '.join(key)} in cassette {self.cassette.index['scenario']}."
+            )
+        self._served.add(number)
+        return self._response(self.cassette.interactions[number], url, headers)
+
+    def _first_unserved(self, numbers):
+        return next((number for number in numbers if number not in self._served), None)
+
+    def _response(self, interaction: dict, url: str, headers: dict) -> requests.Response:
+        request = requests.Request(interaction["method"], url, headers=headers).prepare()
+        request.headers["Content-Length"] = str(interaction["request_bytes"])
+
+        response = requests.Response()
+        response.status_code = interaction["status"]
+        response.headers = CaseInsensitiveDict(interaction["headers"])
+        response.headers["Content-Length"] = str(interaction["length"])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = url
+        response.request = request
+        response.elapsed = timedelta(0)
+        offset = interaction["offset"]
+        response.raw = MappedBody(self.cassette.bodies[offset:offset + interaction["length"]])
+        return response
+
+    def close(self):
+        pass
+
+
+class CassetteLibrary:
+    """
+    Opens the cassette of every scenario run according to `CASSETTE_MODE`. Loaded cassettes are kept
+    (and their bodies mapped) while their file is not replaced, concurrent runs of a scenario share them.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._loaded = {}  # name -> ((file inode, modification time), Cassette)
+
+    def open(self, scenario_class, base_url: str):
+        """
+        A `CassetteRecorder` or `CassettePlayer` for a run of `scenario_class`, None when cassettes are disabled.
+        """
+        name = f"{scenario_class.__module__}.{scenario_class.__qualname__}"
+        match settings.CASSETTE_MODE:
+            case None:
+                return None
+            case "record":
+                return CassetteRecorder(settings.CASSETTE_DIR, name, base_url)
+            case "replay":
+                return CassettePlayer(self.load(name))
+            case mode:
+                raise ValueError(f"Unknown cassette mode '{mode}', expected 'record', 'replay' or None.")
+
+    def load(self, name: str) -> Cassette:
+        try:
+            stat = os.stat(Cassette.path(settings.CASSETTE_DIR, name))
+        except FileNotFoundError:
+            raise CassetteMiss(f"No cassette recorded for {name} in {settings.CASSETTE_DIR}.")
+        with self._lock:
+            loaded = self._loaded.get(name)
+            # Every recording replaces the file, a new inode
+            version = (stat.st_ino, stat.st_mtime_ns)
+            if loaded is None or loaded[0] != version:
+                loaded = self._loaded[name] = (version, Cassette.load(settings.CASSETTE_DIR, name))
+            return loaded[1]
+
+    def clear(self):
+        with self._lock:
+            self._loaded.clear()
+
+
+cassette_library = CassetteLibrary()
@@ -46,4 +46,9 @@ CREDENTIALS = {
             "password": os.getenv("VION_LOCAL_PASSWORD_PARTNER2"),
         },
     },
+    # Accepted by the fake server of the "Offline" environment (see scenario_tester/fake_server.py)
+    "offline": {
+        role: {"username": f"{role}@offline.test", "password": "offline"}
+        for role in ("backoffice", "partner1", "partner2")
+    },
 }
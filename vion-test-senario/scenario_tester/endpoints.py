@@ -9,6 +9,10 @@ class HTTPMethods(Enum):
 
 
 class EndPoint:
-    def __init__(self, method: HTTPMethods, url: str):
+    def __init__(self, method: HTTPMethods, url: str, template: str = None, stream: bool = False):
         self.url = url
-        self.method = method
\ No newline at end of file
+        self.method = method
+        # The catalog URL before `format_endpoint`, e.g. "/gallery/{gallery_slug}/", see `EndpointUsage`
+        self.template = template or url
+        # Calls read the body in chunks and return a `StreamedBody`, e.g. for file downloads
+        self.stream = stream
\ No newline at end of file
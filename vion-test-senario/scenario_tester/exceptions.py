@@ -9,6 +9,22 @@ class ScenarioWithNotAppException(BadRequestException):
     default_detail = _("The 'scenario_name' parameter requires an 'app_name' to be provided.")
     default_code = "invalid-scenario"
     
+class InvalidEngineException(BadRequestException):
+    default_detail = _("Unknown execution engine.")
+    default_code = "invalid-engine"
+    
+class InvalidSelectionException(BadRequestException):
+    default_detail = _("Invalid scenario selection.")
+    default_code = "invalid-selection"
+    
+class SessionNotCancellableException(BadRequestException):
+    default_detail = _("Only queued or running sessions can be cancelled.")
+    default_code = "session-not-cancellable"
+    
+class InvalidLatencyWindowException(BadRequestException):
+    default_detail = _("'days' must be a positive whole number of days.")
+    default_code = "invalid-days"
+    
 class UnexpectedErrorException(GeneralAPIException):
     default_detail = _("An unexpected error occurred")
     default_code = "unexpected-error"
\ No newline at end of file
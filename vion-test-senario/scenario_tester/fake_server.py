@@ -0,0 +1,430 @@
+import base64
+import hashlib
+import importlib
+import itertools
+import json
+import logging
+import mimetypes
+import random
+import re
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qsl, quote, urlsplit
+
+import requests
+from django.conf import settings
+
+from .credentials import CREDENTIALS
+from .endpoints import EndPoint
+
+logger = logging.getLogger(__name__)
+
+JSON = "application/json"
+NOT_FOUND = (404, {"detail": "Not found."}, JSON)
+# Answered by every fake server, tells it apart from another program listening on its port
+IDENTITY_PATH = "/__fake_vion__/"
+IDENTITY = {"server": "fake-vion"}
+
+# Smallest valid PDF, returned by the routes serving PDF files
+PDF_CONTENT = (
+    b"%PDF-1.4\n1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n2 0 obj<</Type/Pages/Kids[]/Count 0>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n%%EOF\n"
+)
+
+
+def endpoint_catalog() -> list:
+    """
+    Returns the (method, template) of every `EndPoint` declared in the apps' `endpoints.py` modules.
+    """
+    from .services import ScenarioService
+
+    catalog = set()
+    for app_name in ScenarioService.get_includable_apps():
+        try:
+            module = importlib.import_module(f"{app_name}.endpoints")
+        except ModuleNotFoundError:
+            continue
+        for catalog_class in vars(module).values():
+            if not isinstance(catalog_class, type):
+                continue
+            for endpoint in vars(catalog_class).values():
+                if isinstance(endpoint, EndPoint):
+                    catalog.add((endpoint.method.value, endpoint.template))
+    return sorted(catalog)
+
+
+class Route:
+    """
+    A catalog endpoint template matched against request paths, e.g. "/gallery/media/{id}/set-as-gallery-cover/".
+    Placeholders match one path segment, the trailing slash is optional.
+    """
+
+    def __init__(self, method: str, template: str):
+        self.method = method
+        self.template = template
+        pattern = re.sub(r"\\\{(\w+)\\\}", r"(?P<\1>[^/]+)", re.escape(template.rstrip("/")))
+        self.regex = re.compile(f"^{pattern}/?$")
+        self.placeholders = re.findall(r"\{(\w+)\}", template)
+        # Objects are grouped by the first segment ("todo", "network"...), lists return those of their group
+        self.collection = template.strip("/").split("/")[0]
+
+    def match(self, method: str, path: str):
+        if method != self.method:
+            return None
+        match = self.regex.match(path)
+        return match.groupdict() if match else None
+
+
+class FakeVionState:
+    """
+    In-memory objects of the fake server. Every object has a unique `id` and `slug` and is found by either.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._ids = itertools.count(1)
+        self.objects = {}  # slug -> object
+        self.collections = {}  # slug -> collection
+        self.files = {}  # path -> content of the uploaded files
+
+    def create(self, collection: str, data: dict) -> dict:
+        with self._lock:
+            object_id = next(self._ids)
+            instance = {**data, "id": object_id, "slug": f"{collection}-{object_id}"}
+            self.objects[instance["slug"]] = instance
+            self.collections[instance["slug"]] = collection
+        return instance
+
+    def store_file(self, filename: str, content: bytes) -> str:
+        """
+        Keeps an uploaded file and returns the path it is served at.
+        """
+        with self._lock:
+            path = f"/media/{next(self._ids)}/{quote(filename)}"
+            self.files[path] = content
+        return path
+
+    def get(self, key: str):
+        with self._lock:
+            return self._find(key)
+
+    def update(self, key: str, data: dict):
+        with self._lock:
+            instance = self._find(key)
+            if instance is not None:
+                instance.update({name: value for name, value in data.items() if name not in ("id", "slug")})
+            return instance
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            instance = self._find(key)
+            if instance is None:
+                return False
+            del self.objects[instance["slug"]]
+            del self.collections[instance["slug"]]
+            return True
+
+    def filter(self, collection: str, query: dict) -> list:
+        """
+        Objects of `collection` matching the query. `text` and `search` look into the string values,
+        other parameters must equal the object's field of the same name when it has one.
+        """
+        search = query.get("text") or query.get("search")
+        with self._lock:
+            candidates = [
+                instance for slug, instance in self.objects.items() if self.collections[slug] == collection
+            ]
+        return [
+            instance
+            for instance in candidates
+            if (not search or any(isinstance(value, str) and search in value for value in instance.values()))
+            and all(str(instance[name]) == value for name, value in query.items() if name in instance)
+        ]
+
+    def _find(self, key: str):
+        instance = self.objects.get(key)
+        if instance is None and key.isdigit():
+            instance = next((candidate for candidate in self.objects.values() if candidate["id"] == int(key)), None)
+        return instance
+
+
+class _FakeVionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately, without TCP_NODELAY every response waits for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_PUT(self):
+        self._handle()
+
+    def do_PATCH(self):
+        self._handle()
+
+    def do_DELETE(self):
+        self._handle()
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        status, content, content_type = self.server.fake.respond(
+            self.command, url.path, dict(parse_qsl(url.query)), self.headers, body
+        )
+        payload = content if isinstance(content, bytes) else json.dumps(content).encode() if content is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        if isinstance(content, bytes):
+            self.send_header("ETag", f'"{hashlib.md5(payload).hexdigest()}"')
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeVionServer:
+    """
+    Self-contained stand-in for the Vion API, so scenarios and engines can run (and be measured) offline.
+
+    - `POST /auths/token/` accepts the "offline" `CREDENTIALS` and returns a JWT, the other routes require it.
+    - `GET /auths/profile/` returns the profile of the logged-in role.
+    - `GET /__fake_vion__/` identifies the fake server, without authentication, latency or injected errors.
+    - Every endpoint declared in the apps' `endpoints.py` is served generically with in-memory state:
+      POST creates an object (201), GET returns it or lists a group's objects as {"count", "results"},
+      PUT/PATCH update it (200), DELETE removes it (204); unknown objects are 404s. Routes with "pdf"
+      in their template return a PDF. Uploaded files are kept, the objects hold their URL under the field name
+      and `GET /media/...` serves them with their MD5 as the ETag. The responses have the shapes the scenarios use, not the backend's
+      rules, so scenarios asserting on business logic (validation, generated to-do items...) may fail.
+    - Every response is delayed by `latency` plus up to `jitter` seconds, and a share `error_rate` of the
+      requests (login included) is answered with a 500.
+
+    `start()` serves from a daemon thread of the current process, `serve_forever()` blocks,
+    e.g. in `manage.py run_fake_server`.
+
+    Args:
+        host, port (optional): Address to listen on, port 0 picks a free one. `VION_OFFLINE_URL`'s by default.
+        latency, jitter, error_rate (optional): `FAKE_SERVER_*` settings by default.
+        seed (optional): Seed of the jitter and of the injected errors.
+    """
+
+    def __init__(self, host: str = None, port: int = None, latency: float = None, jitter: float = None,
+                 error_rate: float = None, seed=None):
+        offline_url = urlsplit(settings.VION_OFFLINE_URL)
+        self.host = host or offline_url.hostname
+        self.port = offline_url.port if port is None else port
+        self.latency = settings.FAKE_SERVER_LATENCY if latency is None else latency
+        self.jitter = settings.FAKE_SERVER_JITTER if jitter is None else jitter
+        self.error_rate = settings.FAKE_SERVER_ERROR_RATE if error_rate is None else error_rate
+        self.state = FakeVionState()
+        self.routes = [Route(method, template) for method, template in endpoint_catalog()]
+        self._random = random.Random(seed)
+        self._random_lock = Lock()
+        self._tokens = {}  # access token -> role
+        self._token_ids = itertools.count(1)
+        self._tokens_lock = Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "FakeVionServer":
+        self._bind()
+        self._thread = Thread(target=self._server.serve_forever, name="fake-vion-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._bind()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _bind(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _FakeVionHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self.port = self._server.server_port
+
+    def respond(self, method: str, path: str, query: dict, headers, body: bytes) -> tuple:
+        """
+        Returns the (status, content, content type) of a request, content being JSON-serializable or bytes.
+        """
+        if method == "GET" and path == IDENTITY_PATH:
+            return 200, IDENTITY, JSON
+        with self._random_lock:
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if fail:
+            return 500, {"detail": "Injected server error."}, JSON
+
+        try:
+            data = self._parse_body(headers, body)
+        except ValueError:
+            return 400, {"detail": "Malformed request body."}, JSON
+        if method == "GET" and path in self.state.files:
+            return 200, self.state.files[path], mimetypes.guess_type(path)[0] or "application/octet-stream"
+        if method == "POST" and path.rstrip("/") == "/auths/token":
+            return self._login(data)
+        role = self._authenticated_role(headers)
+        if role is None:
+            return 401, {"detail": "Authentication credentials were not provided."}, JSON
+        if method == "GET" and path.rstrip("/") == "/auths/profile":
+            return 200, self._profile(role), JSON
+
+        for route in self.routes:
+            params = route.match(method, path)
+            if params is not None:
+                return self._resource(route, params, query, data)
+        return NOT_FOUND
+
+    def _resource(self, route: Route, params: dict, query: dict, data: dict) -> tuple:
+        key = params[route.placeholders[-1]] if route.placeholders else None
+        if "pdf" in route.template and route.method == "GET":
+            return 200, PDF_CONTENT, "application/pdf"
+
+        match route.method, key:
+            case "POST", None:
+                return 201, self.state.create(route.collection, data), JSON
+            case "POST", _:
+                # A child of the object in the path, e.g. a ticket of an event
+                return 201, self.state.create(route.collection, {**data, route.placeholders[-1]: key}), JSON
+            case "GET", None:
+                results = self.state.filter(route.collection, query)
+                return 200, {"count": len(results), "next": None, "previous": None, "results": results}, JSON
+            case ("PUT" | "PATCH"), None:
+                return 200, data, JSON
+            case "GET", _:
+                instance = self.state.get(key)
+            case ("PUT" | "PATCH"), _:
+                instance = self.state.update(key, data)
+            case "DELETE", _ if key is not None and self.state.delete(key):
+                return 204, None, JSON
+            case _:
+                instance = None
+        if instance is None:
+            return NOT_FOUND
+        return 200, instance, JSON
+
+    def _login(self, data: dict) -> tuple:
+        role = next(
+            (
+                role for role, credentials in CREDENTIALS["offline"].items()
+                if (credentials["username"], credentials["password"]) == (data.get("username"), data.get("password"))
+            ),
+            None,
+        )
+        if role is None:
+            return 401, {"detail": "No active account found with the given credentials"}, JSON
+        claims = {"exp": int(time.time()) + settings.FAKE_SERVER_TOKEN_TTL, "role": role, "jti": next(self._token_ids)}
+        payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+        access = f"offline.{payload}.signature"
+        with self._tokens_lock:
+            self._tokens[access] = role
+        return 200, {"access": access, "refresh": f"refresh.{payload}"}, JSON
+
+    def _authenticated_role(self, headers):
+        scheme, _, token = (headers.get("Authorization") or "").partition(" ")
+        if scheme != "Bearer":
+            return None
+        with self._tokens_lock:
+            return self._tokens.get(token)
+
+    @staticmethod
+    def _profile(role: str) -> dict:
+        roles = list(CREDENTIALS["offline"])
+        return {
+            "id": roles.index(role) + 1,
+            "username": CREDENTIALS["offline"][role]["username"],
+            "career_level": 1,
+            "partner_type": "backoffice" if role == "backoffice" else "partner",
+        }
+
+    def _parse_body(self, headers, body: bytes) -> dict:
+        if not body:
+            return {}
+        content_type = headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            message = BytesParser(policy=HTTP).parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+            data = {}
+            for part in message.iter_parts():
+                name = part.get_param("name", header="content-disposition")
+                content = part.get_payload(decode=True)
+                filename = part.get_filename()
+                data[name] = f"{self.url}{self.state.store_file(filename, content)}" if filename else content.decode()
+            return data
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise ValueError(str(e))
+        return data if isinstance(data, dict) else {"items": data}
+
+
+def is_fake_server(url: str) -> bool:
+    """
+    Whether a fake Vion server answers at `url`.
+    """
+    try:
+        response = requests.get(f"{url.rstrip('/')}{IDENTITY_PATH}", timeout=settings.FAKE_SERVER_PROBE_TIMEOUT)
+        return response.status_code == 200 and response.json() == IDENTITY
+    except (requests.RequestException, ValueError):
+        return False
+
+
+class OfflineServer:
+    """
+    Starts the fake server of the "Offline" environment at `VION_OFFLINE_URL` in this process, once,
+    unless a fake server already listens there (e.g. `manage.py run_fake_server` in another process).
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._server = None
+
+    def ensure_running(self):
+        """
+        Raises RuntimeError when the address can not be bound and no fake server listens there,
+        a later call tries again.
+        """
+        with self._lock:
+            if self._server is not None:
+                return
+            try:
+                self._server = FakeVionServer().start()
+            except OSError as error:
+                # Not kept: the other server may stop, the next call then starts ours
+                if not is_fake_server(settings.VION_OFFLINE_URL):
+                    raise RuntimeError(
+                        f"Can not serve the Offline environment at {settings.VION_OFFLINE_URL}, "
+                        f"the address is not available and no fake Vion server listens there: {error}"
+                    ) from error
+                logger.info("%s is in use, using the fake server already listening there", settings.VION_OFFLINE_URL)
+            else:
+                logger.info("Fake Vion server listening on %s", self._server.url)
+
+    def stop(self):
+        with self._lock:
+            if self._server:
+                self._server.stop()
+            self._server = None
+
+
+offline_server = OfflineServer()
@@ -0,0 +1,63 @@
+import re
+
+from .models import EndpointUsage
+from .registry import scenario_module_app
+
+# A path parameter segment: "{slug}" in the catalogs, "<slug:slug>" in Django routes, ":id" in OpenAPI-like paths
+PLACEHOLDER = re.compile(r"^(\{[^}]*\}|<[^>]*>|:\w+)$")
+
+
+def _segments(path: str) -> list:
+    path = path.split("?", 1)[0].strip("/")
+    return path.split("/") if path else []
+
+
+def parse_changed_path(value: str) -> tuple:
+    """
+    Returns (method or None, path) of a changed path, given as "/path/" or "METHOD /path/".
+    """
+    method, _, path = value.strip().rpartition(" ")
+    return (method.strip().upper() or None), path
+
+
+def path_matches(template: str, changed_path: str) -> bool:
+    """
+    Whether an endpoint template matches a changed path. Path parameters on either side match any
+    segment, and a changed path ending with "*" matches every path below it.
+    """
+    prefix = changed_path.endswith("*")
+    template_segments, changed_segments = _segments(template), _segments(changed_path.rstrip("*"))
+    if len(changed_segments) > len(template_segments) or (not prefix and len(changed_segments) != len(template_segments)):
+        return False
+    return all(
+        template_segment == changed_segment
+        or PLACEHOLDER.match(template_segment)
+        or PLACEHOLDER.match(changed_segment)
+        for template_segment, changed_segment in zip(template_segments, changed_segments)
+    )
+
+
+def impacted_scenarios(scenarios: list, changed_paths: list) -> list:
+    """
+    Returns the scenarios that called an endpoint matching one of `changed_paths`, in their order.
+
+    Scenarios are matched against the endpoints recorded in `EndpointUsage` by their previous runs.
+    Scenarios without any recorded run are kept, their impact is unknown.
+    """
+    changes = [parse_changed_path(path) for path in changed_paths if path.strip()]
+    recorded, impacted = set(), set()
+    usages = EndpointUsage.objects.filter(
+        scenario_name__in={scenario_class.__name__ for scenario_class in scenarios}
+    ).values_list("app_name", "scenario_name", "method", "template")
+    for app_name, scenario_name, method, template in usages:
+        recorded.add((app_name, scenario_name))
+        if any((changed_method in (None, method)) and path_matches(template, path) for changed_method, path in changes):
+            impacted.add((app_name, scenario_name))
+
+    def key(scenario_class):
+        return scenario_module_app(scenario_class.__module__), scenario_class.__name__
+
+    return [
+        scenario_class for scenario_class in scenarios
+        if key(scenario_class) in impacted or key(scenario_class) not in recorded
+    ]
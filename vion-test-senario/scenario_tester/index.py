@@ -0,0 +1,213 @@
+import ast
+import json
+import logging
+import os
+from threading import Lock
+
+from django.apps import apps
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BASE_SCENARIO = "BaseScenario"
+
+
+def _base_names(class_node: ast.ClassDef) -> list:
+    names = []
+    for base in class_node.bases:
+        if isinstance(base, ast.Name):
+            names.append(base.id)
+        elif isinstance(base, ast.Attribute):
+            names.append(base.attr)
+    return names
+
+
+def _declares_abstract(class_node: ast.ClassDef):
+    """
+    True/False when the class body assigns a constant to `abstract`, None when it does not assign it.
+    """
+    for node in class_node.body:
+        if (
+            isinstance(node, ast.Assign)
+            and any(isinstance(target, ast.Name) and target.id == "abstract" for target in node.targets)
+            and isinstance(node.value, ast.Constant)
+        ):
+            return bool(node.value.value)
+    return None
+
+
+def scan_module(path: str) -> list:
+    """
+    Lists the classes defined at the top level of a scenarios module without importing it.
+
+    Returns:
+        list: One {"name", "bases", "abstract", "doc"} dict per class, `abstract` is None when
+        the class does not set `abstract` itself.
+    """
+    with open(path, "rb") as source:
+        tree = ast.parse(source.read(), filename=path)
+    return [
+        {
+            "name": node.name,
+            "bases": _base_names(node),
+            "abstract": _declares_abstract(node),
+            # `__doc__.strip()`, like the descriptions built from imported classes
+            "doc": (ast.get_docstring(node, clean=False) or "").strip() or None,
+        }
+        for node in tree.body
+        if isinstance(node, ast.ClassDef)
+    ]
+
+
+class ScenarioIndex:
+    """
+    Static index of the scenarios of every app, built by parsing the `scenarios*.py` modules instead of importing them.
+
+    Answers which apps and scenarios exist and what their descriptions are, so listing them does not import
+    any scenario code. Parsed modules are cached in `SCENARIO_INDEX_CACHE` (when set) and only parsed again
+    when their modification time or size changes.
+
+    A class is listed when it inherits from `BaseScenario` through classes of the scenarios modules, and does
+    not set `abstract = True` itself, the same rule `scenario_registry` applies to imported classes. Modules
+    of an app are read `scenarios.py` first, then by name, and the first definition of a name wins.
+    Modules that can not be parsed are left out with a warning.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._modules = None  # path -> {"mtime", "size", "classes"}
+
+    def scenarios(self, app_name: str = None) -> list:
+        """
+        Returns (app name, module name, scenario name) for every scenario, optionally of one app only.
+        """
+        app_configs = [apps.get_app_config(app_name)] if app_name else apps.get_app_configs()
+        # Every module is loaded, scenarios may inherit from base classes of other apps
+        modules = self._load(apps.get_app_configs())
+        entries = []
+        for app in app_configs:
+            # Sorted by name, the order `inspect.getmembers` used to give
+            app_entries = self._app_scenarios(app, modules)
+            entries.extend((app.name, app_entries[name][0], name) for name in sorted(app_entries))
+        return entries
+
+    def has_scenarios_module(self, app_name: str) -> bool:
+        return bool(self._module_paths(apps.get_app_config(app_name)))
+
+    def descriptions(self) -> dict:
+        """
+        Returns {scenario name: docstring} of every scenario with a docstring.
+        """
+        modules = self._load(apps.get_app_configs())
+        descriptions = {}
+        for app in apps.get_app_configs():
+            for name, (_, doc) in self._app_scenarios(app, modules).items():
+                if doc:
+                    descriptions[name] = doc
+        return descriptions
+
+    def clear(self):
+        with self._lock:
+            self._modules = None
+
+    @staticmethod
+    def _module_paths(app) -> list:
+        """
+        Paths of the scenarios modules of an app, `scenarios.py` first.
+        """
+        try:
+            file_names = os.listdir(app.path)
+        except OSError:
+            return []
+        file_names = [
+            name for name in file_names
+            if name.startswith("scenarios") and name.endswith(".py") and name[:-3].isidentifier()
+        ]
+        return [os.path.join(app.path, name) for name in sorted(file_names, key=lambda name: (name != "scenarios.py", name))]
+
+    def _app_scenarios(self, app, modules: dict) -> dict:
+        """
+        Returns {scenario name: (module name, docstring)} of the scenarios of an app.
+        """
+        scenarios = {}
+        for path in self._module_paths(app):
+            module = modules.get(path)
+            if not module:
+                continue
+            module_name = f"{app.name}.{os.path.basename(path)[:-3]}"
+            docs = {cls["name"]: cls["doc"] for cls in module["classes"]}
+            for name in self._concrete_classes(module["classes"], modules):
+                scenarios.setdefault(name, (module_name, docs[name]))
+        return scenarios
+
+    @staticmethod
+    def _concrete_classes(classes: list, modules: dict) -> list:
+        # Bases are looked up in the same module first, then in the other scenarios modules
+        by_name = {cls["name"]: cls for module in modules.values() for cls in module["classes"]}
+        by_name.update({cls["name"]: cls for cls in classes})
+
+        def is_scenario(cls, seen=()):
+            for base in cls["bases"]:
+                if base == BASE_SCENARIO:
+                    return True
+                if base in by_name and base not in seen and is_scenario(by_name[base], seen + (base,)):
+                    return True
+            return False
+
+        return [cls["name"] for cls in classes if cls["abstract"] is not True and is_scenario(cls)]
+
+    def _load(self, app_configs) -> dict:
+        with self._lock:
+            if self._modules is None:
+                self._modules = self._read_cache()
+            changed = False
+            paths = {path for app in app_configs for path in self._module_paths(app)}
+            for path in list(self._modules):
+                # Modules that were removed
+                if path not in paths and os.path.dirname(path) in {app.path for app in app_configs}:
+                    del self._modules[path]
+                    changed = True
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    changed |= self._modules.pop(path, None) is not None
+                    continue
+                cached = self._modules.get(path)
+                if cached and cached["mtime"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                    continue
+                try:
+                    classes = scan_module(path)
+                except SyntaxError as e:
+                    # Cached like any other module, it is not parsed again until it changes
+                    logger.warning("Scenarios module %s is skipped, it can not be parsed: %s", path, e)
+                    classes = []
+                self._modules[path] = {"mtime": stat.st_mtime_ns, "size": stat.st_size, "classes": classes}
+                changed = True
+            if changed:
+                self._write_cache()
+            return dict(self._modules)
+
+    @staticmethod
+    def _read_cache() -> dict:
+        if not settings.SCENARIO_INDEX_CACHE:
+            return {}
+        try:
+            with open(settings.SCENARIO_INDEX_CACHE) as cache:
+                return json.load(cache)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self):
+        if not settings.SCENARIO_INDEX_CACHE:
+            return
+        temporary_path = f"{settings.SCENARIO_INDEX_CACHE}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "w") as cache:
+                json.dump(self._modules, cache)
+            os.replace(temporary_path, settings.SCENARIO_INDEX_CACHE)
+        except OSError:
+            logger.warning("Could not write the scenario index cache to %s", settings.SCENARIO_INDEX_CACHE)
+
+
+scenario_index = ScenarioIndex()
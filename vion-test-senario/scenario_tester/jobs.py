@@ -0,0 +1,72 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from django.conf import settings
+from django.db import connections
+from django.utils.timezone import now
+
+from .models import Session
+from .services import ScenarioService
+
+logger = logging.getLogger(__name__)
+
+
+class ScenarioJobRunner:
+    """
+    Executes scenario runs in the background on a local thread pool.
+
+    `submit` creates the `Session` right away and returns it in the "queued" state.
+    A pool thread then runs it through `ScenarioService.execute_scenarios`, and clients
+    poll the session state and progress counters until it is finished, cancelled or errored
+    (the run stopped on an unexpected error).
+
+    Configured through settings:
+        SCENARIO_JOB_WORKERS: Number of runs executed at the same time.
+        SCENARIO_JOBS_EAGER: Run inside `submit` instead of the pool (used by tests).
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = Lock()
+
+    def submit(self, base_url, base_url_key, app_name=None, scenario_name=None, engine=None, selection=None) -> Session:
+        # Resolve the scenarios first, so unknown apps or scenarios fail the request and not the job
+        ScenarioService.find_scenarios(app_name, scenario_name, selection)
+
+        session = Session.objects.create(start_time=now(), server=base_url_key)
+        job_args = (session, base_url, base_url_key, app_name, scenario_name, engine, selection)
+        if settings.SCENARIO_JOBS_EAGER:
+            self._run(*job_args)
+        else:
+            self._get_executor().submit(self._run_in_pool, *job_args)
+        return session
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.SCENARIO_JOB_WORKERS, thread_name_prefix="scenario-job"
+                )
+            return self._executor
+
+    def _run_in_pool(self, *job_args):
+        try:
+            self._run(*job_args)
+        finally:
+            # Pool threads are reused, do not keep their connections open between runs
+            connections.close_all()
+
+    @staticmethod
+    def _run(session, base_url, base_url_key, app_name, scenario_name, engine, selection):
+        try:
+            ScenarioService.execute_scenarios(
+                base_url, base_url_key, app_name=app_name, scenario_name=scenario_name, engine=engine,
+                session=session, selection=selection,
+            )
+        except Exception:
+            logger.exception("Scenario run of session %s failed", session.id)
+            session.finalize(errored=True)
+
+
+scenario_job_runner = ScenarioJobRunner()
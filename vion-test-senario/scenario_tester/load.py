@@ -0,0 +1,268 @@
+import logging
+import math
+import random
+import time
+from queue import Queue
+from threading import Lock, Semaphore, Thread
+
+from django.conf import settings
+from django.db import connections, models
+
+from .metrics import HistogramSet, LatencyHistogram
+from .transport import http_session_pool
+
+logger = logging.getLogger(__name__)
+
+
+class LoadProfile:
+    """
+    How a load test drives the scenarios, an open model: scenarios start at a target arrival rate
+    whether or not the previous ones have finished.
+
+    Args:
+        rate: Scenarios started per second once ramped up.
+        duration: Seconds during which scenarios are started, ramp-up included.
+        ramp_up (optional): Seconds over which the rate grows linearly from 0 to `rate`.
+        mix (optional): {scenario name: weight} overriding `BaseScenario.load_weight`, 0 leaves a scenario out.
+        max_concurrency (optional): Scenarios running at the same time at most (the virtual users).
+            Arrivals finding every virtual user busy are dropped and counted, not queued.
+        seed (optional): Seed of the scenario picks, for reproducible mixes.
+    """
+
+    def __init__(self, rate: float, duration: float, ramp_up: float = 0.0, mix: dict = None,
+                 max_concurrency: int = None, seed=None):
+        if rate <= 0 or duration <= 0 or ramp_up < 0:
+            raise ValueError("The rate and the duration must be positive, the ramp-up can not be negative.")
+        self.rate = rate
+        self.duration = duration
+        self.ramp_up = min(ramp_up, duration)
+        self.mix = mix or {}
+        self.max_concurrency = max_concurrency or settings.LOAD_MAX_CONCURRENCY
+        self.seed = seed
+
+    @classmethod
+    def from_settings(cls, **overrides) -> "LoadProfile":
+        options = {
+            "rate": settings.LOAD_RATE,
+            "duration": settings.LOAD_DURATION,
+            "ramp_up": settings.LOAD_RAMP_UP,
+        }
+        options.update({name: value for name, value in overrides.items() if value is not None})
+        return cls(**options)
+
+    def arrivals(self, elapsed: float) -> float:
+        """
+        Number of scenarios started after `elapsed` seconds.
+        """
+        if elapsed <= self.ramp_up:
+            return self.rate * elapsed ** 2 / (2 * self.ramp_up) if self.ramp_up else 0.0
+        return self.rate * self.ramp_up / 2 + self.rate * (elapsed - self.ramp_up)
+
+    def arrival_time(self, number: int) -> float:
+        """
+        Seconds after the start at which the `number`-th scenario (from 0) starts, the inverse of `arrivals`.
+        """
+        ramp_up_arrivals = self.rate * self.ramp_up / 2
+        if number < ramp_up_arrivals:
+            return math.sqrt(2 * self.ramp_up * number / self.rate)
+        return self.ramp_up + (number - ramp_up_arrivals) / self.rate
+
+    @property
+    def expected_arrivals(self) -> int:
+        return math.ceil(self.arrivals(self.duration))
+
+    def weights(self, scenarios: list) -> list:
+        return [self.mix.get(scenario_class.__name__, scenario_class.load_weight) for scenario_class in scenarios]
+
+
+class LoadStats:
+    """
+    Counters and latency histograms of a load test, for one reporting interval or the whole run.
+    Scenario latencies are measured from the scheduled start, request latencies per endpoint template.
+    """
+
+    def __init__(self):
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.scenarios = LatencyHistogram()
+        self.requests = HistogramSet()  # By "METHOD template"
+        self.request_errors = 0
+        self.errors = {}  # error message -> count, the first ones only
+
+    def merge(self, other: "LoadStats"):
+        self.started += other.started
+        self.completed += other.completed
+        self.failed += other.failed
+        self.dropped += other.dropped
+        self.scenarios.merge(other.scenarios)
+        self.requests.merge(other.requests)
+        self.request_errors += other.request_errors
+        for error, count in other.errors.items():
+            if error in self.errors or len(self.errors) < LoadTestRunner.max_error_messages:
+                self.errors[error] = self.errors.get(error, 0) + count
+
+    def as_dict(self, seconds: float) -> dict:
+        requests = sum(histogram.count for histogram in self.requests.histograms.values())
+        return {
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "throughput": self.completed / seconds if seconds else 0.0,
+            "error_rate": self.failed / self.completed if self.completed else 0.0,
+            "scenario_latency": self.scenarios.summary(),
+            "requests": requests,
+            "request_throughput": requests / seconds if seconds else 0.0,
+            "request_error_rate": self.request_errors / requests if requests else 0.0,
+            "endpoints": self.requests.summary(),
+            "errors": dict(self.errors),
+        }
+
+
+class LoadTestRunner:
+    """
+    Replays scenarios as virtual users following a `LoadProfile`.
+
+    - A dispatcher starts scenarios at the profile's arrival times, picking them by weight, and hands
+      them to `max_concurrency` virtual user threads. Arrivals finding no idle virtual user are dropped.
+    - Scenarios run with `BaseScenario.execute_detached`, no `Scenario`, log or request rows are written.
+      Their calls and results go into mergeable `LatencyHistogram`s instead.
+    - Every `LOAD_REPORT_INTERVAL` seconds, the interval's throughput, error rate and latencies and the
+      totals so far are saved in `Session.load_report` and the session counters, and `on_report` is called.
+      The call latencies end up in `Session.latencies` like those of the other engines.
+    - Shared `resources` are not respected, scenarios asserting on shared state may fail under load.
+    """
+
+    max_error_messages = 20
+
+    def __init__(self, base_url: str, session, profile: LoadProfile, on_report=None):
+        self.base_url = base_url
+        self.session = session
+        self.profile = profile
+        self.on_report = on_report
+        self._lock = Lock()
+        self._interval = LoadStats()
+        self._total = LoadStats()
+        self._reports = 0
+
+    def run(self, scenarios: list) -> dict:
+        """
+        Blocks until the profile's duration has passed and the running scenarios have finished,
+        or the session was cancelled. Returns the final report.
+        """
+        weights = self.profile.weights(scenarios)
+        if not any(weights):
+            raise ValueError("Every scenario of the load test has a weight of 0.")
+        picker = random.Random(self.profile.seed)
+        idle = Semaphore(self.profile.max_concurrency)
+        tasks = Queue()
+        users = [
+            Thread(target=self._virtual_user, args=(tasks, idle), name=f"session-{self.session.id}-user-{number}")
+            for number in range(self.profile.max_concurrency)
+        ]
+        for user in users:
+            user.start()
+
+        self._started_at = last_report_at = time.monotonic()
+        number = 0
+        try:
+            while True:
+                now = time.monotonic()
+                if now - last_report_at >= settings.LOAD_REPORT_INTERVAL:
+                    self._report(now - last_report_at)
+                    last_report_at = now
+                    if self.session.is_cancelled():
+                        break
+                offset = self.profile.arrival_time(number)
+                if offset >= self.profile.duration:
+                    break
+                scheduled_at = self._started_at + offset
+                if scheduled_at > now:
+                    time.sleep(min(scheduled_at, last_report_at + settings.LOAD_REPORT_INTERVAL) - now)
+                    continue
+                number += 1
+                scenario_class = picker.choices(scenarios, weights)[0]
+                if idle.acquire(blocking=False):
+                    tasks.put((scenario_class, scheduled_at))
+                else:
+                    with self._lock:
+                        self._interval.dropped += 1
+        finally:
+            for _ in users:
+                tasks.put(None)
+            for user in users:
+                user.join()
+        return self._report(time.monotonic() - last_report_at, final=True)
+
+    @property
+    def latencies(self) -> HistogramSet:
+        """
+        Call latencies by "METHOD template" of every scenario reported so far.
+        """
+        return self._total.requests
+
+    def _virtual_user(self, tasks: Queue, idle: Semaphore):
+        try:
+            while (task := tasks.get()) is not None:
+                scenario_class, scheduled_at = task
+                try:
+                    self._run_scenario(scenario_class, scheduled_at)
+                except Exception:
+                    logger.exception("Virtual user failed to run %s", scenario_class.__name__)
+                finally:
+                    idle.release()
+        finally:
+            http_session_pool.close()
+            connections.close_all()
+
+    def _run_scenario(self, scenario_class, scheduled_at: float):
+        # Counted when it starts, the reports show the scenarios still running
+        with self._lock:
+            self._interval.started += 1
+        stats = LoadStats()
+
+        def emit(event, *payload):
+            match event:
+                case "logs":
+                    for level, text, _ in payload[0]:
+                        if level == "error" and len(stats.errors) < self.max_error_messages:
+                            stats.errors[f"{scenario_class.__name__}: {text}"] = 1
+                case "requests":
+                    stats.request_errors += sum(record["status_code"] >= 500 for record in payload[0])
+                case "latencies":
+                    stats.requests = HistogramSet.from_dict(payload[0])
+                case "finished":
+                    stats.completed = 1
+                    stats.failed = int(payload[0] != "passed")
+                    stats.scenarios.record((time.monotonic() - scheduled_at) * 1000)
+
+        try:
+            scenario_class(self.base_url).execute_detached(emit)
+        finally:
+            with self._lock:
+                self._interval.merge(stats)
+
+    def _report(self, interval_seconds: float, final: bool = False) -> dict:
+        from .models import Session
+
+        with self._lock:
+            interval, self._interval = self._interval, LoadStats()
+            self._total.merge(interval)
+            self._reports += 1
+            report = {
+                "report": self._reports,
+                "final": final,
+                "elapsed": time.monotonic() - self._started_at,
+                "interval": interval.as_dict(interval_seconds),
+                "total": self._total.as_dict(time.monotonic() - self._started_at),
+            }
+        Session.objects.filter(pk=self.session.pk).update(
+            completed_scenarios=models.F("completed_scenarios") + interval.completed,
+            failed_scenarios=models.F("failed_scenarios") + interval.failed,
+            load_report=report,
+        )
+        if self.on_report:
+            self.on_report(report)
+        return report
@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+
+from scenario_tester.benchmarks.framework import DEFAULT_ENGINES, compare, flatten, run_benchmarks
+from scenario_tester.services import ScenarioService
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the time the framework adds on top of the network, with synthetic scenarios "
+        "against a local stub. Runs on a throwaway test database"
+    )
+    # The system checks load the URL conf, and with it Swagger
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument("--number", type=int, default=200, help="Calls, logs and scenarios per measurement.")
+        parser.add_argument("--repeat", type=int, default=3, help="Measurements per benchmark, the best one is kept.")
+        parser.add_argument("--scenarios", type=int, default=40, help="Scenarios of every engine run.")
+        parser.add_argument(
+            "--engines", nargs="+", default=list(DEFAULT_ENGINES),
+            choices=[engine for engine in ScenarioService.ENGINES if engine not in ("queue", "load")],
+        )
+        parser.add_argument("--workers", nargs="+", type=int, default=[1, 4, 8], help="Worker counts of the engine runs.")
+        parser.add_argument("--output", metavar="PATH", help="Write the results as JSON.")
+        parser.add_argument("--compare", metavar="PATH", help="Compare with the JSON results of a previous run.")
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not read {options['compare']}: {e}")
+
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = run_benchmarks(
+                options["number"], options["repeat"], options["scenarios"], options["engines"], options["workers"]
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+
+        if baseline is None:
+            for metric, value in flatten(results["results"]).items():
+                self.stdout.write(f"{metric:<45}{value:>14.2f}")
+            return
+        self.stdout.write(f"Compared with {baseline['meta'].get('commit') or options['compare']}")
+        for metric, before, after, change in compare(results, baseline):
+            change_text = f"{change:+.1%}" if change is not None else "-"
+            self.stdout.write(f"{metric:<45}{before:>14.2f}{after:>14.2f}{change_text:>10}")
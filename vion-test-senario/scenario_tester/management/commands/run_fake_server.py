@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from scenario_tester.fake_server import FakeVionServer
+
+
+class Command(BaseCommand):
+    help = "Serves the fake Vion API of the 'Offline' environment, with in-memory state, until interrupted"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, help="Port to listen on, the one of VION_OFFLINE_URL by default.")
+        parser.add_argument("--latency", type=float, help="Seconds added to every response, FAKE_SERVER_LATENCY by default.")
+        parser.add_argument("--jitter", type=float, help="Up to this many more seconds, FAKE_SERVER_JITTER by default.")
+        parser.add_argument(
+            "--error-rate", type=float, help="Share of the requests answered with a 500, FAKE_SERVER_ERROR_RATE by default."
+        )
+        parser.add_argument("--seed", type=int, help="Seed of the jitter and of the injected errors.")
+
+    def handle(self, *args, **options):
+        server = FakeVionServer(
+            port=options["port"], latency=options["latency"], jitter=options["jitter"],
+            error_rate=options["error_rate"], seed=options["seed"],
+        )
+        self.stdout.write(f"Fake Vion server listening on {server.url} ({len(server.routes)} routes)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write("Fake Vion server stopped")
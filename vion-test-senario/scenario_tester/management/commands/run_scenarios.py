@@ -0,0 +1,209 @@
+import json
+import time
+from threading import Thread
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import APIException
+
+from scenario_tester.impact import impacted_scenarios
+from scenario_tester.load import LoadProfile
+from scenario_tester.models import Session
+from scenario_tester.process_engine import class_path_of
+from scenario_tester.reports import scenario_record, write_junit_xml
+from scenario_tester.services import ScenarioService, TestAllScenariosService
+from scenario_tester.writers import background_writer
+
+class Command(BaseCommand):
+    help = "Runs scenarios from the command line and exits with a non-zero status when any of them fails"
+    # The system checks load the URL conf, and with it Swagger
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--environment", "-e", required=True, choices=list(TestAllScenariosService.ENVIRONMENT_URLS),
+            help="Environment to run against.",
+        )
+        parser.add_argument("--app", help="Only run the scenarios of this app.")
+        parser.add_argument("--scenario", help="Only run this scenario, requires --app.")
+        parser.add_argument(
+            "--select", metavar="EXPRESSION",
+            help="Only run the scenarios matching a tag expression, e.g. 'smoke and partner1 and not upload'.",
+        )
+        parser.add_argument(
+            "--changed-paths", nargs="+", metavar="PATH",
+            help=(
+                "Only run the scenarios that called one of these API paths in their previous runs, "
+                "e.g. '/gallery/{slug}/' or 'PUT /wishes_and_goals/*'."
+            ),
+        )
+        parser.add_argument("--engine", choices=ScenarioService.ENGINES, help="Execution engine.")
+        parser.add_argument("--workers", type=int, help="Threads, tasks or processes used by the engine.")
+        parser.add_argument(
+            "--cassette", choices=["record", "replay"],
+            help="Record the calls of every scenario in CASSETTE_DIR, or replay them without network.",
+        )
+        parser.add_argument("--junit-xml", metavar="PATH", help="Write a JUnit XML report.")
+        parser.add_argument("--json-lines", metavar="PATH", help="Write one JSON object per scenario.")
+        parser.add_argument(
+            "--poll-interval", type=float, default=0.5, help="Seconds between two progress updates."
+        )
+        load = parser.add_argument_group("load tests", "Options of the 'load' engine, the LOAD_* settings by default.")
+        load.add_argument("--rate", type=float, help="Scenarios started per second.")
+        load.add_argument("--duration", type=float, help="Seconds during which scenarios are started.")
+        load.add_argument("--ramp-up", type=float, help="Seconds over which the rate grows to --rate.")
+        load.add_argument(
+            "--mix", nargs="+", metavar="SCENARIO=WEIGHT", default=[],
+            help="Weights of the scenarios in the mix, 1 (their `load_weight`) by default.",
+        )
+        load.add_argument(
+            "--max-error-rate", type=float, default=0.0,
+            help="Exit with a non-zero status when more than this share of the scenarios failed.",
+        )
+
+    def handle(self, *args, **options):
+        environment, app_name, scenario_name = options["environment"], options["app"], options["scenario"]
+        try:
+            base_url = TestAllScenariosService()._params_validation(environment, app_name, scenario_name)
+            scenarios = ScenarioService.find_scenarios(app_name, scenario_name, options["select"])
+            if options["changed_paths"]:
+                scenarios = impacted_scenarios(scenarios, options["changed_paths"])
+        except APIException as e:
+            raise CommandError(e.detail)
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        if not scenarios and options["changed_paths"]:
+            self.stdout.write("No scenario is impacted by the changed paths")
+            return
+        if not scenarios:
+            raise CommandError("No scenario matches the selection")
+
+        engine = options["engine"]
+        if options["cassette"] and engine in ("process", "queue"):
+            # Their workers load the settings again
+            raise CommandError(f"The {engine} engine does not support cassettes")
+        if engine == "load":
+            try:
+                mix = {name: float(weight) for name, _, weight in (item.partition("=") for item in options["mix"])}
+            except ValueError:
+                raise CommandError("--mix expects SCENARIO=WEIGHT values")
+            options["load_profile_options"] = {
+                "rate": options["rate"], "duration": options["duration"], "ramp_up": options["ramp_up"], "mix": mix,
+            }
+        overrides = {}
+        worker_setting = ScenarioService.WORKER_SETTINGS.get(engine or "thread")
+        if options["workers"] and worker_setting:
+            overrides[worker_setting] = options["workers"]
+        if options["cassette"]:
+            overrides["CASSETTE_MODE"] = options["cassette"]
+        previous = {name: getattr(settings, name) for name in overrides}
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+        try:
+            self._run(base_url, environment, engine, scenarios, options)
+        finally:
+            for name, value in previous.items():
+                setattr(settings, name, value)
+
+    def _run(self, base_url, environment, engine, scenarios, options):
+        session = Session.objects.create(server=environment)
+        self.stdout.write(f"Session {session.id}: running {len(scenarios)} scenarios against {environment}")
+        errors = []
+        runner = Thread(
+            target=self._execute, args=(base_url, environment, engine, scenarios, options, session, errors)
+        )
+        runner.start()
+        try:
+            self._follow(session, runner, options["poll_interval"], engine == "load")
+        except KeyboardInterrupt:
+            session.cancel()
+            self.stderr.write("Cancelled, waiting for the running scenarios to finish")
+            runner.join()
+        background_writer.drain()
+        session.refresh_from_db()
+
+        if options["junit_xml"]:
+            write_junit_xml(session, options["junit_xml"], {cls.__name__: class_path_of(cls) for cls in scenarios})
+        if options["json_lines"]:
+            self._write_json_lines(session, options["json_lines"])
+
+        if errors:
+            raise CommandError(f"Session {session.id} did not finish: {errors[0]}")
+        passed = session.completed_scenarios - session.failed_scenarios
+        self.stdout.write(
+            f"Session {session.id} {session.state}: {passed} passed, {session.failed_scenarios} failed "
+            f"in {session.actual_makespan or 0:.1f}s"
+            + (f" (predicted {session.predicted_makespan:.1f}s)" if session.predicted_makespan else "")
+        )
+        if session.state != Session.State.FINISHED:
+            raise CommandError(f"Session {session.id} was {session.state}", returncode=1)
+        if engine == "load":
+            error_rate = session.failed_scenarios / session.completed_scenarios if session.completed_scenarios else 0.0
+            if error_rate > options["max_error_rate"]:
+                raise CommandError(f"{error_rate:.1%} of the scenarios failed", returncode=1)
+        elif session.failed_scenarios:
+            raise CommandError(f"{session.failed_scenarios} of {session.total_scenarios} scenarios failed", returncode=1)
+
+    @staticmethod
+    def _execute(base_url, environment, engine, scenarios, options, session, errors):
+        try:
+            load_profile = None
+            if engine == "load":
+                load_profile = LoadProfile.from_settings(**options["load_profile_options"])
+            ScenarioService.execute_scenarios(
+                base_url, environment, engine=engine, session=session, load_profile=load_profile, scenarios=scenarios
+            )
+        except Exception as e:
+            errors.append(e)
+            session.finalize(errored=True)
+
+    def _follow(self, session, runner, poll_interval, load_test=False):
+        """
+        Prints every scenario as it finishes, or every report of a load test, until the session has ended.
+        The "queue" engine returns once the work is queued, the session then ends when the workers are done.
+        """
+        reported = set()
+        load_reports = 0
+        while True:
+            runner_done = not runner.is_alive()
+            if load_test:
+                session.refresh_from_db(fields=["load_report"])
+                if session.load_report and session.load_report["report"] != load_reports:
+                    load_reports = session.load_report["report"]
+                    self._write_load_report(session.load_report)
+            finished = session.scenarios.filter(end_time__isnull=False).exclude(id__in=reported).order_by("end_time")
+            for scenario in finished:
+                reported.add(scenario.id)
+                duration = (scenario.end_time - scenario.start_time).total_seconds()
+                style = self.style.SUCCESS if scenario.status == "passed" else self.style.ERROR
+                self.stdout.write(
+                    f"[{len(reported)}/{session.total_scenarios}] "
+                    f"{style(scenario.status.upper())} {scenario.scenario_name} ({duration:.2f}s)"
+                )
+            if runner_done:
+                session.refresh_from_db(fields=["end_time"])
+                if session.end_time is not None:
+                    return
+                time.sleep(poll_interval)
+            else:
+                runner.join(poll_interval)
+
+    def _write_load_report(self, report):
+        def milliseconds(value):
+            return f"{value:.0f}ms" if value is not None else "-"
+
+        # Live reports cover their interval, the final one the whole run
+        stats = report["total"] if report["final"] else report["interval"]
+        latency = stats["scenario_latency"]
+        self.stdout.write(
+            f"[{report['elapsed']:.1f}s]{' total' if report['final'] else ''} "
+            f"{stats['throughput']:.2f} scenarios/s, {stats['request_throughput']:.2f} requests/s, "
+            f"{stats['error_rate']:.1%} failed, {stats['dropped']} dropped, "
+            f"p50 {milliseconds(latency['p50'])} p95 {milliseconds(latency['p95'])} p99 {milliseconds(latency['p99'])}"
+        )
+
+    @staticmethod
+    def _write_json_lines(session, path):
+        with open(path, "w") as output:
+            for scenario in session.scenarios.order_by("id").prefetch_related("logs"):
+                output.write(json.dumps(scenario_record(scenario)) + "\n")
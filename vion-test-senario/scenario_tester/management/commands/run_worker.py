@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from scenario_tester.work_queue import DistributedWorker
+
+
+class Command(BaseCommand):
+    help = "Runs scenarios of sessions queued with the 'queue' engine, start one per core or host to shard a run"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", help="Unique worker name, '<host>-<pid>' by default.")
+        parser.add_argument("--threads", type=int, help="Scenarios run at the same time, WORK_QUEUE_THREADS by default.")
+        parser.add_argument("--session", type=int, help="Only run the scenarios of this session.")
+        parser.add_argument(
+            "--exit-when-idle", action="store_true", help="Stop once there is nothing left to run instead of polling."
+        )
+
+    def handle(self, *args, **options):
+        worker = DistributedWorker(name=options["name"], threads=options["threads"], session_id=options["session"])
+        self.stdout.write(f"Worker {worker.name} started with {worker.threads} threads")
+        try:
+            worker.run(exit_when_idle=options["exit_when_idle"])
+        except KeyboardInterrupt:
+            worker.stop()
+        self.stdout.write(f"Worker {worker.name} stopped")
@@ -0,0 +1,118 @@
+import math
+from collections import Counter
+
+
+class LatencyHistogram:
+    """
+    Latency histogram with logarithmic buckets, so percentiles are within `precision` (relative) of the
+    recorded values whatever their magnitude. Histograms with the same precision can be merged, e.g. the
+    per-interval histograms of a load test into its total, and serialized with `as_dict`/`from_dict`.
+
+    Values are milliseconds and are clamped to [`MIN_VALUE`, `MAX_VALUE`], so a histogram never holds more
+    than ~2,800 buckets (at 1%) however many values it records. `min`, `max` and `mean` are exact.
+    """
+
+    MIN_VALUE = 0.001
+    MAX_VALUE = 3_600_000.0  # An hour
+
+    def __init__(self, precision: float = 0.01):
+        self.precision = precision
+        self._log_base = math.log1p(precision)
+        self.counts = Counter()  # bucket index -> count
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value: float):
+        clamped = min(max(value, self.MIN_VALUE), self.MAX_VALUE)
+        self.counts[math.ceil(math.log(clamped) / self._log_base)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        if other.precision != self.precision:
+            raise ValueError("Only histograms with the same precision can be merged.")
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, fraction: float):
+        """
+        Nearest-rank percentile, the upper bound of its bucket (capped by the largest value). None when empty.
+        """
+        if not self.count:
+            return None
+        rank = max(math.ceil(fraction * self.count), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(math.exp(index * self._log_base), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def summary(self, percentiles=(0.5, 0.95, 0.99)) -> dict:
+        summary = {"count": self.count, "mean": self.mean, "min": self.min, "max": self.max}
+        for fraction in percentiles:
+            summary[f"p{round(fraction * 100):g}"] = self.percentile(fraction)
+        return summary
+
+    def as_dict(self) -> dict:
+        return {
+            "precision": self.precision,
+            "counts": {str(index): count for index, count in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls(data["precision"])
+        histogram.counts.update({int(index): count for index, count in data["counts"].items()})
+        histogram.count, histogram.total = data["count"], data["total"]
+        histogram.min, histogram.max = data["min"], data["max"]
+        return histogram
+
+
+class HistogramSet:
+    """
+    `LatencyHistogram`s by key, e.g. "METHOD template" for the calls of a run.
+    Sets are merged key by key and serialized as {key: `LatencyHistogram.as_dict()`}.
+    """
+
+    def __init__(self):
+        self.histograms = {}
+
+    def record(self, key: str, value: float):
+        self.histograms.setdefault(key, LatencyHistogram()).record(value)
+
+    def merge(self, other: "HistogramSet"):
+        for key, histogram in other.histograms.items():
+            self.histograms.setdefault(key, LatencyHistogram(histogram.precision)).merge(histogram)
+
+    def summary(self, percentiles=(0.5, 0.95, 0.99)) -> dict:
+        return {key: histogram.summary(percentiles) for key, histogram in sorted(self.histograms.items())}
+
+    def __bool__(self):
+        return bool(self.histograms)
+
+    def as_dict(self) -> dict:
+        return {key: histogram.as_dict() for key, histogram in self.histograms.items()}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HistogramSet":
+        histograms = cls()
+        histograms.histograms = {key: LatencyHistogram.from_dict(histogram) for key, histogram in (data or {}).items()}
+        return histograms
@@ -0,0 +1,42 @@
+# Generated by Django 5.1 on 2026-10-18 10:56
+
+from django.db import migrations, models
+
+
+def mark_ended_sessions_finished(apps, schema_editor):
+    """
+    Sessions created before this migration ran synchronously, the ones with an end time are finished.
+    """
+    Session = apps.get_model("scenario_tester", "Session")
+    Session.objects.filter(end_time__isnull=False).update(state="finished")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario_tester', '0002_alter_log_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='completed_scenarios',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='failed_scenarios',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='state',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('finished', 'Finished'), ('cancelled', 'Cancelled')], default='queued', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='total_scenarios',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(mark_ended_sessions_finished, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario_tester', '0003_session_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='predicted_makespan',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
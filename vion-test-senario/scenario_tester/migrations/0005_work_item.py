@@ -0,0 +1,31 @@
+# Generated by Django 5.1 on 2026-10-18 11:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario_tester', '0004_session_predicted_makespan'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scenario_path', models.CharField(max_length=255)),
+                ('resources', models.JSONField(blank=True, default=list)),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('state', models.CharField(choices=[('pending', 'Pending'), ('claimed', 'Claimed'), ('done', 'Done')], default='pending', max_length=10)),
+                ('worker', models.CharField(blank=True, default='', max_length=255)),
+                ('lease_expires_at', models.DateTimeField(blank=True, null=True)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='work_items', to='scenario_tester.session')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['session', 'state', 'position'], name='scenario_te_session_be5c9f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1 on 2026-10-18 11:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario_tester', '0005_work_item'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EndpointUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('app_name', models.CharField(max_length=100)),
+                ('scenario_name', models.CharField(max_length=255)),
+                ('method', models.CharField(max_length=10)),
+                ('template', models.CharField(max_length=255)),
+                ('last_seen_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('app_name', 'scenario_name', 'method', 'template'), name='unique_endpoint_usage')],
+            },
+        ),
+    ]
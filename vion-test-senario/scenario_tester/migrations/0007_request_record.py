@@ -0,0 +1,37 @@
+# Generated by Django 5.1 on 2026-10-18 11:17
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario_tester', '0006_endpoint_usage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('server', models.CharField(max_length=255)),
+                ('step', models.CharField(blank=True, default='', max_length=255)),
+                ('method', models.CharField(max_length=10)),
+                ('template', models.CharField(max_length=255)),
+                ('status_code', models.PositiveSmallIntegerField()),
+                ('connect_ms', models.FloatField(blank=True, null=True)),
+                ('tls_ms', models.FloatField(blank=True, null=True)),
+                ('ttfb_ms', models.FloatField()),
+                ('total_ms', models.FloatField()),
+                ('request_bytes', models.PositiveIntegerField(default=0)),
+                ('response_bytes', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('scenario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requests', to='scenario_tester.scenario')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['server', 'method', 'template'], name='scenario_te_server_3cea7f_idx')],
+            },
+        ),
+    ]
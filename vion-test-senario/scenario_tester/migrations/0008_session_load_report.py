@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario_tester', '0007_request_record'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='load_report',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
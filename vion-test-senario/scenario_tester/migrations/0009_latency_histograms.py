@@ -0,0 +1,23 @@
+# Generated by Django 5.1 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario_tester', '0008_session_load_report'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scenario',
+            name='latencies',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='latencies',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scenario_tester', '0009_latency_histograms'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='session',
+            name='state',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('finished', 'Finished'), ('cancelled', 'Cancelled'), ('errored', 'Errored')], default='queued', max_length=10),
+        ),
+    ]
@@ -1,15 +1,171 @@
+import statistics
+from datetime import timedelta
+
 from django.db import models
+from django.db.models.functions import RowNumber
 from django.utils import timezone
 
+class SessionQuerySet(models.QuerySet):
+    def with_scenario_details(self):
+        """
+        Prefetches scenarios with their log counts and ordered logs,
+        so serializing a session runs a constant number of queries.
+        """
+        scenarios = (
+            Scenario.objects.order_by("id")
+            .annotate(log_count=models.Count("logs"))
+            .prefetch_related(models.Prefetch("logs", queryset=Log.objects.order_by("created_at", "id")))
+        )
+        return self.prefetch_related(models.Prefetch("scenarios", queryset=scenarios))
+
+    def latency_table(self, percentiles=(0.5, 0.95, 0.99)) -> list:
+        """
+        Merges the `latencies` histograms of the sessions per server and returns one row per server and
+        endpoint template (with its method): {"server", "method", "template", "count", "p50", "p95", "p99"},
+        total durations in milliseconds, within the histograms' precision.
+
+        Sessions that have no histogram yet (running, or whose run crashed before `finalize`) are counted
+        from their `RequestRecord`s.
+        """
+        from .metrics import HistogramSet
+
+        by_server = {}
+        for server, latencies in self.filter(latencies__isnull=False).values_list("server", "latencies").iterator():
+            by_server.setdefault(server, HistogramSet()).merge(HistogramSet.from_dict(latencies))
+        records = RequestRecord.objects.filter(scenario__session__in=self.filter(latencies__isnull=True))
+        for server, method, template, total_ms in records.values_list("server", "method", "template", "total_ms").iterator():
+            by_server.setdefault(server, HistogramSet()).record(f"{method} {template}", total_ms)
+        rows = []
+        for server, histograms in sorted(by_server.items()):
+            for key, summary in histograms.summary(percentiles).items():
+                method, template = key.split(" ", 1)
+                row = {"server": server, "method": method, "template": template, "count": summary["count"]}
+                row.update({name: value for name, value in summary.items() if name.startswith("p")})
+                rows.append(row)
+        return rows
+
+
+class ScenarioQuerySet(models.QuerySet):
+    def median_durations(self, server: str, scenario_names, window: int) -> dict:
+        """
+        Returns {scenario name: median duration in seconds} over the last `window` finished runs
+        of each scenario on `server`. Scenarios that never finished there are left out.
+        """
+        recent_runs = (
+            self.filter(session__server=server, scenario_name__in=scenario_names, end_time__isnull=False)
+            .annotate(
+                run_number=models.Window(
+                    RowNumber(), partition_by=models.F("scenario_name"), order_by=models.F("id").desc()
+                )
+            )
+            .filter(run_number__lte=window)
+            .values_list("scenario_name", "start_time", "end_time")
+        )
+        durations = {}
+        for scenario_name, start_time, end_time in recent_runs:
+            durations.setdefault(scenario_name, []).append((end_time - start_time).total_seconds())
+        return {scenario_name: statistics.median(values) for scenario_name, values in durations.items()}
+
+
 class Session(models.Model):
+    class State(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        FINISHED = "finished", "Finished"
+        CANCELLED = "cancelled", "Cancelled"
+        # The run stopped on an unexpected error, the scenarios left were not run
+        ERRORED = "errored", "Errored"
+
     start_time = models.DateTimeField(auto_now_add=True)
     end_time = models.DateTimeField(null=True, blank=True)
     executed_apps = models.CharField(max_length=255, blank=True, default="")
     server = models.CharField(max_length=50, blank=True, default="")
+    state = models.CharField(max_length=10, choices=State.choices, default=State.QUEUED)
+    total_scenarios = models.PositiveIntegerField(default=0)
+    completed_scenarios = models.PositiveIntegerField(default=0)
+    failed_scenarios = models.PositiveIntegerField(default=0)
+    # Seconds, estimated from the scenarios' recent durations when the run starts
+    predicted_makespan = models.FloatField(null=True, blank=True)
+    # Live and final statistics of a load test, see `LoadTestRunner`
+    load_report = models.JSONField(null=True, blank=True)
+    # Total duration histograms of the calls by "METHOD template", see `HistogramSet`.
+    # Merged from the scenarios' when the session is finalized.
+    latencies = models.JSONField(null=True, blank=True)
+
+    objects = SessionQuerySet.as_manager()
+
+    @property
+    def actual_makespan(self):
+        """
+        Seconds from the start to the end of the run, None while it is running.
+        """
+        if not self.end_time:
+            return None
+        return (self.end_time - self.start_time).total_seconds()
+
+    def start(self, total_scenarios: int, predicted_makespan: float = None):
+        """
+        Moves a queued session to running. A session cancelled while queued stays cancelled.
+        """
+        self.start_time = timezone.now()
+        self.total_scenarios = total_scenarios
+        self.predicted_makespan = predicted_makespan
+        Session.objects.filter(pk=self.pk, state=self.State.QUEUED).update(
+            state=self.State.RUNNING,
+            start_time=self.start_time,
+            total_scenarios=total_scenarios,
+            predicted_makespan=predicted_makespan,
+        )
+        self.refresh_from_db(fields=["state"])
+
+    def record_progress(self, scenario_status: str):
+        """
+        Counts a finished scenario. Uses an UPDATE with F() so worker threads can call it concurrently.
+        """
+        Session.objects.filter(pk=self.pk).update(
+            completed_scenarios=models.F("completed_scenarios") + 1,
+            failed_scenarios=models.F("failed_scenarios") + (scenario_status != "passed"),
+        )
+
+    def is_cancelled(self) -> bool:
+        return Session.objects.filter(pk=self.pk, state=self.State.CANCELLED).exists()
+
+    def cancel(self) -> bool:
+        """
+        Cancels a queued or running session. Scenarios already running are finished,
+        the remaining ones are skipped. Returns False if the session had already ended.
+        """
+        cancelled = Session.objects.filter(
+            pk=self.pk, state__in=[self.State.QUEUED, self.State.RUNNING]
+        ).update(state=self.State.CANCELLED)
+        self.refresh_from_db(fields=["state"])
+        return bool(cancelled)
+
+    def finalize(self, latencies=None, errored: bool = False):
+        """
+        Ends the run and merges the call latencies of its scenarios into `latencies`.
+
+        Args:
+            latencies (optional): `HistogramSet` of calls that have no `Scenario` row (load tests), merged too.
+            errored (optional): The run stopped on an unexpected error, the session ends "errored"
+                rather than "finished".
+        """
+        from .metrics import HistogramSet
 
-    def finalize(self):
         self.end_time = timezone.now()
-        self.save()
+        # Scenarios run by other processes or hosts are merged too, they all wrote their rows
+        merged = HistogramSet()
+        if latencies:
+            merged.merge(latencies)
+        for scenario_latencies in self.scenarios.exclude(latencies=None).values_list("latencies", flat=True).iterator():
+            merged.merge(HistogramSet.from_dict(scenario_latencies))
+        self.latencies = merged.as_dict() if merged else None
+        # Progress counters and the state are updated concurrently, only save what the run owns
+        self.save(update_fields=["end_time", "executed_apps", "latencies"])
+        Session.objects.filter(pk=self.pk).exclude(state=self.State.CANCELLED).update(
+            state=self.State.ERRORED if errored else self.State.FINISHED
+        )
+        self.refresh_from_db(fields=["state", "completed_scenarios", "failed_scenarios"])
 
     def __str__(self):
         return f"Session {self.id} - {self.start_time}"
@@ -27,6 +183,10 @@ class Scenario(models.Model):
     start_time = models.DateTimeField(auto_now_add=True)
     end_time = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="unknown")
+    # Total duration histograms of the run's calls by "METHOD template", see `HistogramSet`
+    latencies = models.JSONField(null=True, blank=True)
+
+    objects = ScenarioQuerySet.as_manager()
 
     def finalize(self):
         self.end_time = timezone.now()
@@ -36,13 +196,11 @@ class Scenario(models.Model):
     def description(self):
         """
         Retrieves the `__doc__` string of the scenario class that matches `scenario_name`.
-        Uses the ScenarioService.find_scenarios method to find scenario classes.
+        Uses the cached ScenarioService.get_scenario_descriptions index.
         """
         from scenario_tester.services import ScenarioService
 
-        scenarios = {cls.__name__: cls for cls in ScenarioService.find_scenarios()}
-        scenario_class = scenarios.get(self.scenario_name)
-        return scenario_class.__doc__.strip() if scenario_class and scenario_class.__doc__ else "No description available."
+        return ScenarioService.get_scenario_descriptions().get(self.scenario_name, "No description available.")
 
     def __str__(self):
         return f"ID: {self.id}, Scenario {self.scenario_name} - {self.status}"
@@ -58,7 +216,222 @@ class Log(models.Model):
     scenario = models.ForeignKey(Scenario, on_delete=models.CASCADE, related_name="logs")
     level = models.CharField(max_length=10, choices=LogLevel.choices, default=LogLevel.INFO)
     text = models.TextField()
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the message is logged, logs are written later in batches
+    created_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return f"{self.level.upper()}: {self.text[:50]} (Scenario ID: {self.scenario.id} )"
+
+
+# Claimable items read per query by `WorkItemQuerySet.claim`
+CLAIM_PAGE_SIZE = 50
+
+
+class WorkItemQuerySet(models.QuerySet):
+    def claim(self, worker: str, lease_seconds: float, session_id: int = None):
+        """
+        Atomically claims the next runnable item for `worker` and returns it, or None.
+
+        Pending items and items whose lease expired (their worker died) are claimable, in `position` order,
+        skipping items that share a resource with an item currently leased in the same session.
+        Claims are conditional UPDATEs on the item's `attempts`, so two workers never claim the same item.
+        """
+        while True:
+            now = timezone.now()
+            claimable = self.filter(
+                models.Q(state=WorkItem.State.PENDING)
+                | models.Q(state=WorkItem.State.CLAIMED, lease_expires_at__lt=now),
+                session__state=Session.State.RUNNING,
+            )
+            if session_id is not None:
+                claimable = claimable.filter(session_id=session_id)
+            item = self._claim_first_free(claimable, worker, lease_seconds, now)
+            if item is not False:
+                return item
+
+    def _claim_first_free(self, claimable, worker: str, lease_seconds: float, now):
+        """
+        Claims the first of the `claimable` items whose resources are free, reading them a page at a time:
+        a long run of conflicting items does not hide the free ones behind it.
+        Returns None when there is none, False when another worker changed an item in the meantime.
+        """
+        held_by_session = {}
+        after = None  # (session_id, position) of the last item read
+        while True:
+            page = claimable
+            if after is not None:
+                page = page.filter(
+                    models.Q(session_id__gt=after[0]) | models.Q(session_id=after[0], position__gt=after[1])
+                )
+            candidates = list(
+                page.order_by("session_id", "position")
+                .values_list("id", "session_id", "position", "resources", "attempts")[:CLAIM_PAGE_SIZE]
+            )
+            if not candidates:
+                return None
+
+            for item_id, item_session_id, _, resources, attempts in candidates:
+                if item_session_id not in held_by_session:
+                    held_by_session[item_session_id] = self.leased_resources(item_session_id, now)
+                if not held_by_session[item_session_id].isdisjoint(resources):
+                    continue
+                claimed = self.filter(pk=item_id, attempts=attempts).update(
+                    state=WorkItem.State.CLAIMED,
+                    worker=worker,
+                    lease_expires_at=now + timedelta(seconds=lease_seconds),
+                    attempts=attempts + 1,
+                )
+                if not claimed:
+                    return False  # Taken by another worker in the meantime, look again
+                item = self.get(pk=item_id)
+                if self._lost_resource_race(item, now):
+                    self.filter(pk=item_id).update(state=WorkItem.State.PENDING, worker="", lease_expires_at=None)
+                    return False
+                return item
+            after = candidates[-1][1:3]
+
+    def leased_resources(self, session_id: int, now, exclude_id: int = None) -> set:
+        items = self.filter(session_id=session_id, state=WorkItem.State.CLAIMED, lease_expires_at__gte=now)
+        if exclude_id is not None:
+            items = items.exclude(pk=exclude_id)
+        return {resource for resources in items.values_list("resources", flat=True) for resource in resources}
+
+    def _lost_resource_race(self, item, now) -> bool:
+        """
+        Two workers may claim conflicting items at the same time, the one with the lower id keeps its claim.
+        """
+        if not item.resources:
+            return False
+        conflicting = self.filter(
+            session_id=item.session_id, state=WorkItem.State.CLAIMED, lease_expires_at__gte=now, pk__lt=item.pk
+        ).values_list("resources", flat=True)
+        return any(not set(item.resources).isdisjoint(resources) for resources in conflicting)
+
+    def heartbeat(self, worker: str, lease_seconds: float) -> int:
+        """
+        Extends the lease of every item `worker` is running.
+        """
+        return self.filter(worker=worker, state=WorkItem.State.CLAIMED).update(
+            lease_expires_at=timezone.now() + timedelta(seconds=lease_seconds)
+        )
+
+
+class WorkItem(models.Model):
+    """
+    One scenario of a session queued for the distributed runners, see `scenario_tester/work_queue.py`.
+    """
+    class State(models.TextChoices):
+        PENDING = "pending", "Pending"
+        CLAIMED = "claimed", "Claimed"
+        DONE = "done", "Done"
+
+    session = models.ForeignKey(Session, on_delete=models.CASCADE, related_name="work_items")
+    scenario_path = models.CharField(max_length=255)
+    resources = models.JSONField(default=list, blank=True)
+    # Dispatch order, longest-first
+    position = models.PositiveIntegerField(default=0)
+    state = models.CharField(max_length=10, choices=State.choices, default=State.PENDING)
+    worker = models.CharField(max_length=255, blank=True, default="")
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    # Also used as the version number of the conditional claim UPDATE
+    attempts = models.PositiveIntegerField(default=0)
+
+    objects = WorkItemQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=["session", "state", "position"])]
+
+    def __str__(self):
+        return f"{self.scenario_path} ({self.state}) - Session {self.session_id}"
+
+
+class EndpointUsageQuerySet(models.QuerySet):
+    def record(self, scenario_class, endpoints, complete: bool = False):
+        """
+        Records that `scenario_class` called `endpoints`, (method, template) pairs. When `complete`,
+        the endpoints of the scenario that are not in `endpoints` are removed.
+        Only scenarios of the apps' scenarios modules are recorded.
+        """
+        from .registry import scenario_module_app
+
+        app_name = scenario_module_app(scenario_class.__module__)
+        if app_name is None:
+            return
+        now = timezone.now()
+        self.bulk_create(
+            [
+                EndpointUsage(
+                    app_name=app_name, scenario_name=scenario_class.__name__, method=method, template=template,
+                    last_seen_at=now,
+                )
+                for method, template in endpoints
+            ],
+            update_conflicts=True,
+            unique_fields=["app_name", "scenario_name", "method", "template"],
+            update_fields=["last_seen_at"],
+        )
+        if complete:
+            self.filter(app_name=app_name, scenario_name=scenario_class.__name__, last_seen_at__lt=now).delete()
+
+
+class EndpointUsage(models.Model):
+    """
+    An endpoint template a scenario called, recorded on every run. Used to select the scenarios
+    impacted by changed API paths, see `scenario_tester/impact.py`.
+    """
+    app_name = models.CharField(max_length=100)
+    scenario_name = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    template = models.CharField(max_length=255)
+    last_seen_at = models.DateTimeField(default=timezone.now)
+
+    objects = EndpointUsageQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["app_name", "scenario_name", "method", "template"], name="unique_endpoint_usage"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.scenario_name}: {self.method} {self.template}"
+
+
+class RequestRecord(models.Model):
+    """
+    One HTTP call made by a scenario, recorded by `BaseScenario.call`/`acall` and written in batches.
+
+    Durations are in milliseconds. `connect_ms` (including the name resolution) and `tls_ms` are only
+    set when the call opened a new connection, `ttfb_ms` runs until the response headers were received.
+    """
+    scenario = models.ForeignKey(Scenario, on_delete=models.CASCADE, related_name="requests")
+    # Denormalized from the session, the latency table is grouped by it
+    server = models.CharField(max_length=255)
+    step = models.CharField(max_length=255, blank=True, default="")
+    method = models.CharField(max_length=10)
+    template = models.CharField(max_length=255)
+    status_code = models.PositiveSmallIntegerField()
+    connect_ms = models.FloatField(null=True, blank=True)
+    tls_ms = models.FloatField(null=True, blank=True)
+    ttfb_ms = models.FloatField()
+    total_ms = models.FloatField()
+    request_bytes = models.PositiveIntegerField(default=0)
+    response_bytes = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["server", "method", "template"])]
+
+    def detached_fields(self) -> dict:
+        """
+        The fields a worker process sends to the parent, which sets the scenario and the server.
+        """
+        return {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname not in ("id", "scenario_id", "server")
+        }
+
+    def __str__(self):
+        return f"{self.method} {self.template} {self.status_code} ({self.total_ms:.1f} ms)"
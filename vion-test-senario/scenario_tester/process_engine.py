@@ -0,0 +1,203 @@
+import importlib
+import itertools
+import multiprocessing
+import os
+import time
+from queue import Empty
+from threading import Thread
+
+from django.conf import settings
+
+from .scheduling import ResourceScheduler
+
+# Worker processes import this module before Django is set up, models are imported where they are used
+
+
+def class_path_of(scenario_class) -> str:
+    return f"{scenario_class.__module__}.{scenario_class.__qualname__}"
+
+
+def import_class(class_path: str):
+    module_name, class_name = class_path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _worker_main(settings_module, base_url, threads, task_queue, event_queue):
+    """
+    Entry point of a worker process. Sets Django up once, then runs the scenarios it receives
+    on `threads` threads and puts their events on `event_queue` as (key, event, payload).
+    Every thread stops when it receives None.
+    """
+    os.environ["DJANGO_SETTINGS_MODULE"] = settings_module
+    import django
+
+    django.setup()
+    from django.utils import timezone
+    from .transport import http_session_pool
+
+    def run_tasks():
+        while (task := task_queue.get()) is not None:
+            key, class_path = task
+
+            def emit(event, *payload):
+                event_queue.put((key, event, payload))
+
+            try:
+                import_class(class_path)(base_url).execute_detached(emit)
+            except Exception as e:
+                # The scenario could not even be created, `execute_detached` reports everything else
+                emit("crashed", f"{type(e).__name__}: {e}", timezone.now())
+        http_session_pool.close()
+
+    workers = [Thread(target=run_tasks, name=f"scenario-process-worker-{number}") for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+class ProcessScenarioRunner:
+    """
+    Runs scenarios in a pool of worker processes, so response parsing and payload building
+    are not limited by a single interpreter's GIL.
+
+    - Every process sets Django up once and runs scenarios on `threads` threads.
+    - Processes only receive scenario class paths, run them with `BaseScenario.execute_detached`
+      and stream the start, logs and result of every scenario back.
+    - The parent is the only one writing to the database: it persists the events, records the
+      session progress and dispatches scenarios through a `ResourceScheduler`.
+
+    Args:
+        processes (optional): Number of worker processes, `SCENARIO_PROCESSES` or the number of CPUs by default.
+        threads (optional): Threads per process, `SCENARIO_PROCESS_THREADS` by default.
+    """
+
+    # Seconds to wait for an event before checking that the workers are still alive
+    event_timeout = 1.0
+    # Seconds to wait before looking again when every pending scenario waits for a resource
+    resource_poll_interval = 0.05
+
+    def __init__(self, base_url: str, session, processes: int = None, threads: int = None):
+        self.base_url = base_url
+        self.session = session
+        self.processes = processes or settings.SCENARIO_PROCESSES or os.cpu_count() or 1
+        self.threads = threads or settings.SCENARIO_PROCESS_THREADS
+
+    def run(self, scenarios: list) -> set:
+        """
+        Blocks until every scenario has finished or the session was cancelled.
+
+        Returns:
+            set: The scenario classes that were executed.
+        """
+        context = multiprocessing.get_context("spawn")
+        task_queue, event_queue = context.Queue(), context.Queue()
+        processes = [
+            context.Process(
+                target=_worker_main,
+                args=(os.environ["DJANGO_SETTINGS_MODULE"], self.base_url, self.threads, task_queue, event_queue),
+                name=f"session-{self.session.id}-process-{number}",
+                daemon=True,
+            )
+            for number in range(min(self.processes, len(scenarios)))
+        ]
+        for process in processes:
+            process.start()
+
+        scheduler = ResourceScheduler(scenarios, self.base_url)
+        capacity = len(processes) * self.threads
+        in_flight = {}  # key -> [scenario class, Scenario row once started]
+        executed = set()
+        keys = itertools.count()
+        try:
+            while True:
+                # Only look the state up when there is room for more work
+                cancelled = len(in_flight) < capacity and self.session.is_cancelled()
+                while len(in_flight) < capacity and not cancelled:
+                    scenario_class = scheduler.take()
+                    if scenario_class is None:
+                        break
+                    key = next(keys)
+                    in_flight[key] = [scenario_class, None]
+                    task_queue.put((key, class_path_of(scenario_class)))
+
+                if not in_flight:
+                    if cancelled or not scheduler.pending:
+                        break
+                    time.sleep(self.resource_poll_interval)
+                    continue
+
+                try:
+                    key, event, payload = event_queue.get(timeout=self.event_timeout)
+                except Empty:
+                    if not all(process.is_alive() for process in processes):
+                        raise RuntimeError("A scenario worker process exited unexpectedly.")
+                    continue
+                if self._handle_event(in_flight[key], event, payload):
+                    scenario_class, _ = in_flight.pop(key)
+                    scheduler.release(scenario_class)
+                    executed.add(scenario_class)
+        finally:
+            for _ in range(capacity):
+                task_queue.put(None)
+            for process in processes:
+                process.join(timeout=self.event_timeout)
+                if process.is_alive():
+                    process.terminate()
+            # Scenarios lost with a crashed process
+            for scenario_class, row in in_flight.values():
+                self._finish(row or self._create_row(scenario_class.__name__, None), "error", None)
+                scheduler.release(scenario_class)
+        return executed
+
+    def _handle_event(self, task: list, event: str, payload: tuple) -> bool:
+        """
+        Persists one event of a running scenario. Returns True once the scenario has finished.
+        """
+        from .models import EndpointUsage, Log, RequestRecord
+        from .writers import background_writer
+
+        scenario_class, row = task
+        match event:
+            case "started":
+                task[1] = self._create_row(*payload)
+            case "logs":
+                background_writer.write(
+                    [Log(scenario=row, level=level, text=text, created_at=created_at) for level, text, created_at in payload[0]]
+                )
+            case "requests":
+                background_writer.write(
+                    [RequestRecord(scenario=row, server=self.session.server, **fields) for fields in payload[0]]
+                )
+            case "endpoints":
+                endpoints, complete = payload
+                EndpointUsage.objects.record(scenario_class, [tuple(endpoint) for endpoint in endpoints], complete)
+            case "latencies":
+                row.latencies = payload[0]
+            case "finished":
+                self._finish(row, *payload)
+                return True
+            case "crashed":
+                error, end_time = payload
+                row = self._create_row(scenario_class.__name__, end_time)
+                background_writer.write([Log(scenario=row, level=Log.LogLevel.ERROR, text=f"Error: {error}")])
+                self._finish(row, "error", end_time)
+                return True
+        return False
+
+    def _create_row(self, scenario_name, start_time):
+        from .models import Scenario
+
+        row = Scenario.objects.create(session=self.session, scenario_name=scenario_name)
+        # `start_time` is auto_now_add, keep the worker's timestamp when the row is saved again
+        if start_time:
+            row.start_time = start_time
+        return row
+
+    def _finish(self, row, status, end_time):
+        from django.utils import timezone
+
+        row.status = status
+        row.end_time = end_time or timezone.now()
+        row.save()
+        self.session.record_progress(status)
@@ -0,0 +1,81 @@
+import logging
+from collections import defaultdict
+from threading import RLock
+
+logger = logging.getLogger(__name__)
+
+
+def scenario_module_app(module_name: str):
+    """
+    Returns the app of a scenarios module (`<app>.scenarios`, `<app>.scenarios1`, ...), None for any other module.
+    """
+    app_name, _, module = module_name.rpartition(".")
+    return app_name if app_name and module.startswith("scenarios") else None
+
+
+class ScenarioRegistry:
+    """
+    Concrete scenarios, registered by `BaseScenario.__init_subclass__` when their class is defined.
+
+    Only classes defined in an app's `scenarios*.py` modules are registered. They can be looked up by
+    app and name, by tag and by resource without inspecting modules. When two modules of an app define
+    a scenario with the same name, the first one imported is kept and the other is reported.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._by_app = defaultdict(dict)  # app -> {name: class}
+        self._by_tag = defaultdict(set)
+        self._by_resource = defaultdict(set)
+
+    def register(self, scenario_class):
+        app_name = scenario_module_app(scenario_class.__module__)
+        if app_name is None:
+            return
+        name = scenario_class.__name__
+        with self._lock:
+            registered = self._by_app[app_name].get(name)
+            if registered is not None and registered is not scenario_class:
+                if registered.__module__ == scenario_class.__module__:
+                    # The module was imported again (e.g. reloaded), the new class replaces the old one
+                    self._unregister(app_name, registered)
+                else:
+                    logger.warning(
+                        "Scenario %s.%s is ignored, %s.%s has the same name",
+                        scenario_class.__module__, name, registered.__module__, name,
+                    )
+                    return
+            self._by_app[app_name][name] = scenario_class
+            for tag in scenario_class.tags:
+                self._by_tag[tag].add(scenario_class)
+            for resource in scenario_class.resources:
+                self._by_resource[resource].add(scenario_class)
+
+    def get(self, app_name: str, scenario_name: str):
+        """
+        Returns the scenario class, or None if it is not registered.
+        """
+        return self._by_app.get(app_name, {}).get(scenario_name)
+
+    def for_app(self, app_name: str) -> list:
+        """
+        Returns the scenarios of an app, sorted by name.
+        """
+        scenarios = self._by_app.get(app_name, {})
+        return [scenarios[name] for name in sorted(scenarios)]
+
+    def with_tag(self, tag: str) -> set:
+        return set(self._by_tag.get(tag, ()))
+
+    def using_resource(self, resource: str) -> set:
+        return set(self._by_resource.get(resource, ()))
+
+    def _unregister(self, app_name, scenario_class):
+        del self._by_app[app_name][scenario_class.__name__]
+        for tag in scenario_class.tags:
+            self._by_tag[tag].discard(scenario_class)
+        for resource in scenario_class.resources:
+            self._by_resource[resource].discard(scenario_class)
+
+
+scenario_registry = ScenarioRegistry()
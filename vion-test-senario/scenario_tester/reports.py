@@ -0,0 +1,60 @@
+from xml.etree import ElementTree
+
+
+def scenario_record(scenario) -> dict:
+    """
+    JSON serializable result of one scenario, with its logs.
+    """
+    duration = (scenario.end_time - scenario.start_time).total_seconds() if scenario.end_time else None
+    return {
+        "session": scenario.session_id,
+        "scenario": scenario.scenario_name,
+        "status": scenario.status,
+        "start_time": scenario.start_time.isoformat(),
+        "end_time": scenario.end_time.isoformat() if scenario.end_time else None,
+        "duration": duration,
+        "logs": [
+            {"level": log.level, "text": log.text, "created_at": log.created_at.isoformat()}
+            for log in scenario.logs.all()
+        ],
+    }
+
+
+def write_junit_xml(session, path: str, class_names: dict = None):
+    """
+    Writes the scenarios of a session as a JUnit XML report, one testcase per scenario.
+    Failed scenarios are reported as failures, errored ones as errors, with their logs as the details.
+
+    Args:
+        class_names (optional): {scenario name: dotted class path} used as the testcase classnames.
+    """
+    class_names = class_names or {}
+    scenarios = list(session.scenarios.order_by("id").prefetch_related("logs"))
+    suite = ElementTree.Element(
+        "testsuite",
+        name=f"Session {session.id} - {session.server}",
+        tests=str(len(scenarios)),
+        failures=str(sum(scenario.status == "failed" for scenario in scenarios)),
+        errors=str(sum(scenario.status not in ("passed", "failed") for scenario in scenarios)),
+        time=f"{session.actual_makespan or 0:.3f}",
+        timestamp=session.start_time.isoformat(),
+    )
+    for scenario in scenarios:
+        record = scenario_record(scenario)
+        testcase = ElementTree.SubElement(
+            suite,
+            "testcase",
+            classname=class_names.get(scenario.scenario_name, scenario.scenario_name),
+            name=scenario.scenario_name,
+            time=f"{record['duration'] or 0:.3f}",
+        )
+        if scenario.status == "passed":
+            continue
+        tag = "failure" if scenario.status == "failed" else "error"
+        details = "\n".join(f"{log['level'].upper()}: {log['text']}" for log in record["logs"])
+        message = next((log["text"] for log in reversed(record["logs"]) if log["level"] == "error"), scenario.status)
+        ElementTree.SubElement(testcase, tag, message=message).text = details
+
+    testsuites = ElementTree.Element("testsuites")
+    testsuites.append(suite)
+    ElementTree.ElementTree(testsuites).write(path, encoding="utf-8", xml_declaration=True)
@@ -1,55 +1,134 @@
+import asyncio
+import re
+import time
+from functools import partial
 from typing import Tuple, Dict
+from urllib.parse import urlsplit
 import requests
 from django.utils import timezone
 from .endpoints import HTTPMethods, EndPoint
-from scenario_tester.models import Scenario
+from .assertions import Assert
+from .assets import MultipartBody, UploadAsset
+from scenario_tester.models import EndpointUsage, RequestRecord, Scenario
 from .credentials import CREDENTIALS
 from .utils import get_environment
+from .transport import connection_timings, http_session_pool
+from .auth import token_broker
+from .cassettes import cassette_library
+from .writers import LogBuffer, RecordBuffer
+from .metrics import HistogramSet
+from .registry import scenario_registry
+from .streaming import aread_streamed, read_streamed
 from threading import Lock
 
 
 class BaseScenario:
     BASE_URL = None  # Should be overridden by subclasses
     shared_resource_lock = Lock()
+    # Named shared resources (e.g. an account's to-do list) the scenario modifies.
+    # Scenarios sharing a resource are never scheduled at the same time, see `ResourceScheduler`.
+    resources = frozenset()
+    # Labels used to select scenarios (role, feature, speed...), see `parse_selection`.
+    # They are added to the tags of the base classes.
+    tags = frozenset()
+    # Relative share of the scenario in a load test mix, see `LoadProfile`
+    load_weight = 1
+    # Base classes set `abstract = True`, it is not inherited. Every other subclass defined
+    # in an app's scenarios module is registered in `scenario_registry`.
+    abstract = True
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.abstract = cls.__dict__.get("abstract", False)
+        base_tags = (base.tags for base in cls.__bases__ if issubclass(base, BaseScenario))
+        cls.tags = frozenset(cls.__dict__.get("tags", ())).union(*base_tags)
+        if not cls.abstract:
+            scenario_registry.register(cls)
     
     def __init__(self, base_url: str):
         self.BASE_URL = base_url.rstrip("/")
         self.headers = {}
         self.scenario = None
         self._step = None
+        self._logs = None  # LogBuffer of the current scenario
+        self._auth_key = None  # (environment, role) of the current login
+        self._endpoints = set()  # (method, template) of every endpoint called, see `EndpointUsage`
+        self._requests = None  # RecordBuffer of the `RequestRecord`s of the current scenario
+        self._server = ""  # Environment of the current session
+        self._latencies = HistogramSet()  # Total durations of the calls by "METHOD template"
+        self._cassette = None  # CassetteRecorder or CassettePlayer of the current run, see `CASSETTE_MODE`
         
     def set_step(self, step: str):
         """
-        Setter for the current step
+        Setter for the current step. Logs of the previous step are flushed.
         """
+        if self._logs:
+            self._logs.flush()
+        if self._requests:
+            self._requests.flush()
         self._step = step
 
     def login(self, role: str, login_endpoint: EndPoint) -> Tuple[Dict, int]:
+        """
+        Authenticates as `role`. The access token is shared with every other scenario
+        through `token_broker`, so only the first login per environment and role
+        (or a login close to the token expiry) reaches the login endpoint.
+        """
         environment = get_environment(self.BASE_URL) # ("development", "staging", "local")
+        # The scenario depends on the login endpoint even when the token comes from the cache
+        self._endpoints.add((login_endpoint.method.value, login_endpoint.template))
+        if self._cassette is not None:
+            # A shared token would leave the login out of the cassette, depending on which scenario ran first
+            response_json, status_code = self.call(login_endpoint, self._login_data(environment, role))
+        else:
+            response_json, status_code = token_broker.login(
+                environment, role, lambda: self.call(login_endpoint, self._login_data(environment, role))
+            )
+        self._set_auth_header(response_json, status_code)
+        self._auth_key = (environment, role)
+        return response_json, status_code
+
+    async def alogin(self, role: str, login_endpoint: EndPoint) -> Tuple[Dict, int]:
+        environment = get_environment(self.BASE_URL)
+        self._endpoints.add((login_endpoint.method.value, login_endpoint.template))
+        if self._cassette is not None:
+            response_json, status_code = await self.acall(login_endpoint, self._login_data(environment, role))
+        else:
+            response_json, status_code = await token_broker.alogin(
+                environment, role, lambda: self.acall(login_endpoint, self._login_data(environment, role))
+            )
+        self._set_auth_header(response_json, status_code)
+        self._auth_key = (environment, role)
+        return response_json, status_code
+
+    def _login_data(self, environment: str, role: str) -> dict:
         credentials = CREDENTIALS.get(environment, {}).get(role, {})
         if not credentials:
             raise ValueError(f"Credentials for role '{role}' in environment '{environment}' are not configured.")
 
-        data = {
+        return {
             "username": credentials["username"],
             "password": credentials["password"],
         }
 
-        response_json, status_code = self.call(login_endpoint, data)
-
+    def _set_auth_header(self, response_json, status_code: int):
         if status_code == 200:
             if "access" in response_json:
                 self.headers["Authorization"] = f"Bearer {response_json['access']}"
             else:
                 raise KeyError("The response does not contain an 'access' token.")
-        return response_json, status_code
 
     def logout(self):
+        """
+        Drops the Authorization header of this scenario only, the cached token stays valid for the next `login`.
+        """
         self.headers.pop("Authorization", None)
+        self._auth_key = None
 
     def _create_log(self, level: str, message: str):
         """
         Creates and adds a log to the current scenario.
+        Logs are buffered and written in batches, see `LogBuffer`.
 
         Args:
             level: The log level ("debug", "info", "warning", "error").
@@ -57,8 +136,10 @@ class BaseScenario:
         """
         if not self.scenario:
             raise RuntimeError("No scenario instance is set. Logs cannot be created.")
+        if self._logs is None:
+            self._logs = LogBuffer(self.scenario)
         log_message = f"({self._step}) {message}" if self._step else message
-        self.scenario.logs.create(level=level, text=log_message)
+        self._logs.add(level, log_message)
     
     # Methods for logging
     def info(self, message: str):
@@ -74,49 +155,45 @@ class BaseScenario:
         self._create_log("error", message)
 
 
-    def call(self, endpoint: EndPoint, params=None, files=None) -> Tuple[Dict, int]:
+    def call(self, endpoint: EndPoint, params=None, files=None, stream: bool = None,
+             keep: bool = False) -> Tuple[Dict, int]:
         """
         Makes an API call to the given endpoint with optional parameters.
         Returns a tuple (response_content, response_status_code).
+
+        Streamed calls (`stream=True`, `endpoint.stream` by default) read the body in chunks and return a
+        `StreamedBody` (size, SHA-256, sniffed content type) as the content. Its bytes are dropped as they
+        are read unless `keep=True`, downloads then take no memory whatever their size.
         """
-        url = f"{self.BASE_URL}{endpoint.url}"
+        url = self._url(endpoint)
         method = endpoint.method
+        stream = endpoint.stream if stream is None else stream
+        self._endpoints.add((method.value, endpoint.template))
 
         try:
-            match method:
-                case HTTPMethods.GET:
-                    response = requests.get(url, headers=self.headers, params=params)
-                case HTTPMethods.POST:
-                    if files:  # For file uploads
-                        response = requests.post(url, headers=self.headers, data=params, files=files)
-                    else:
-                        response = requests.post(url, headers=self.headers, json=params)
-                case HTTPMethods.PUT:
-                    response = requests.put(url, headers=self.headers, json=params)
-                case HTTPMethods.DELETE:
-                    response = requests.delete(url, headers=self.headers, params=params)
-                case HTTPMethods.PATCH:
-                    response = requests.patch(url, headers=self.headers, json=params)
-                case _:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
-
-            # Response content type
-            content_type = response.headers.get("Content-Type", "")
-            
-            if "application/json" in content_type:  # JSON response
-                try:
-                    response_json = response.json() if response.content else None
-                except ValueError:
-                    raise ValueError(
-                        f"Failed to parse JSON response.\n"
-                        f"URL: {url}\nMethod: {method}\nStatus Code: {response.status_code}\n"
-                        f"Response Content: {response.text}"
-                    )
-                return response_json, response.status_code
-            elif "application/pdf" in content_type:  # PDF response
-                return response.content, response.status_code
-            else:
-                return None, response.status_code
+            if self._cassette is not None and self._cassette.replaying:
+                return self._replay(endpoint, url, params, files, stream, keep)
+            session = http_session_pool.get_session(self.BASE_URL)
+            request_kwargs = self._request_kwargs(method, params, files, self.headers)
+            connection_timings.reset()
+            started = time.perf_counter()
+            response = session.request(method.value, url, stream=stream, **request_kwargs)
+            # A cassette being recorded needs the bytes
+            body = read_streamed(response, keep or self._cassette is not None) if stream else None
+            total_seconds = time.perf_counter() - started
+            session.stats.record_request()
+            connect_seconds, tls_seconds = connection_timings.pop()
+            # `elapsed` stops when the headers were parsed, the body is read afterwards
+            self._record_request(
+                endpoint, response, connect_seconds, tls_seconds, response.elapsed.total_seconds(), total_seconds,
+                body,
+            )
+            if self._cassette is not None:
+                self._cassette.record(endpoint, url, params, files, response, body.content if body else None)
+            self._check_auth_rejected(response.status_code)
+            if body is not None:
+                return body, response.status_code
+            return self._parse_response(response, url, method)
 
         except requests.exceptions.RequestException as req_err:
             raise RuntimeError(
@@ -126,7 +203,169 @@ class BaseScenario:
             raise RuntimeError(
                 f"An unexpected error occurred: {e}\nURL: {url}\nMethod: {method}\n"
             )
-            
+
+    async def acall(self, endpoint: EndPoint, params=None, files=None, stream: bool = None,
+                    keep: bool = False) -> Tuple[Dict, int]:
+        """
+        Async counterpart of `call` for scenarios whose `run` is a coroutine.
+        Uses the shared async HTTP client of the asyncio engine.
+        """
+        from .async_engine import async_http_client, httpx
+
+        url = self._url(endpoint)
+        method = endpoint.method
+        stream = endpoint.stream if stream is None else stream
+        self._endpoints.add((method.value, endpoint.template))
+
+        try:
+            if self._cassette is not None and self._cassette.replaying:
+                return self._replay(endpoint, url, params, files, stream, keep)
+            client = async_http_client.get_client(self.BASE_URL)
+            request_kwargs = self._request_kwargs(method, params, files, self.headers)
+            if isinstance(request_kwargs.get("data"), MultipartBody):
+                # httpx takes raw bodies as `content`, an AsyncClient reads them asynchronously
+                request_kwargs["content"] = aiter(request_kwargs.pop("data"))
+            phases = {}
+
+            async def trace(event_name, info):
+                phases[event_name] = time.perf_counter()
+
+            started = time.perf_counter()
+            request = client.build_request(
+                method.value, url, extensions={"trace": trace}, **request_kwargs
+            )
+            response = await client.send(request, stream=stream)
+            body = await aread_streamed(response, keep or self._cassette is not None) if stream else None
+            total_seconds = time.perf_counter() - started
+            headers_received = phases.get("http11.receive_response_headers.complete") or phases.get(
+                "http2.receive_response_headers.complete", started + total_seconds
+            )
+            self._record_request(
+                endpoint,
+                response,
+                self._phase_seconds(phases, "connection.connect_tcp"),
+                self._phase_seconds(phases, "connection.start_tls"),
+                headers_received - started,
+                total_seconds,
+                body,
+            )
+            if self._cassette is not None:
+                self._cassette.record(endpoint, url, params, files, response, body.content if body else None)
+            self._check_auth_rejected(response.status_code)
+            if body is not None:
+                return body, response.status_code
+            return self._parse_response(response, url, method)
+
+        except httpx.HTTPError as req_err:
+            raise RuntimeError(
+                f"Request failed with error: {req_err}\nURL: {url}\nMethod: {method}\nParams: {params}"
+            )
+        except Exception as e:
+            raise RuntimeError(
+                f"An unexpected error occurred: {e}\nURL: {url}\nMethod: {method}\n"
+            )
+
+    def _replay(self, endpoint: EndPoint, url: str, params, files, stream: bool, keep: bool) -> Tuple[Dict, int]:
+        """
+        Serves a call from the run's cassette, recorded like a call made over the network.
+        Streamed bodies are read from the cassette's mapped file chunk by chunk.
+        """
+        started = time.perf_counter()
+        response = self._cassette.replay(endpoint, url, params, files, self.headers)
+        body = read_streamed(response, keep) if stream else None
+        total_seconds = time.perf_counter() - started
+        self._record_request(endpoint, response, None, None, total_seconds, total_seconds, body)
+        if body is not None:
+            return body, response.status_code
+        return self._parse_response(response, url, endpoint.method)
+
+    def _record_request(self, endpoint, response, connect_seconds, tls_seconds, ttfb_seconds, total_seconds,
+                        body=None):
+        """
+        Adds a call to the run's latency histograms and buffers its `RequestRecord`,
+        written in batches like the logs. Calls made outside of a scenario run are not recorded.
+        The size of streamed responses comes from their `StreamedBody`, their content was not kept.
+        """
+        if self._requests is None:
+            return
+        self._latencies.record(f"{endpoint.method.value} {endpoint.template}", total_seconds * 1000)
+        self._requests.append(
+            RequestRecord(
+                scenario=self.scenario,
+                server=self._server,
+                step=self._step or "",
+                method=endpoint.method.value,
+                template=endpoint.template,
+                status_code=response.status_code,
+                connect_ms=connect_seconds * 1000 if connect_seconds is not None else None,
+                tls_ms=tls_seconds * 1000 if tls_seconds is not None else None,
+                ttfb_ms=ttfb_seconds * 1000,
+                total_ms=total_seconds * 1000,
+                request_bytes=int(response.request.headers.get("Content-Length") or 0),
+                response_bytes=body.size if body is not None else len(response.content),
+                created_at=timezone.now(),
+            )
+        )
+
+    @staticmethod
+    def _phase_seconds(phases: dict, name: str):
+        """
+        Duration of an httpcore trace phase ("<name>.started" to "<name>.complete"), None when it did not happen.
+        """
+        if f"{name}.started" in phases and f"{name}.complete" in phases:
+            return phases[f"{name}.complete"] - phases[f"{name}.started"]
+        return None
+
+    def _check_auth_rejected(self, status_code: int):
+        if status_code == 401 and self._auth_key:
+            # The server rejected the shared token, the next login fetches a new one
+            token_broker.invalidate(*self._auth_key)
+
+    def _url(self, endpoint: EndPoint) -> str:
+        # Absolute URLs are files the API returned, e.g. uploads served from a storage
+        return endpoint.url if urlsplit(endpoint.url).scheme else f"{self.BASE_URL}{endpoint.url}"
+
+    @staticmethod
+    def _request_kwargs(method: HTTPMethods, params=None, files=None, headers=None) -> dict:
+        """
+        Maps the call arguments to request keyword arguments (shared by requests and httpx).
+        File uploads are sent as a `MultipartBody`, which does not copy the content of the files.
+        """
+        match method:
+            case HTTPMethods.GET | HTTPMethods.DELETE:
+                return {"headers": headers, "params": params}
+            case HTTPMethods.POST:
+                if files:  # For file uploads
+                    body = MultipartBody(params, files)
+                    return {"headers": {**(headers or {}), **body.headers}, "data": body}
+                return {"headers": headers, "json": params}
+            case HTTPMethods.PUT | HTTPMethods.PATCH:
+                return {"headers": headers, "json": params}
+            case _:
+                raise ValueError(f"Unsupported HTTP method: {method}")
+
+    @staticmethod
+    def _parse_response(response, url: str, method: HTTPMethods):
+        """
+        Returns (response_content, response_status_code) based on the response content type.
+        """
+        content_type = response.headers.get("Content-Type", "")
+
+        if "application/json" in content_type:  # JSON response
+            try:
+                response_json = response.json() if response.content else None
+            except ValueError:
+                raise ValueError(
+                    f"Failed to parse JSON response.\n"
+                    f"URL: {url}\nMethod: {method}\nStatus Code: {response.status_code}\n"
+                    f"Response Content: {response.text}"
+                )
+            return response_json, response.status_code
+        elif "application/pdf" in content_type:  # PDF response
+            return response.content, response.status_code
+        else:
+            return None, response.status_code
+
     def execute(self, session):
         """
         Executes the scenario:
@@ -140,34 +379,140 @@ class BaseScenario:
                 start_time=timezone.now(),
                 scenario_name=self.__class__.__name__,
             )
+        self._logs = LogBuffer(self.scenario)
+        self._requests = RecordBuffer()
+        self._server = session.server
         try:
+            self._cassette = cassette_library.open(self.__class__, self.BASE_URL)
             self.run()
-            with self.shared_resource_lock:
-                self.scenario.status = "passed"
+            self.scenario.status = "passed"
         except AssertionError as assert_err:
-            with self.shared_resource_lock:
-                self.scenario.status = "failed"
+            self.scenario.status = "failed"
             self.error(f"Failed: {str(assert_err)}")
         except Exception as e:
-            with self.shared_resource_lock:
-                self.scenario.status = "error"
+            self.scenario.status = "error"
             self.error(f"Error: {str(e)}")
         finally:
+            self._close_cassette()
+            self._logs.flush()
+            self._requests.flush()
+            self.scenario.latencies = self._latencies.as_dict()
             with self.shared_resource_lock:
                 self.scenario.finalize()
+            self._record_endpoints()
     
+    def execute_detached(self, emit):
+        """
+        Counterpart of `execute` for worker processes, which do not touch the database.
+        The run is reported through `emit(event, *payload)` instead, the parent persists it:
+        - ("started", scenario_name, start_time)
+        - ("logs", [(level, text, created_at), ...])
+        - ("requests", [RequestRecord fields, ...])
+        - ("endpoints", [(method, template), ...], complete)
+        - ("latencies", `HistogramSet.as_dict()`)
+        - ("finished", status, end_time)
+        """
+        self.scenario = Scenario(scenario_name=self.__class__.__name__, start_time=timezone.now())
+        emit("started", self.scenario.scenario_name, self.scenario.start_time)
+        self._logs = LogBuffer(
+            self.scenario,
+            writer=lambda records: emit("logs", [(log.level, log.text, log.created_at) for log in records]),
+        )
+        self._requests = RecordBuffer(
+            writer=lambda records: emit("requests", [record.detached_fields() for record in records])
+        )
+        try:
+            self._cassette = cassette_library.open(self.__class__, self.BASE_URL)
+            self.run()
+            self.scenario.status = "passed"
+        except AssertionError as assert_err:
+            self.scenario.status = "failed"
+            self.error(f"Failed: {str(assert_err)}")
+        except Exception as e:
+            self.scenario.status = "error"
+            self.error(f"Error: {str(e)}")
+        finally:
+            self._close_cassette()
+            self._logs.flush()
+            self._requests.flush()
+            emit("endpoints", sorted(self._endpoints), self.scenario.status == "passed")
+            emit("latencies", self._latencies.as_dict())
+            emit("finished", self.scenario.status, timezone.now())
+
+    async def aexecute(self, session, db_executor):
+        """
+        Async counterpart of `execute` for scenarios whose `run` is a coroutine.
+        Database writes are queued on `db_executor` (a single-thread executor) so they
+        keep their order and never block the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        self.scenario = await loop.run_in_executor(
+            db_executor,
+            partial(
+                Scenario.objects.create,
+                session=session,
+                start_time=timezone.now(),
+                scenario_name=self.__class__.__name__,
+            ),
+        )
+        self._logs = LogBuffer(self.scenario, db_executor)
+        self._requests = RecordBuffer(db_executor)
+        self._server = session.server
+        try:
+            self._cassette = cassette_library.open(self.__class__, self.BASE_URL)
+            await self.run()
+            self.scenario.status = "passed"
+        except AssertionError as assert_err:
+            self.scenario.status = "failed"
+            self.error(f"Failed: {str(assert_err)}")
+        except Exception as e:
+            self.scenario.status = "error"
+            self.error(f"Error: {str(e)}")
+        finally:
+            self._close_cassette()
+            self._logs.flush()
+            self._requests.flush()
+            self.scenario.latencies = self._latencies.as_dict()
+            await loop.run_in_executor(db_executor, self.scenario.finalize)
+            await loop.run_in_executor(db_executor, self._record_endpoints)
+
+    def _close_cassette(self):
+        if self._cassette is not None:
+            try:
+                self._cassette.close()
+            except OSError as e:
+                self.error(f"Could not save the cassette: {e}")
+            self._cassette = None
+
+    def _record_endpoints(self):
+        """
+        Adds the endpoints the run called to the impact index. A passed run called every endpoint
+        the scenario uses, the endpoints it no longer calls are removed.
+        """
+        EndpointUsage.objects.record(self.__class__, self._endpoints, complete=self.scenario.status == "passed")
+
     def run(self):
         """
-        Override in subclasses
+        Override in subclasses. May also be defined as `async def run(self)` to be
+        awaited by the asyncio engine, in which case use `acall`/`alogin` for requests.
         """
         raise NotImplementedError("This method must be overridden in subclasses.")
 
-    def format_endpoint(self, endpoint: EndPoint, **kwargs) -> EndPoint:
-        formatted_url = endpoint.url.format(**kwargs)
-        return EndPoint(endpoint.method, formatted_url)
-
-    def is_abstract(self) -> bool:
+    def assert_uploaded(self, asset: UploadAsset, file_url: str):
         """
-        Classes will be listed in the `find_scenarios` service based on this function.
+        Downloads the file the API stored for an upload of `asset`, from the (absolute or API-relative)
+        URL it returned, and asserts its size and SHA-256 are the asset's. The MD5 is also compared
+        when the server sends it as the ETag.
         """
-        return True
+        download, status_code = self.call(EndPoint(HTTPMethods.GET, file_url, "{uploaded file}", stream=True))
+        Assert.assertEqual(status_code, 200)
+        Assert.assertEqual(
+            (download.size, download.sha256), (asset.size, asset.sha256),
+            f"{file_url} differs from the uploaded {asset.name}",
+        )
+        if re.fullmatch("[0-9a-f]{32}", download.etag):
+            Assert.assertEqual(download.etag, asset.md5, f"The ETag of {file_url} is not the MD5 of {asset.name}")
+
+    def format_endpoint(self, endpoint: EndPoint, **kwargs) -> EndPoint:
+        formatted_url = endpoint.url.format(**kwargs)
+        return EndPoint(endpoint.method, formatted_url, endpoint.template, endpoint.stream)
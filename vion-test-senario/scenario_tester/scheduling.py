@@ -0,0 +1,87 @@
+import heapq
+import statistics
+from collections import defaultdict
+from threading import Condition
+
+
+class ResourceScheduler:
+    """
+    Hands out the scenarios of one session so that scenarios sharing a resource never run at the same time.
+
+    Scenarios declare the named resources they use in `BaseScenario.resources`. `take` returns the first
+    pending scenario (in the original order) whose resources are all free and marks them as held, so idle
+    workers are filled with non-conflicting work instead of waiting on a lock. Resources are held per
+    base URL for the whole process, sessions running against the same environment respect each other.
+
+    Args:
+        scenarios: Scenario classes to run, in the preferred order.
+        base_url: The environment the resources belong to.
+    """
+
+    _held = defaultdict(set)  # base URL -> resources in use
+    _condition = Condition()
+
+    def __init__(self, scenarios: list, base_url: str):
+        self.base_url = base_url
+        self._pending = list(scenarios)
+
+    @property
+    def pending(self) -> bool:
+        with self._condition:
+            return bool(self._pending)
+
+    def take(self):
+        """
+        Returns the next scenario whose resources are free, or None if there is none right now.
+        """
+        with self._condition:
+            return self._take()
+
+    def next(self):
+        """
+        Blocks until a pending scenario can run and returns it. Returns None once nothing is pending.
+        """
+        with self._condition:
+            while self._pending:
+                scenario_class = self._take()
+                if scenario_class is not None:
+                    return scenario_class
+                self._condition.wait()
+            return None
+
+    def release(self, scenario_class):
+        """
+        Frees the resources of a finished scenario and wakes up the waiting workers.
+        """
+        with self._condition:
+            self._held[self.base_url] -= scenario_class.resources
+            self._condition.notify_all()
+
+    def _take(self):
+        held = self._held[self.base_url]
+        for index, scenario_class in enumerate(self._pending):
+            if held.isdisjoint(scenario_class.resources):
+                held |= scenario_class.resources
+                return self._pending.pop(index)
+        return None
+
+
+def order_longest_first(scenarios: list, estimates: dict) -> list:
+    """
+    Sorts scenarios by their estimated duration, longest first, so long scenarios do not start last
+    and become the tail of the run. Scenarios without an estimate are treated as typical ones
+    (the median of the known estimates). The sort is stable, ties keep their discovery order.
+    """
+    default = statistics.median(estimates.values()) if estimates else 0.0
+    return sorted(scenarios, key=lambda scenario_class: estimates.get(scenario_class.__name__, default), reverse=True)
+
+
+def predict_makespan(durations: list, workers: int) -> float:
+    """
+    Predicts the total run time of dispatching `durations` in the given order to `workers` workers,
+    each scenario going to the worker that becomes idle first. Shared resources are not taken into account.
+    """
+    finish_times = [0.0] * max(min(workers, len(durations)), 1)
+    for duration in durations:
+        heapq.heappush(finish_times, heapq.heappop(finish_times) + duration)
+    return max(finish_times)
@@ -0,0 +1,120 @@
+import re
+
+from .registry import scenario_registry
+
+KEYWORDS = {"and", "or", "not"}
+TOKEN = re.compile(r"\s*(?:(\()|(\))|([^\s()]+))")
+
+
+class SelectionError(ValueError):
+    pass
+
+
+def tokenize(expression: str) -> list:
+    tokens = []
+    position = 0
+    expression = expression.rstrip()
+    while position < len(expression):
+        match = TOKEN.match(expression, position)
+        if not match:
+            raise SelectionError(f"Unexpected character at position {position}.")
+        tokens.append(match.group(match.lastindex))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent parser of a selection expression, `not` binds tighter than `and`, `and` tighter than `or`:
+
+        expression := term ("or" term)*
+        term       := factor ("and" factor)*
+        factor     := "not" factor | "(" expression ")" | atom
+
+    Every rule returns a function of the candidate scenarios returning the selected ones as a set.
+    """
+
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.position = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise SelectionError("The selection is empty.")
+        node = self.expression()
+        if self.position < len(self.tokens):
+            raise SelectionError(f"Unexpected '{self.tokens[self.position]}'.")
+        return node
+
+    def peek(self):
+        return self.tokens[self.position].lower() if self.position < len(self.tokens) else None
+
+    def advance(self) -> str:
+        if self.position >= len(self.tokens):
+            raise SelectionError("The selection ends unexpectedly.")
+        self.position += 1
+        return self.tokens[self.position - 1]
+
+    def expression(self):
+        nodes = [self.term()]
+        while self.peek() == "or":
+            self.advance()
+            nodes.append(self.term())
+        return lambda candidates: set().union(*(node(candidates) for node in nodes))
+
+    def term(self):
+        nodes = [self.factor()]
+        while self.peek() == "and":
+            self.advance()
+            nodes.append(self.factor())
+        return lambda candidates: set.intersection(*(node(candidates) for node in nodes))
+
+    def factor(self):
+        token = self.advance()
+        if token.lower() == "not":
+            node = self.factor()
+            return lambda candidates: candidates - node(candidates)
+        if token == "(":
+            node = self.expression()
+            if self.advance() != ")":
+                raise SelectionError("Missing ')'.")
+            return node
+        if token == ")" or token.lower() in KEYWORDS:
+            raise SelectionError(f"Unexpected '{token}'.")
+        return self.atom(token)
+
+    @staticmethod
+    def atom(token: str):
+        kind, _, value = token.rpartition(":")
+        match kind:
+            case "":
+                return lambda candidates: candidates & scenario_registry.with_tag(value)
+            case "app":
+                return lambda candidates: candidates & set(scenario_registry.for_app(value))
+            case "name":
+                return lambda candidates: {cls for cls in candidates if cls.__name__ == value}
+            case _:
+                raise SelectionError(f"Unknown selector '{kind}:', use a tag, 'app:<app>' or 'name:<scenario>'.")
+
+
+def parse_selection(expression: str):
+    """
+    Parses a selection expression such as `smoke and partner1 and not upload` or
+    `(app:gallery or app:events) and not destructive`.
+
+    Words are tags (see `BaseScenario.tags`), `app:<app>` and `name:<scenario>` select by app and
+    scenario name. They are combined with `and`, `or`, `not` and parentheses.
+
+    Returns:
+        A function taking the candidate scenario classes and returning the selected ones, in their order.
+
+    Raises:
+        SelectionError: When the expression is not valid.
+    """
+    node = _Parser(tokenize(expression)).parse()
+
+    def select(scenarios: list) -> list:
+        selected = node(set(scenarios))
+        return [scenario_class for scenario_class in scenarios if scenario_class in selected]
+
+    return select
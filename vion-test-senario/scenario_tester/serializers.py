@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from scenario_tester.models import Session, Scenario, Log
+from scenario_tester.metrics import HistogramSet
 
 
 class LogSerializer(serializers.ModelSerializer):
@@ -22,14 +23,38 @@ class ScenarioSerializer(serializers.ModelSerializer):
     # Will not show 'logs' field if there is none
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        if not instance.logs.exists():
+        # `log_count` is annotated by `Session.objects.with_scenario_details()`
+        log_count = getattr(instance, "log_count", None)
+        if log_count is None:
+            log_count = instance.logs.count()
+        if not log_count:
             representation.pop('logs', None)
         return representation
 
 
 class SessionSerializer(serializers.ModelSerializer):
     scenarios = ScenarioSerializer(many=True, read_only=True)
+    latencies = serializers.SerializerMethodField()
 
     class Meta:
         model = Session
-        fields = ['id', 'server', 'executed_apps', 'start_time', 'end_time', 'scenarios']
+        fields = [
+            'id', 'server', 'executed_apps', 'state', 'total_scenarios', 'completed_scenarios',
+            'failed_scenarios', 'start_time', 'end_time', 'predicted_makespan', 'actual_makespan', 'load_report',
+            'latencies', 'scenarios',
+        ]
+
+    def get_latencies(self, obj):
+        """
+        Count, mean, min, max and p50/p95/p99 of the total durations (ms) by "METHOD template".
+        """
+        return HistogramSet.from_dict(obj.latencies).summary()
+
+
+class SessionProgressSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Session
+        fields = [
+            'id', 'server', 'state', 'total_scenarios', 'completed_scenarios', 'failed_scenarios',
+            'start_time', 'end_time', 'predicted_makespan', 'actual_makespan', 'load_report',
+        ]
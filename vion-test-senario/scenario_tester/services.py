@@ -1,22 +1,27 @@
 import os
 import importlib
-import inspect
-import random
+import statistics
 
 from django.apps import apps
 from django.conf import settings
 from django.utils.timezone import now
-from django.shortcuts import redirect
 from django.urls import reverse
 
 from .exceptions import URLValidationException
 from .exceptions import ScenarioWithNotAppException
 from .exceptions import UnexpectedErrorException
-from .models import Session, Scenario
-from .scenarios import BaseScenario
+from .exceptions import InvalidEngineException
+from .exceptions import InvalidSelectionException
+from .models import Session, Scenario, WorkItem
+from .impact import impacted_scenarios
+from .index import scenario_index
+from .registry import scenario_registry
+from .selection import SelectionError, parse_selection
+from .scheduling import ResourceScheduler, order_longest_first, predict_makespan
+from .transport import http_session_pool
+from .writers import background_writer
 
 from functools import lru_cache
-from queue import Queue
 from threading import Thread
 from datetime import datetime
 
@@ -24,163 +29,354 @@ class ScenarioService:
     """
     Service to discover and execute all scenarios in the project.
     """
+    ENGINES = ("sequential", "thread", "asyncio", "process", "queue", "load")
+    # Setting sizing the threads, tasks or processes of each engine
+    WORKER_SETTINGS = {
+        "thread": "THREAD_WORKERS",
+        "asyncio": "ASYNC_CONCURRENCY",
+        "process": "SCENARIO_PROCESSES",
+        "queue": "WORK_QUEUE_THREADS",
+        "load": "LOAD_MAX_CONCURRENCY",
+    }
 
     @staticmethod
     @lru_cache
-    def find_scenarios(app_name: str = None, scenario_name: str = None) -> list:
+    def find_scenarios(app_name: str = None, scenario_name: str = None, selection: str = None) -> list:
         """
         Finds all subclasses inheriting from BaseScenario across the project or within a specific app.
-        Optionally filters by scenario name when app_name is provided.
+        Optionally filters by scenario name when app_name is provided and by a selection expression.
+        The result is cached, filter it by the changed API paths with `impacted_scenarios`, which reads
+        the endpoints recorded by the latest runs.
+
+        The scenarios are looked up in `scenario_index` first, only the modules of the selected scenarios are imported.
+        Importing them registers their classes in `scenario_registry`, which returns them.
 
         Args:
             app_name (str, optional): The name of the app to filter scenarios by.
             scenario_name (str, optional): The name of the specific scenario to find.
+            selection (str, optional): An expression over tags, e.g. "smoke and not upload", see `parse_selection`.
 
         Returns:
             list: A list of scenario classes (or a single class if scenario_name is specified).
+
+        Raises:
+            SelectionError: When the selection is not a valid expression.
         """
 
         if scenario_name and not app_name:
             raise ValueError("scenario_name parameter requires an app_name to be provided.")
 
-        scenario_classes = []
+        # Parsed first, an invalid expression fails before any module is imported
+        select = parse_selection(selection) if selection else None
 
-        app_configs = ([apps.get_app_config(app_name)] if app_name else apps.get_app_configs())
-        for app in app_configs:
-            try:
-                # Import the 'scenarios' module from each app
-                scenarios_module = importlib.import_module(f"{app.name}.scenarios")
-
-                for name, obj in inspect.getmembers(scenarios_module, inspect.isclass):
-                    # Check if the class is a subclass of BaseScenario
-                    if issubclass(obj, BaseScenario) and obj != BaseScenario:
-                        # Detect if `is_abstract` was overridden
-                        parrent_class = obj.__bases__[0]
-                        base_method = parrent_class.is_abstract
-                        obj_method = obj.is_abstract
-
-                        if base_method == obj_method or not obj_method(obj):
-                            if scenario_name and name != scenario_name:
-                                continue
-                            scenario_classes.append(obj)
-            except ModuleNotFoundError:
-                if app_name:  # If a specific app was requested and it failed
-                    raise ModuleNotFoundError(f"App '{app_name}' does not have a 'scenarios' module.")
+        if app_name and not scenario_index.has_scenarios_module(app_name):
+            raise ModuleNotFoundError(f"App '{app_name}' does not have a 'scenarios' module.")
+
+        scenario_classes = []
+        for app, module_name, name in scenario_index.scenarios(app_name):
+            if scenario_name and name != scenario_name:
                 continue
+            importlib.import_module(module_name)
+            scenario_class = scenario_registry.get(app, name)
+            if scenario_class is not None:
+                scenario_classes.append(scenario_class)
 
         if scenario_name and not scenario_classes:
             raise ValueError(f"Scenario '{scenario_name}' not found in app '{app_name}'.")
 
+        if select:
+            scenario_classes = select(scenario_classes)
+
         return scenario_classes
 
+    @staticmethod
+    @lru_cache
+    def get_scenario_descriptions() -> dict:
+        """
+        Returns a {scenario name: stripped docstring} index of all scenarios.
+        Scenarios without a docstring are left out. Read from `scenario_index`, nothing is imported.
+        """
+        return scenario_index.descriptions()
+
     @staticmethod
     def _run_scenario(base_url, scenario_class, session):
         """
-        Runs a single scenario and updates its status in the database.
+        Runs a single scenario and updates its status and the session progress in the database.
+        Does nothing once the session has been cancelled.
 
         Args:
             scenario_class: The scenario class to be executed.
             session: The current session object.
             base_url: The base URL for the scenario.
         """
+        if session.is_cancelled():
+            return
 
         try:
             instance = scenario_class(base_url)
             instance.execute(session)
+            status = instance.scenario.status
         except Exception as e:
+            status = "error"
             scenario = Scenario.objects.filter(session=session, scenario_name=scenario_class.__name__).first()
             if scenario:
                 scenario.status = "error"
                 scenario.save()
+        session.record_progress(status)
       
     @staticmethod
-    def _execute_scenarios_one_by_one(scenarios, base_url, base_url_key):
+    def _execute_scenarios_one_by_one(scenarios, base_url, session):
         """
-        Creates a session, executes all scenarios or a specific scenario, and finalizes the session.
+        Executes all scenarios one after another, and finalizes the session.
 
         Args:
+            scenarios (list): The scenario classes to execute.
             base_url (str): The base URL to be used for scenario execution.
-            base_url_key (str): The key representing the server environment (e.g., "Development").
-            app_name (str, optional): The name of the app containing the scenarios to execute.
-            scenario_name (str, optional): The name of a specific scenario to execute.
+            session (Session): The session the scenarios are recorded in.
         """
 
-        session = Session.objects.create(start_time=now(), server=base_url_key)
-
         # Collect the names of apps whose scenarios were executed
         executed_apps = set()
 
-        for scenario_class in scenarios:
-            ScenarioService._run_scenario(base_url, scenario_class, session)
+        # Still waits for resources used by other sessions on the same environment
+        scheduler = ResourceScheduler(scenarios, base_url)
+        while (scenario_class := scheduler.next()) is not None:
+            try:
+                ScenarioService._run_scenario(base_url, scenario_class, session)
+            finally:
+                scheduler.release(scenario_class)
             app_label = scenario_class.__module__.split('.')[0]
             executed_apps.add(app_label)
 
         # Update the executed_apps field in the session
         session.executed_apps = ", ".join(sorted(executed_apps))
+        background_writer.drain()
         session.finalize()
         
     @staticmethod
-    def _execute_scenarios_thread(scenarios, base_url, base_url_key):
+    def _execute_scenarios_thread(scenarios, base_url, session):
         """
-        Executes all scenarios using a queue and threads.
+        Executes all scenarios on `THREAD_WORKERS` threads. Workers pick the next scenario
+        whose resources are free, see `ResourceScheduler`.
 
         Args:
+            scenarios (list): The scenario classes to execute.
             base_url (str): The base URL to be used for scenario execution.
-            base_url_key (str): The key representing the server environment (e.g., "Development").
-            app_name (str, optional): The name of the app containing the scenarios to execute.
-            scenario_name (str, optional): The name of a specific scenario to execute.
+            session (Session): The session the scenarios are recorded in.
         """
 
-        # Create Session
-        session = Session.objects.create(start_time=now(), server=base_url_key)
-
-        task_queue = Queue()
-        for scenario_class in scenarios:
-            task_queue.put(scenario_class)
+        scheduler = ResourceScheduler(scenarios, base_url)
 
         # Track executed apps
         executed_apps = set()
 
         # Worker function
         def worker():
-            while not task_queue.empty():
-                scenario_class = task_queue.get()
+            while (scenario_class := scheduler.next()) is not None:
                 try:
                     ScenarioService._run_scenario(base_url, scenario_class, session)
                     app_label = scenario_class.__module__.split('.')[0]
                     executed_apps.add(app_label)
                 finally:
-                    task_queue.task_done()
+                    scheduler.release(scenario_class)
+            http_session_pool.close()
 
         num_workers = settings.THREAD_WORKERS
         threads = []
-        for _ in range(num_workers):
-            thread = Thread(target=worker)
+        for number in range(num_workers):
+            # Every session gets its own workers, named after it to tell concurrent sessions apart
+            thread = Thread(target=worker, name=f"session-{session.id}-worker-{number}")
             thread.start()
             threads.append(thread)
 
-        # Wait for all tasks to complete
-        task_queue.join()
-
         # Wait for threads to finish
         for thread in threads:
             thread.join()
 
         # Finilize
         session.executed_apps = ", ".join(sorted(executed_apps))
+        background_writer.drain()
         session.finalize()
     
     @staticmethod
-    def execute_scenarios(base_url, base_url_key, app_name=None, scenario_name=None):
-        scenarios = ScenarioService.find_scenarios(app_name, scenario_name)
-        
-        if len(scenarios) >= settings.THREAD_WORKERS:
-            # Randomize the order of the scenarios so all the scenarios which are using 'Lock', wont be next to eachother
-            # random.shuffle(scenarios)
-            return ScenarioService._execute_scenarios_thread(scenarios, base_url, base_url_key)
+    def _execute_scenarios_async(scenarios, base_url, session):
+        """
+        Executes all scenarios as asyncio tasks, see `AsyncScenarioRunner`.
+
+        Args:
+            scenarios (list): The scenario classes to execute.
+            base_url (str): The base URL to be used for scenario execution.
+            session (Session): The session the scenarios are recorded in.
+        """
+        from .async_engine import AsyncScenarioRunner
+
+        runner = AsyncScenarioRunner(base_url, session, settings.ASYNC_CONCURRENCY)
+        runner.run(scenarios, ScenarioService._run_scenario)
+
+        executed_apps = {scenario_class.__module__.split('.')[0] for scenario_class in scenarios}
+        session.executed_apps = ", ".join(sorted(executed_apps))
+        background_writer.drain()
+        session.finalize()
+
+    @staticmethod
+    def _execute_scenarios_process(scenarios, base_url, session):
+        """
+        Executes all scenarios in worker processes, see `ProcessScenarioRunner`.
+
+        Args:
+            scenarios (list): The scenario classes to execute.
+            base_url (str): The base URL to be used for scenario execution.
+            session (Session): The session the scenarios are recorded in.
+        """
+        from .process_engine import ProcessScenarioRunner
+
+        executed = ProcessScenarioRunner(base_url, session).run(scenarios)
+
+        executed_apps = {scenario_class.__module__.split('.')[0] for scenario_class in executed}
+        session.executed_apps = ", ".join(sorted(executed_apps))
+        background_writer.drain()
+        session.finalize()
+
+    @staticmethod
+    def _enqueue_scenarios(scenarios, base_url, session):
+        """
+        Queues the scenarios as `WorkItem`s for `manage.py run_worker` processes, which run them and finalize
+        the session. Returns right away.
+
+        Args:
+            scenarios (list): The scenario classes to execute, in dispatch order.
+            base_url (str): Unused, workers resolve the URL from the session's server.
+            session (Session): The session the scenarios are recorded in.
+        """
+        from .process_engine import class_path_of
+
+        WorkItem.objects.bulk_create(
+            WorkItem(
+                session=session,
+                scenario_path=class_path_of(scenario_class),
+                resources=sorted(scenario_class.resources),
+                position=position,
+            )
+            for position, scenario_class in enumerate(scenarios)
+        )
+        if not scenarios:
+            session.finalize()
+
+    @staticmethod
+    def _execute_load_test(scenarios, base_url, session, profile):
+        """
+        Replays the scenarios as virtual users at the profile's arrival rate, see `LoadTestRunner`.
+        Only the load report and the session counters are recorded, not the individual scenarios.
+
+        Args:
+            scenarios (list): The scenario classes of the mix.
+            base_url (str): The base URL to be used for scenario execution.
+            session (Session): The session the load report is recorded in.
+            profile (LoadProfile): The arrival rate, duration, ramp-up and mix.
+        """
+        from .load import LoadTestRunner
+
+        runner = LoadTestRunner(base_url, session, profile)
+        runner.run(scenarios)
+
+        executed_apps = {scenario_class.__module__.split('.')[0] for scenario_class in scenarios}
+        session.executed_apps = ", ".join(sorted(executed_apps))
+        session.finalize(runner.latencies)
+
+    @staticmethod
+    def _plan_longest_first(scenarios, server, engine):
+        """
+        Orders the scenarios longest-first by their median duration over the last
+        `SCENARIO_DURATION_HISTORY` runs on `server`, and predicts the makespan of the run.
+
+        Returns:
+            tuple: The ordered scenario classes and the predicted makespan in seconds (None without history).
+        """
+        estimates = Scenario.objects.median_durations(
+            server, {scenario_class.__name__ for scenario_class in scenarios}, settings.SCENARIO_DURATION_HISTORY
+        )
+        if not estimates:
+            return scenarios, None
+
+        scenarios = order_longest_first(scenarios, estimates)
+        if engine == "queue":
+            # The number of runners picking the work up is not known
+            return scenarios, None
+        default = statistics.median(estimates.values())
+        workers = {
+            "thread": settings.THREAD_WORKERS,
+            "asyncio": settings.ASYNC_CONCURRENCY,
+            "process": (settings.SCENARIO_PROCESSES or os.cpu_count() or 1) * settings.SCENARIO_PROCESS_THREADS,
+        }.get(engine, 1)
+        durations = [estimates.get(scenario_class.__name__, default) for scenario_class in scenarios]
+        return scenarios, predict_makespan(durations, workers)
+
+    @staticmethod
+    def execute_scenarios(
+        base_url, base_url_key, app_name=None, scenario_name=None, engine=None, session=None, selection=None,
+        changed_paths=None, load_profile=None, scenarios=None,
+    ) -> Session:
+        """
+        Executes the matching scenarios with the given engine and returns the session they ran in.
+        Several sessions can run at the same time, e.g. one per environment, each with its own workers.
+
+        Args:
+            engine (str, optional): One of `ScenarioService.ENGINES`. By default scenarios run
+                on threads when there are at least `THREAD_WORKERS` of them, otherwise one by one.
+            session (Session, optional): A queued session to run in, e.g. created by `ScenarioJobRunner`.
+                A new session is created when omitted.
+            selection (str, optional): A tag expression the scenarios must match, see `parse_selection`.
+            changed_paths (list, optional): Only runs the scenarios impacted by these API paths.
+            load_profile (LoadProfile, optional): Rate, duration and mix of the "load" engine,
+                the `LOAD_*` settings by default.
+            scenarios (list, optional): Scenario classes to run instead of looking them up, e.g. the
+                synthetic scenarios of the benchmarks.
+        """
+        if scenarios is None:
+            scenarios = ScenarioService.find_scenarios(app_name, scenario_name, selection)
+            if changed_paths is not None:
+                scenarios = impacted_scenarios(scenarios, changed_paths)
+        # `find_scenarios` is cached, every session works on its own copy
+        scenarios = list(scenarios)
+
+        if session is None:
+            session = Session.objects.create(start_time=now(), server=base_url_key)
+
+        if engine is None:
+            engine = "thread" if len(scenarios) >= settings.THREAD_WORKERS else "sequential"
+
+        if base_url == settings.VION_OFFLINE_URL:
+            from .fake_server import offline_server
+
+            offline_server.ensure_running()
+
+        if engine == "load":
+            from .load import LoadProfile
+
+            load_profile = load_profile or LoadProfile.from_settings()
+            # Scenarios are started for the profile's duration, counted as they finish
+            session.start(load_profile.expected_arrivals, load_profile.duration)
         else:
-            return ScenarioService._execute_scenarios_one_by_one(scenarios, base_url, base_url_key)
-        
+            scenarios, predicted_makespan = ScenarioService._plan_longest_first(scenarios, base_url_key, engine)
+            session.start(len(scenarios), predicted_makespan)
+
+        match engine:
+            case "thread":
+                ScenarioService._execute_scenarios_thread(scenarios, base_url, session)
+            case "sequential":
+                ScenarioService._execute_scenarios_one_by_one(scenarios, base_url, session)
+            case "asyncio":
+                ScenarioService._execute_scenarios_async(scenarios, base_url, session)
+            case "process":
+                ScenarioService._execute_scenarios_process(scenarios, base_url, session)
+            case "queue":
+                ScenarioService._enqueue_scenarios(scenarios, base_url, session)
+            case "load":
+                ScenarioService._execute_load_test(scenarios, base_url, session, load_profile)
+            case _:
+                raise ValueError(f"Unknown engine '{engine}'. Available engines: {', '.join(ScenarioService.ENGINES)}")
+        return session
+
     @staticmethod
     def get_includable_apps() -> list:
         """
@@ -193,17 +389,8 @@ class ScenarioService:
         # Ensure project_root is a string
         project_root = str(settings.BASE_DIR)
 
-        includable_apps = []
-        for app in settings.INSTALLED_APPS:
-            try:
-                app_module = importlib.import_module(app)
-                app_path = os.path.dirname(app_module.__file__)
-                app_path = str(app_path)
-                # Check if the app is inside the project root
-                if app_path.startswith(project_root):
-                    includable_apps.append(app)
-            except (ImportError, AttributeError):
-                continue
+        # The app modules were imported by Django already, their paths are known without importing anything
+        includable_apps = [app.name for app in apps.get_app_configs() if str(app.path).startswith(project_root)]
 
         # Exclude Django and third-party apps
         excluded_prefixes = ("django.", "rest_framework", "drf_yasg")
@@ -230,13 +417,15 @@ class TestAllScenariosService:
             "Development": settings.VION_DEVELOP_URL,
             "Staging": settings.VION_STAGIN_URL,
             "Local": settings.VION_LOCAL_URL, 
+            "Offline": settings.VION_OFFLINE_URL,
         }
 
-    def _params_validation(self, base_url_key, app_name=None, scenario_name=None) -> str:
+    def _params_validation(self, base_url_key, app_name=None, scenario_name=None, selection=None) -> str:
         self._validate_base_url(base_url_key)
         base_url = self._get_environmental_urls(base_url_key, self.ENVIRONMENT_URLS)
         self._validate_base_url(base_url)
         self._validate_scenario_and_app(app_name, scenario_name)
+        self._validate_selection(selection)
         return base_url
         
     
@@ -253,23 +442,46 @@ class TestAllScenariosService:
     def _validate_scenario_and_app(self, app_name, scenario_name):
         if scenario_name and not app_name:
             raise ScenarioWithNotAppException()
+
+    def _validate_selection(self, selection):
+        if selection:
+            try:
+                parse_selection(selection)
+            except SelectionError as e:
+                raise InvalidSelectionException(str(e))
+
+    def _validate_engine(self, engine):
+        if engine and engine not in ScenarioService.ENGINES:
+            raise InvalidEngineException()
         
-    def execute_scenarios(self, base_url_key, app_name=None, scenario_name=None):
-        base_url = self._params_validation(base_url_key, app_name, scenario_name)
+    def execute_scenarios(self, base_url_key, app_name=None, scenario_name=None, engine=None, selection=None):
+        """
+        Queues a run and returns its session right away, the scenarios are executed by `scenario_job_runner`.
+        """
+        # Imported here, the command line runners use this module without the REST stack
+        from rest_framework import status
+        from rest_framework.response import Response
+        from .jobs import scenario_job_runner
+        from .serializers import SessionProgressSerializer
+
+        base_url = self._params_validation(base_url_key, app_name, scenario_name, selection)
+        self._validate_engine(engine)
         try:
-            ScenarioService.execute_scenarios(base_url, base_url_key, app_name=app_name, scenario_name=scenario_name)
-            session = self._get_created_session()
-            redirect_url = self._redirect_to_session_detail_url(session.id)
-            return redirect(redirect_url)
+            session = scenario_job_runner.submit(
+                base_url, base_url_key, app_name=app_name, scenario_name=scenario_name, engine=engine,
+                selection=selection,
+            )
         except Exception as e:
             print(e)
             raise UnexpectedErrorException()
+        return Response(
+            SessionProgressSerializer(session).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={"Location": self._session_progress_url(session.id)},
+        )
     
-    def _get_created_session(self):
-        return Session.objects.latest("id")
-    
-    def _redirect_to_session_detail_url(self, session_id):
-        return reverse("session-detail", kwargs={"pk": session_id})
+    def _session_progress_url(self, session_id):
+        return reverse("session-progress", kwargs={"pk": session_id})
     
     
 test_all_scenarios_service = TestAllScenariosService()
\ No newline at end of file
@@ -0,0 +1,87 @@
+import hashlib
+
+from django.conf import settings
+
+# Leading bytes identifying the formats the API serves, see `StreamedBody.content_type`
+SIGNATURES = (
+    (b"%PDF-", "application/pdf"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"PK\x03\x04", "application/zip"),
+)
+SNIFF_BYTES = max(len(signature) for signature, _ in SIGNATURES)
+
+
+class StreamedBody:
+    """
+    What a streamed call returns instead of the parsed response: the body is read in chunks and
+    summarized on the fly, its bytes are only kept when the scenario asked for them (`keep=True`).
+
+    Attributes:
+        size: Bytes received.
+        declared_content_type: The Content-Type header, without its parameters.
+        etag: The ETag header without its quotes, the MD5 of the content on some storages (e.g. S3).
+        content: The body, None unless it was kept.
+    """
+
+    def __init__(self, declared_content_type: str = "", keep: bool = False, etag: str = ""):
+        self.declared_content_type = declared_content_type.split(";")[0].strip()
+        self.etag = etag.removeprefix("W/").strip('"')
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._head = b""
+        self._chunks = [] if keep else None
+
+    def update(self, chunk: bytes):
+        if len(self._head) < SNIFF_BYTES:
+            self._head += chunk[:SNIFF_BYTES - len(self._head)]
+        self.size += len(chunk)
+        self._sha256.update(chunk)
+        if self._chunks is not None:
+            self._chunks.append(chunk)
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    @property
+    def content_type(self) -> str:
+        """
+        The type the first bytes show (e.g. "application/pdf"), the declared one when they are not recognized.
+        """
+        for signature, content_type in SIGNATURES:
+            if self._head.startswith(signature):
+                return content_type
+        return self.declared_content_type
+
+    @property
+    def content(self):
+        return b"".join(self._chunks) if self._chunks is not None else None
+
+    def __repr__(self):
+        return f"<StreamedBody {self.content_type} {self.size} bytes sha256={self.sha256[:12]}>"
+
+
+def read_streamed(response, keep: bool = False) -> StreamedBody:
+    """
+    Reads a `requests` response opened with `stream=True`, releasing its connection to the pool.
+    """
+    body = StreamedBody(response.headers.get("Content-Type", ""), keep, response.headers.get("ETag", ""))
+    for chunk in response.iter_content(settings.STREAM_CHUNK_SIZE):
+        body.update(chunk)
+    return body
+
+
+async def aread_streamed(response, keep: bool = False) -> StreamedBody:
+    """
+    Async counterpart of `read_streamed` for `httpx` responses sent with `stream=True`.
+    """
+    body = StreamedBody(response.headers.get("Content-Type", ""), keep, response.headers.get("ETag", ""))
+    try:
+        async for chunk in response.aiter_bytes(settings.STREAM_CHUNK_SIZE):
+            body.update(chunk)
+    finally:
+        await response.aclose()
+    return body
@@ -1,8 +1,54 @@
-from django.test import TestCase
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import mmap
+import os
+import socket
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from threading import Barrier, Event, Lock, Thread, current_thread
+from unittest import mock
+from xml.etree import ElementTree
+
+import requests
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
 from rest_framework import status
 from django.urls import reverse
-from .models import Session
+from django.utils import timezone
+from .assertions import Assert
+from .assets import MultipartBody, upload_assets
+from .async_engine import AsyncScenarioRunner, async_http_client
+from .auth import get_token_expiry, token_broker
+from .benchmarks.framework import compare, flatten, run_benchmarks
+from .cassettes import CassetteMiss, CassetteRecorder, MappedBody, cassette_library
+from .endpoints import EndPoint, HTTPMethods
+from .fake_server import PDF_CONTENT, FakeVionServer, endpoint_catalog, is_fake_server, offline_server
+from .impact import impacted_scenarios, parse_changed_path, path_matches
+from .index import ScenarioIndex, scan_module
+from .load import LoadProfile, LoadTestRunner
+from .metrics import HistogramSet, LatencyHistogram
+from .models import EndpointUsage, Log, RequestRecord, Scenario, Session, WorkItem
+from .process_engine import ProcessScenarioRunner
+from .registry import ScenarioRegistry, scenario_registry
+from .scenarios import BaseScenario
+from .scheduling import ResourceScheduler, predict_makespan
+from .selection import SelectionError, parse_selection
+from .streaming import StreamedBody
+from .services import ScenarioService, TestAllScenariosService
 from .serializers import SessionSerializer
+from .transport import http_session_pool
+from .work_queue import DistributedWorker
+from .writers import background_writer
 
 class SessionDetailViewTests(TestCase):
     def setUp(self):
@@ -12,6 +58,7 @@ class SessionDetailViewTests(TestCase):
             start_time="2025-01-21T08:23:58.939193Z",
             end_time="2025-01-21T08:24:08.998305Z",
         )
+        self.session.refresh_from_db()  # Parse the string timestamps
         self.url = reverse("session-detail", kwargs={"pk": self.session.id})
     
     def test_get_session_details(self):
@@ -20,11 +67,55 @@ class SessionDetailViewTests(TestCase):
         expected_data = SessionSerializer(self.session).data
         self.assertEqual(res.data, expected_data)
     
+    def test_get_session_details_query_count(self):
+        ScenarioService.get_scenario_descriptions()  # Built once per process
+        for index in range(40):
+            scenario = self.session.scenarios.create(scenario_name="MessagingTestScenario", status="passed")
+            if index % 2:
+                Log.objects.bulk_create(Log(scenario=scenario, text=f"log {number}") for number in range(5))
+
+        with self.assertNumQueries(3):
+            res = self.client.get(self.url)
+
+        self.assertEqual(len(res.data["scenarios"]), 40)
+        self.assertNotIn("logs", res.data["scenarios"][0])
+        self.assertEqual([log["text"] for log in res.data["scenarios"][1]["logs"]], [f"log {number}" for number in range(5)])
+        self.assertEqual(res.data["scenarios"][0]["description"], "Create and test Messaging module")
+
     def test_get_session_details_invalid_id(self):
         url = reverse("session-detail", kwargs={"pk": 999})
         res = self.client.get(url)
         self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
 
+class SessionProgressViewTests(TestCase):
+    def setUp(self):
+        self.session = Session.objects.create(server="Local", total_scenarios=4, completed_scenarios=1)
+
+    def test_get_progress(self):
+        res = self.client.get(reverse("session-progress", kwargs={"pk": self.session.id}))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["state"], Session.State.QUEUED)
+        self.assertEqual(res.data["completed_scenarios"], 1)
+        self.assertNotIn("scenarios", res.data)
+
+    def test_cancel(self):
+        url = reverse("session-cancel", kwargs={"pk": self.session.id})
+        res = self.client.post(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["state"], Session.State.CANCELLED)
+        self.assertTrue(self.session.is_cancelled())
+
+        res = self.client.post(url)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["detail"].code, "session-not-cancellable")
+
+    def test_cancelled_session_skips_scenarios(self):
+        self.session.cancel()
+        ScenarioService._run_scenario("http://127.0.0.1:1", PingSyncScenario, self.session)
+        self.assertFalse(self.session.scenarios.exists())
+
+# The background writer thread can not write while a TestCase transaction holds the SQLite lock
+@override_settings(BACKGROUND_WRITER=False, SCENARIO_JOBS_EAGER=True)
 class TestAllScenariosViewTests(TestCase):
     def setUp(self):
         self.url = reverse("test-all-scenarios")
@@ -41,7 +132,21 @@ class TestAllScenariosViewTests(TestCase):
     
     def test_valid_data(self):
         res = self.client.get(self.url, self.valid_data)
-        self.assertEqual(res.status_code, status.HTTP_302_FOUND)
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        session = Session.objects.get(pk=res.data["id"])
+        self.assertEqual(res["Location"], reverse("session-progress", kwargs={"pk": session.id}))
+        self.assertEqual(session.state, Session.State.FINISHED)
+        self.assertEqual(session.total_scenarios, 1)
+        self.assertEqual(session.completed_scenarios, 1)
+
+    def test_crashed_run_is_errored(self):
+        with mock.patch.object(ScenarioService, "execute_scenarios", side_effect=RuntimeError("Crashed")), \
+                self.assertLogs("scenario_tester.jobs", "ERROR"):
+            res = self.client.get(self.url, self.valid_data)
+
+        progress = self.client.get(res["Location"]).data
+        self.assertEqual(progress["state"], Session.State.ERRORED)
+        self.assertIsNotNone(progress["end_time"])
 
     def test_missing_base_url(self):
         res = self.client.get(self.url, self.invalid_data)
@@ -61,4 +166,1347 @@ class TestAllScenariosViewTests(TestCase):
         res = self.client.get(self.url, invalid_data)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(res.data["detail"].code, "invalid-scenario")
-        
\ No newline at end of file
+
+    def test_invalid_engine(self):
+        invalid_data = self.valid_data.copy()
+        invalid_data["engine"] = "InvalidEngine"
+        res = self.client.get(self.url, invalid_data)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["detail"].code, "invalid-engine")
+
+    def test_invalid_selection(self):
+        invalid_data = {"base_url": "Local", "select": "smoke and"}
+        res = self.client.get(self.url, invalid_data)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["detail"].code, "invalid-selection")
+        
+
+class _StubAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/auths/token/":
+            self.send_error(404)
+            return
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.logins += 1
+        claims = {"exp": int(time.time()) + self.server.token_ttl, "jti": self.server.logins}
+        payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+        body = json.dumps({"access": f"header.{payload}.signature", "refresh": "refresh"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServerMixin:
+    """
+    Starts a keep-alive JSON server on a free local port for the test class.
+    """
+    handler_class = _StubAPIHandler
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), cls.handler_class)
+        cls.server.logins = 0
+        cls.server.token_ttl = 3600
+        cls.server_thread = Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+
+class HTTPSessionPoolTests(StubServerMixin, SimpleTestCase):
+    def test_calls_reuse_pooled_connection(self):
+        scenario = BaseScenario(self.base_url)
+        before = http_session_pool.stats()
+
+        for _ in range(5):
+            response, status_code = scenario.call(EndPoint(HTTPMethods.GET, "/ping/"))
+            self.assertEqual(status_code, 200)
+            self.assertEqual(response["path"], "/ping/")
+
+        after = http_session_pool.stats()
+        self.assertEqual(after["requests"] - before["requests"], 5)
+        self.assertEqual(after["new_connections"] - before["new_connections"], 1)
+        self.assertEqual(after["reused_connections"] - before["reused_connections"], 4)
+        http_session_pool.close()
+
+    def test_sessions_are_per_thread(self):
+        main_session = http_session_pool.get_session(self.base_url)
+        other_sessions = []
+        thread = Thread(target=lambda: other_sessions.append(http_session_pool.get_session(self.base_url)))
+        thread.start()
+        thread.join()
+
+        self.assertIs(http_session_pool.get_session(self.base_url), main_session)
+        self.assertIsNot(other_sessions[0], main_session)
+        http_session_pool.close()
+
+    def test_closed_sessions_are_released(self):
+        def worker():
+            BaseScenario(self.base_url).call(EndPoint(HTTPMethods.GET, "/ping/"))
+            http_session_pool.close()
+
+        before, live_before = http_session_pool.stats(), len(http_session_pool._live_stats)
+        for _ in range(5):
+            thread = Thread(target=worker)
+            thread.start()
+            thread.join()
+
+        # The counters of the closed sessions are kept, the sessions are not
+        self.assertEqual(http_session_pool.stats()["requests"] - before["requests"], 5)
+        self.assertEqual(len(http_session_pool._live_stats), live_before)
+
+
+class PingAsyncScenario(BaseScenario):
+    async def run(self):
+        response, status_code = await self.acall(EndPoint(HTTPMethods.GET, "/ping/"))
+        Assert.assertEqual(status_code, 200)
+        self.info(f"Got {response['path']}")
+
+
+class PingSyncScenario(BaseScenario):
+    def run(self):
+        _, status_code = self.call(EndPoint(HTTPMethods.GET, "/ping/"))
+        Assert.assertEqual(status_code, 404)
+
+
+class AsyncScenarioRunnerTests(StubServerMixin, TransactionTestCase):
+    def test_runs_coroutine_and_sync_scenarios(self):
+        session = Session.objects.create(server="Test Server")
+
+        AsyncScenarioRunner(self.base_url, session, concurrency=10).run(
+            [PingAsyncScenario, PingSyncScenario], ScenarioService._run_scenario
+        )
+
+        statuses = dict(session.scenarios.values_list("scenario_name", "status"))
+        self.assertEqual(statuses, {"PingAsyncScenario": "passed", "PingSyncScenario": "failed"})
+        background_writer.drain()
+        record = RequestRecord.objects.get(scenario__scenario_name="PingAsyncScenario")
+        self.assertEqual((record.server, record.template, record.status_code), ("Test Server", "/ping/", 200))
+        self.assertIsNotNone(record.connect_ms)  # Every run has its own client
+        self.assertLessEqual(record.ttfb_ms, record.total_ms)
+        async_scenario = session.scenarios.get(scenario_name="PingAsyncScenario")
+        self.assertEqual(list(async_scenario.logs.values_list("text", flat=True)), ["Got /ping/"])
+        self.assertIsNotNone(async_scenario.end_time)
+
+    def test_sync_scenarios_run_on_a_bounded_pool(self):
+        session = Session.objects.create(server="Test Server")
+        runner_threads, closed_threads = set(), []
+        close = http_session_pool.close
+
+        def sync_runner(*args):
+            runner_threads.add(current_thread())
+            ScenarioService._run_scenario(*args)
+
+        def close_sessions():
+            closed_threads.append(current_thread())
+            close()
+
+        with mock.patch.object(http_session_pool, "close", close_sessions):
+            AsyncScenarioRunner(self.base_url, session, concurrency=10, sync_workers=2).run(
+                [PingSyncScenario] * 6, sync_runner
+            )
+
+        self.assertEqual(session.scenarios.count(), 6)
+        self.assertLessEqual(len(runner_threads), 2)
+        # Every pool thread closed its sessions once
+        self.assertEqual(sorted(map(id, closed_threads)), sorted(map(id, runner_threads)))
+
+
+class ConcurrentSessionsTests(StubServerMixin, TransactionTestCase):
+    def test_sessions_running_at_the_same_time_are_isolated(self):
+        scenarios = [PingSyncScenario] * 8
+        sessions = {}
+
+        def run(server, engine):
+            sessions[server] = ScenarioService.execute_scenarios(self.base_url, server, engine=engine)
+
+        with mock.patch.object(ScenarioService, "find_scenarios", return_value=scenarios):
+            threads = [
+                Thread(target=run, args=("Development", "thread")),
+                Thread(target=run, args=("Staging", "asyncio")),
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(Session.objects.count(), 2)
+        for server, session in sessions.items():
+            session.refresh_from_db()
+            self.assertEqual(session.server, server)
+            self.assertEqual(session.state, Session.State.FINISHED)
+            self.assertEqual((session.total_scenarios, session.completed_scenarios), (8, 8))
+            self.assertEqual(session.failed_scenarios, 8)
+            self.assertEqual(session.scenarios.count(), 8)
+
+
+class _ResourceUsingScenario(BaseScenario):
+    """
+    Holds its resources for a moment and records the largest number of scenarios seen using each of them.
+    """
+    lock = Lock()
+    in_use = {}
+    max_in_use = {}
+
+    def run(self):
+        with self.lock:
+            for resource in self.resources:
+                self.in_use[resource] = self.in_use.get(resource, 0) + 1
+                self.max_in_use[resource] = max(self.max_in_use.get(resource, 0), self.in_use[resource])
+        time.sleep(0.05)
+        with self.lock:
+            for resource in self.resources:
+                self.in_use[resource] -= 1
+
+
+class PartnerListScenario(_ResourceUsingScenario):
+    resources = frozenset({"partner1 todo list"})
+
+
+class BackOfficeListScenario(_ResourceUsingScenario):
+    resources = frozenset({"backoffice todo list", "partner1 todo list"})
+
+
+class FreeScenario(_ResourceUsingScenario):
+    pass
+
+
+class ResourceSchedulerTests(SimpleTestCase):
+    def test_take_skips_scenarios_with_held_resources(self):
+        scheduler = ResourceScheduler([PartnerListScenario, BackOfficeListScenario, FreeScenario], "scheduler-test")
+
+        self.assertIs(scheduler.take(), PartnerListScenario)
+        self.assertIs(scheduler.take(), FreeScenario)
+        self.assertIsNone(scheduler.take())
+        self.assertTrue(scheduler.pending)
+
+        scheduler.release(PartnerListScenario)
+        self.assertIs(scheduler.take(), BackOfficeListScenario)
+        scheduler.release(BackOfficeListScenario)
+        scheduler.release(FreeScenario)
+        self.assertFalse(scheduler.pending)
+        self.assertIsNone(scheduler.next())
+
+    def test_resources_are_shared_per_environment(self):
+        scheduler = ResourceScheduler([PartnerListScenario], "scheduler-test-env-a")
+        other_session = ResourceScheduler([PartnerListScenario], "scheduler-test-env-a")
+        other_environment = ResourceScheduler([PartnerListScenario], "scheduler-test-env-b")
+
+        self.assertIs(scheduler.take(), PartnerListScenario)
+        self.assertIsNone(other_session.take())
+        self.assertIs(other_environment.take(), PartnerListScenario)
+        scheduler.release(PartnerListScenario)
+        other_environment.release(PartnerListScenario)
+
+
+class ResourceAwareEngineTests(TransactionTestCase):
+    def setUp(self):
+        _ResourceUsingScenario.in_use.clear()
+        _ResourceUsingScenario.max_in_use.clear()
+
+    @override_settings(THREAD_WORKERS=4)
+    def test_conflicting_scenarios_never_overlap(self):
+        scenarios = [PartnerListScenario, BackOfficeListScenario] * 3 + [FreeScenario] * 6
+        for engine in ("thread", "asyncio"):
+            with self.subTest(engine=engine), mock.patch.object(ScenarioService, "find_scenarios", return_value=scenarios):
+                session = ScenarioService.execute_scenarios("http://127.0.0.1:1", "Local", engine=engine)
+
+                session.refresh_from_db()
+                self.assertEqual((session.completed_scenarios, session.failed_scenarios), (12, 0))
+                self.assertEqual(_ResourceUsingScenario.max_in_use["partner1 todo list"], 1)
+                self.assertEqual(_ResourceUsingScenario.max_in_use["backoffice todo list"], 1)
+
+
+class LongestFirstSchedulingTests(TestCase):
+    def add_runs(self, server, scenario_name, *durations):
+        session = Session.objects.create(server=server)
+        start_time = timezone.now()
+        for duration in durations:
+            scenario = session.scenarios.create(scenario_name=scenario_name)
+            Scenario.objects.filter(pk=scenario.pk).update(
+                start_time=start_time, end_time=start_time + timedelta(seconds=duration)
+            )
+
+    def test_median_durations_use_recent_runs_per_server(self):
+        self.add_runs("Local", "FreeScenario", 100, 100, 1, 2, 3)
+        self.add_runs("Local", "PartnerListScenario", 5)
+        self.add_runs("Staging", "PartnerListScenario", 50)
+        Scenario.objects.create(session=Session.objects.create(server="Local"), scenario_name="BackOfficeListScenario")
+
+        estimates = Scenario.objects.median_durations(
+            "Local", ["FreeScenario", "PartnerListScenario", "BackOfficeListScenario"], window=3
+        )
+
+        self.assertEqual(estimates, {"FreeScenario": 2, "PartnerListScenario": 5})
+
+    def test_predict_makespan(self):
+        self.assertEqual(predict_makespan([5, 4, 3, 3, 2], workers=2), 9)
+        self.assertEqual(predict_makespan([2, 3, 3, 4, 5], workers=2), 10)
+        self.assertEqual(predict_makespan([], workers=4), 0)
+
+    @override_settings(BACKGROUND_WRITER=False)
+    def test_run_is_ordered_longest_first(self):
+        self.add_runs("Local", "FreeScenario", 1)
+        self.add_runs("Local", "PartnerListScenario", 3)
+        executed = []
+
+        def run_scenario(base_url, scenario_class, session):
+            executed.append(scenario_class.__name__)
+            session.record_progress("passed")
+
+        scenarios = [FreeScenario, BackOfficeListScenario, PartnerListScenario]
+        with mock.patch.object(ScenarioService, "find_scenarios", return_value=scenarios), \
+                mock.patch.object(ScenarioService, "_run_scenario", side_effect=run_scenario):
+            session = ScenarioService.execute_scenarios("http://127.0.0.1:1", "Local", engine="sequential")
+
+        # BackOfficeListScenario has no history and counts as a typical (median) scenario
+        self.assertEqual(executed, ["PartnerListScenario", "BackOfficeListScenario", "FreeScenario"])
+        self.assertEqual(session.predicted_makespan, 6)
+        self.assertIsNotNone(session.actual_makespan)
+
+
+class LoggingPingScenario(BaseScenario):
+    def run(self):
+        self.set_step("Ping")
+        response, status_code = self.call(EndPoint(HTTPMethods.GET, "/ping/"))
+        self.info(f"Got {response['path']}")
+        Assert.assertEqual(status_code, 200)
+
+
+@override_settings(BACKGROUND_WRITER=False)
+class RequestRecordTests(StubServerMixin, TransactionTestCase):
+    def test_calls_are_recorded(self):
+        session = Session.objects.create(server="Local")
+
+        LoggingPingScenario(self.base_url).execute(session)
+        LoggingPingScenario(self.base_url).execute(session)
+
+        first, second = RequestRecord.objects.order_by("id")
+        self.assertEqual(
+            (first.server, first.step, first.method, first.template, first.status_code),
+            ("Local", "Ping", "GET", "/ping/", 200),
+        )
+        self.assertEqual(first.response_bytes, len(json.dumps({"path": "/ping/"})))
+        self.assertLessEqual(first.ttfb_ms, first.total_ms)
+        self.assertIsNotNone(first.connect_ms)
+        self.assertIsNone(first.tls_ms)
+        # The second call reuses the pooled connection
+        self.assertIsNone(second.connect_ms)
+
+    def test_latency_table(self):
+        for server, durations in (("Local", range(1, 51)), ("Local", range(51, 101)), ("Staging", [5.0])):
+            session = Session.objects.create(server=server)
+            scenario = Scenario.objects.create(session=session, scenario_name="Ping")
+            histograms = HistogramSet()
+            for duration in durations:
+                histograms.record("GET /ping/", duration)
+            scenario.latencies = histograms.as_dict()
+            scenario.save()
+            session.finalize()
+
+        res = self.client.get(reverse("request-latencies"), {"server": "Local"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        [row] = res.data
+        self.assertEqual(
+            {key: row[key] for key in ("server", "method", "template", "count")},
+            {"server": "Local", "method": "GET", "template": "/ping/", "count": 100},
+        )
+        for key, expected in (("p50", 50), ("p95", 95), ("p99", 99)):
+            self.assertAlmostEqual(row[key], expected, delta=expected * 0.01)
+        self.assertEqual(len(self.client.get(reverse("request-latencies")).data), 2)
+        self.assertEqual(self.client.get(reverse("request-latencies"), {"days": "x"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("request-latencies"), {"days": "-3"}).status_code, 400)
+
+    def test_latency_table_counts_unfinished_sessions(self):
+        session = Session.objects.create(server="Local")
+        scenario = Scenario.objects.create(session=session, scenario_name="Ping")
+        RequestRecord.objects.bulk_create(
+            RequestRecord(scenario=scenario, server="Local", method="GET", template="/ping/", status_code=200,
+                          ttfb_ms=duration, total_ms=duration)
+            for duration in (10, 20, 30)
+        )
+
+        [row] = self.client.get(reverse("request-latencies")).data
+        self.assertEqual((row["template"], row["count"]), ("/ping/", 3))
+        self.assertAlmostEqual(row["p50"], 20, delta=0.2)
+
+        # Once finalized, the session's histogram is read instead of its records
+        histograms = HistogramSet()
+        for duration in (10, 20, 30):
+            histograms.record("GET /ping/", duration)
+        Scenario.objects.filter(pk=scenario.pk).update(latencies=histograms.as_dict())
+        session.finalize()
+        [row] = self.client.get(reverse("request-latencies")).data
+        self.assertEqual(row["count"], 3)
+
+
+class LatencyHistogramTests(SimpleTestCase):
+    def test_percentiles_and_merge(self):
+        low, high = LatencyHistogram(), LatencyHistogram()
+        for value in range(1, 1001):
+            (low if value <= 500 else high).record(value)
+        low.merge(high)
+
+        self.assertEqual(low.count, 1000)
+        for fraction, expected in ((0.5, 500), (0.95, 950), (0.99, 990)):
+            self.assertAlmostEqual(low.percentile(fraction), expected, delta=expected * 0.01)
+        self.assertEqual(low.percentile(1.0), 1000)
+        self.assertEqual(LatencyHistogram.from_dict(json.loads(json.dumps(low.as_dict()))).summary(), low.summary())
+
+    def test_memory_is_bounded(self):
+        histogram = LatencyHistogram()
+        for exponent in range(-6, 12):
+            histogram.record(10.0 ** exponent)
+        self.assertEqual(max(histogram.counts), math.ceil(math.log(LatencyHistogram.MAX_VALUE) / math.log1p(0.01)))
+        self.assertEqual(histogram.max, 10.0 ** 11)
+
+    def test_histogram_sets_merge_by_key(self):
+        first, second = HistogramSet(), HistogramSet()
+        first.record("GET /ping/", 10)
+        second.record("GET /ping/", 20)
+        second.record("POST /auths/token/", 30)
+        first.merge(HistogramSet.from_dict(json.loads(json.dumps(second.as_dict()))))
+
+        summary = first.summary()
+        self.assertEqual(list(summary), ["GET /ping/", "POST /auths/token/"])
+        self.assertEqual((summary["GET /ping/"]["count"], summary["GET /ping/"]["max"]), (2, 20))
+
+
+class LoadProfileTests(SimpleTestCase):
+    def test_arrivals(self):
+        steady = LoadProfile(rate=10, duration=2)
+        self.assertEqual(steady.expected_arrivals, 20)
+        self.assertAlmostEqual(steady.arrival_time(5), 0.5)
+
+        ramped = LoadProfile(rate=10, duration=4, ramp_up=2)
+        self.assertEqual(ramped.expected_arrivals, 30)  # 10 during the ramp-up, 20 after
+        self.assertAlmostEqual(ramped.arrival_time(10), 2.0)
+        self.assertAlmostEqual(ramped.arrivals(ramped.arrival_time(3)), 3)
+        self.assertLess(ramped.arrival_time(1), 2 * ramped.arrival_time(2) - ramped.arrival_time(1))
+
+    def test_mix(self):
+        profile = LoadProfile(rate=1, duration=1, mix={"PingSyncScenario": 0})
+        self.assertEqual(profile.weights([LoggingPingScenario, PingSyncScenario]), [1, 0])
+
+
+@override_settings(LOAD_REPORT_INTERVAL=0.2)
+class LoadTestRunnerTests(StubServerMixin, TransactionTestCase):
+    def test_load_engine(self):
+        profile = LoadProfile(rate=40, duration=0.5, mix={"PingSyncScenario": 1, "LoggingPingScenario": 3}, seed=1)
+        reports = []
+
+        with mock.patch.object(ScenarioService, "find_scenarios", return_value=[LoggingPingScenario, PingSyncScenario]):
+            session = ScenarioService.execute_scenarios(self.base_url, "Local", engine="load", load_profile=profile)
+        session.refresh_from_db()
+
+        total = session.load_report["total"]
+        self.assertTrue(session.load_report["final"])
+        self.assertEqual(session.state, Session.State.FINISHED)
+        self.assertEqual(session.total_scenarios, 20)
+        self.assertEqual(total["started"] + total["dropped"], 20)
+        self.assertEqual(total["completed"], total["started"])
+        self.assertEqual((session.completed_scenarios, session.failed_scenarios), (total["completed"], total["failed"]))
+        self.assertGreater(total["failed"], 0)
+        self.assertLess(total["failed"], total["completed"])
+        self.assertEqual(total["endpoints"]["GET /ping/"]["count"], total["completed"])
+        self.assertEqual(session.latencies["GET /ping/"]["count"], total["completed"])
+        self.assertEqual(list(total["errors"])[0].split(":")[0], "PingSyncScenario")
+        # Virtual users do not record scenarios
+        self.assertFalse(session.scenarios.exists())
+
+    @override_settings(LOAD_REPORT_INTERVAL=0.1)
+    def test_reports_count_running_and_crashed_scenarios(self):
+        session = Session.objects.create(server="Local")
+        profile = LoadProfile(rate=20, duration=0.3, max_concurrency=10)
+        reports = []
+        finish = Event()
+
+        def on_report(report):
+            reports.append(report)
+            finish.set()
+
+        def execute_detached(scenario, emit):
+            emit("logs", [("error", "Crashing", None)])
+            finish.wait(5)
+            raise RuntimeError("Crashed")
+
+        runner = LoadTestRunner(self.base_url, session, profile, on_report=on_report)
+        with mock.patch.object(PingSyncScenario, "execute_detached", execute_detached), \
+                self.assertLogs("scenario_tester.load", "ERROR"):
+            final = runner.run([PingSyncScenario])
+
+        # Running for longer than the interval, the first scenarios are in the first report
+        self.assertGreater(reports[0]["interval"]["started"], 0)
+        self.assertEqual(reports[0]["interval"]["completed"], 0)
+        self.assertEqual(final["total"]["started"] + final["total"]["dropped"], profile.expected_arrivals)
+        self.assertEqual(final["total"]["completed"], 0)
+        self.assertEqual(final["total"]["errors"], {"PingSyncScenario: Crashing": final["total"]["started"]})
+
+
+class FakeVionServerTests(SimpleTestCase):
+    def setUp(self):
+        self.server = FakeVionServer(port=0).start()
+        self.addCleanup(self.server.stop)
+        self.http = requests.Session()
+        self.addCleanup(self.http.close)
+
+    def login(self, password="offline"):
+        res = self.http.post(
+            f"{self.server.url}/auths/token/", json={"username": "partner1@offline.test", "password": password}
+        )
+        if res.status_code == 200:
+            self.http.headers["Authorization"] = f"Bearer {res.json()['access']}"
+        return res
+
+    def test_serves_the_endpoint_catalog(self):
+        self.assertIn(("PUT", "/todo/series/partner/{slug}/"), endpoint_catalog())
+        self.assertEqual(self.login("wrong").status_code, 401)
+        self.assertEqual(self.http.get(f"{self.server.url}/network/contacts/").status_code, 401)
+        self.assertEqual(self.login().status_code, 200)
+        self.assertIsNotNone(get_token_expiry(self.http.headers["Authorization"].split()[1]))
+
+        contacts = f"{self.server.url}/network/contacts/"
+        res = self.http.post(contacts, json={"first_name": "[Contact] 1", "country": "DE"})
+        self.assertEqual(res.status_code, 201)
+        contact = res.json()
+        self.assertEqual(self.http.get(contacts, params={"text": "[Contact]", "country": "DE"}).json()["count"], 1)
+        self.assertEqual(self.http.get(contacts, params={"country": "AE"}).json()["count"], 0)
+        res = self.http.patch(f"{contacts}{contact['slug']}/", json={"city": "City"})
+        self.assertEqual((res.status_code, res.json()["city"]), (200, "City"))
+        # Objects are found by id too
+        self.assertEqual(self.http.get(f"{self.server.url}/network/orga-session/{contact['id']}/").status_code, 200)
+        self.assertEqual(self.http.delete(f"{contacts}{contact['slug']}/").status_code, 204)
+        self.assertEqual(self.http.get(f"{contacts}{contact['slug']}/").status_code, 404)
+        self.assertEqual(self.http.get(f"{self.server.url}/unknown/").status_code, 404)
+
+        res = self.http.get(f"{self.server.url}/wishes_and_goals/download-summary-pdf/form-1/")
+        self.assertEqual(res.headers["Content-Type"], "application/pdf")
+        self.assertEqual(self.http.get(f"{self.server.url}/auths/profile/").json()["id"], 2)
+
+    def test_latency_and_error_injection(self):
+        self.server.latency, self.server.error_rate = 0.05, 1.0
+        started = time.perf_counter()
+        self.assertEqual(self.login().status_code, 500)
+        self.assertGreaterEqual(time.perf_counter() - started, 0.05)
+
+
+class OfflineEnvironmentTests(TransactionTestCase):
+    def test_scenarios_run_against_the_fake_server(self):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            offline_url = f"http://127.0.0.1:{probe.getsockname()[1]}"
+        token_broker.invalidate()
+        self.addCleanup(token_broker.invalidate)
+        self.addCleanup(offline_server.stop)
+
+        with override_settings(VION_OFFLINE_URL=offline_url), \
+                mock.patch.dict(TestAllScenariosService.ENVIRONMENT_URLS, {"Offline": offline_url}):
+            session = ScenarioService.execute_scenarios(
+                offline_url, "Offline", app_name="to_do_list", scenario_name="ToDoListTestScenario", engine="sequential"
+            )
+
+        self.assertEqual(list(session.scenarios.values_list("status", flat=True)), ["passed"])
+        self.assertIn("POST /todo/series/partner/", session.latencies)
+
+    def test_address_used_by_another_program(self):
+        other = ThreadingHTTPServer(("127.0.0.1", 0), BaseHTTPRequestHandler)
+        Thread(target=other.serve_forever, daemon=True).start()
+        offline_url = f"http://127.0.0.1:{other.server_port}"
+        self.addCleanup(offline_server.stop)
+
+        with override_settings(VION_OFFLINE_URL=offline_url):
+            with self.assertRaises(RuntimeError):
+                offline_server.ensure_running()
+            other.shutdown()
+            other.server_close()
+            # Not given up, started once the address is free
+            offline_server.ensure_running()
+            self.assertTrue(is_fake_server(offline_url))
+
+    def test_fake_server_already_listening(self):
+        server = FakeVionServer(port=0).start()
+        self.addCleanup(server.stop)
+
+        with override_settings(VION_OFFLINE_URL=server.url), self.assertLogs("scenario_tester.fake_server", "INFO") as logs:
+            offline_server.ensure_running()
+        self.assertIn("using the fake server already listening there", logs.output[0])
+
+
+CASSETTE_PDF = EndPoint(HTTPMethods.GET, "/wishes_and_goals/download-summary-pdf/{slug}/")
+
+
+class _CassetteScenario(BaseScenario):
+    def run(self):
+        _, status_code = self.login("partner1", EndPoint(HTTPMethods.POST, "/auths/token/"))
+        Assert.assertEqual(status_code, 200)
+        _, status_code = self.call(
+            EndPoint(HTTPMethods.POST, "/filecenter/photo/"), files={"file": BytesIO(b"\xff\xd8 photo")}
+        )
+        Assert.assertEqual(status_code, 201)
+        # The name differs from the recording, the call is matched by endpoint
+        contact, status_code = self.call(
+            EndPoint(HTTPMethods.POST, "/network/contacts/"), {"first_name": f"[Contact] {time.time()}"}
+        )
+        Assert.assertEqual(status_code, 201)
+        fetched, _ = self.call(
+            self.format_endpoint(EndPoint(HTTPMethods.GET, "/network/contacts/{slug}/"), slug=contact["slug"])
+        )
+        Assert.assertEqual(fetched["id"], contact["id"])
+        pdf, _ = self.call(self.format_endpoint(CASSETTE_PDF, slug="form-1"))
+        Assert.assertEqual(pdf, PDF_CONTENT)
+
+
+@override_settings(BACKGROUND_WRITER=False)
+class CassetteTests(TransactionTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(cassette_library.clear)
+        self.server = FakeVionServer(port=0).start()
+        self.addCleanup(self.server.stop)
+        overrides = override_settings(CASSETTE_DIR=directory.name, VION_OFFLINE_URL=self.server.url)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def run_scenario(self, mode):
+        session = Session.objects.create(server="Offline")
+        with override_settings(CASSETTE_MODE=mode):
+            _CassetteScenario(self.server.url).execute(session)
+        return session.scenarios.get()
+
+    def test_record_and_replay_without_network(self):
+        recorded = self.run_scenario("record")
+        self.assertEqual(recorded.status, "passed")
+        self.server.stop()
+        requests_before = http_session_pool.stats()["requests"]
+
+        replayed = self.run_scenario("replay")
+
+        self.assertEqual(replayed.status, "passed", list(replayed.logs.values_list("text", flat=True)))
+        self.assertEqual(http_session_pool.stats()["requests"], requests_before)
+        self.assertEqual(
+            list(replayed.requests.values_list("template", "status_code", "response_bytes")),
+            list(recorded.requests.values_list("template", "status_code", "response_bytes")),
+        )
+        self.assertEqual(set(replayed.requests.values_list("connect_ms", flat=True)), {None})
+
+    def test_replayed_bodies_stream_from_the_mapped_file(self):
+        self.run_scenario("record")
+        cassette = cassette_library.load(f"{__name__}._CassetteScenario")
+        self.assertEqual([interaction["template"] for interaction in cassette.interactions][-1], CASSETTE_PDF.template)
+
+        with override_settings(CASSETTE_MODE="replay"):
+            player = cassette_library.open(_CassetteScenario, self.server.url)
+        pdf_endpoint = EndPoint(HTTPMethods.GET, "/wishes_and_goals/download-summary-pdf/form-2/", CASSETTE_PDF.template)
+        response = player.replay(pdf_endpoint, f"{self.server.url}{pdf_endpoint.url}", None, None, {})
+
+        self.assertIsInstance(response.raw, MappedBody)
+        self.assertEqual(b"".join(response.iter_content(16)), PDF_CONTENT)
+        self.assertEqual(response.headers["Content-Type"], "application/pdf")
+        with self.assertRaises(CassetteMiss):
+            player.replay(pdf_endpoint, f"{self.server.url}{pdf_endpoint.url}", None, None, {})
+
+    def test_concurrent_recordings_replace_the_cassette_whole(self):
+        name = f"{__name__}._CassetteScenario"
+        endpoint = EndPoint(HTTPMethods.GET, "/network/contacts/")
+        response = mock.Mock(status_code=200, headers={}, request=mock.Mock(headers={}))
+        replace = os.replace
+        barrier = Barrier(2)
+
+        def paused_replace(source, target):
+            barrier.wait()
+            replace(source, target)
+
+        def record(run):
+            recorder = CassetteRecorder(settings.CASSETTE_DIR, name, self.server.url)
+            recorder.record(endpoint, f"{self.server.url}/{run}/", None, None, response, run.encode() * 100)
+            recorder.close()
+
+        # The two runs end together, in any order, ten times
+        with mock.patch("os.replace", paused_replace):
+            for _ in range(10):
+                threads = [Thread(target=record, args=(run,)) for run in ("a", "bb")]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                cassette = cassette_library.load(name)
+                interaction = cassette.interactions[0]
+                run = interaction["path"].strip("/")
+                body = cassette.bodies[interaction["offset"]:interaction["offset"] + interaction["length"]]
+                self.assertEqual(bytes(body), run.encode() * 100)
+
+    def test_missing_cassette_fails_the_run(self):
+        scenario = self.run_scenario("replay")
+
+        self.assertEqual(scenario.status, "error")
+        self.assertIn("No cassette recorded", scenario.logs.get().text)
+
+
+class _DownloadScenario(BaseScenario):
+    def run(self):
+        _, status_code = self.login("partner1", EndPoint(HTTPMethods.POST, "/auths/token/"))
+        Assert.assertEqual(status_code, 200)
+        pdf, status_code = self.call(self.format_endpoint(STREAMED_PDF, slug="form-1"))
+        Assert.assertEqual(status_code, 200)
+        Assert.assertEqual((pdf.content_type, pdf.size, pdf.content), ("application/pdf", len(PDF_CONTENT), None))
+        Assert.assertEqual(pdf.sha256, hashlib.sha256(PDF_CONTENT).hexdigest())
+        pdf, _ = self.call(self.format_endpoint(CASSETTE_PDF, slug="form-1"), stream=True, keep=True)
+        Assert.assertEqual(pdf.content, PDF_CONTENT)
+
+
+class _AsyncDownloadScenario(BaseScenario):
+    async def run(self):
+        _, status_code = await self.alogin("partner1", EndPoint(HTTPMethods.POST, "/auths/token/"))
+        Assert.assertEqual(status_code, 200)
+        pdf, status_code = await self.acall(self.format_endpoint(STREAMED_PDF, slug="form-1"), keep=True)
+        Assert.assertEqual((status_code, pdf.content_type, pdf.content), (200, "application/pdf", PDF_CONTENT))
+
+
+STREAMED_PDF = EndPoint(CASSETTE_PDF.method, CASSETTE_PDF.url, stream=True)
+
+
+@override_settings(BACKGROUND_WRITER=False, STREAM_CHUNK_SIZE=16)
+class StreamedCallTests(TransactionTestCase):
+    def setUp(self):
+        self.server = FakeVionServer(port=0).start()
+        self.addCleanup(self.server.stop)
+        # The runs find this server at VION_OFFLINE_URL, reset the offline server of the process afterwards
+        self.addCleanup(offline_server.stop)
+        token_broker.invalidate()
+        self.addCleanup(token_broker.invalidate)
+
+    def test_streamed_body(self):
+        body = StreamedBody("application/octet-stream; charset=binary")
+        for chunk in (b"\x89P", b"NG\r\n\x1a\n", b"data"):
+            body.update(chunk)
+        self.assertEqual((body.size, body.content_type, body.content), (12, "image/png", None))
+        self.assertEqual(StreamedBody("text/csv; charset=utf-8").content_type, "text/csv")
+
+    def test_streamed_downloads(self):
+        with override_settings(VION_OFFLINE_URL=self.server.url):
+            for engine, scenario_class in (("sequential", _DownloadScenario), ("asyncio", _AsyncDownloadScenario)):
+                session = ScenarioService.execute_scenarios(
+                    self.server.url, "Offline", engine=engine, scenarios=[scenario_class]
+                )
+                scenario = session.scenarios.get()
+                self.assertEqual(scenario.status, "passed", list(scenario.logs.values_list("text", flat=True)))
+                self.assertEqual(
+                    set(scenario.requests.filter(method="GET").values_list("response_bytes", flat=True)),
+                    {len(PDF_CONTENT)},
+                )
+
+
+class UploadAssetTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(upload_assets.clear)
+
+    def test_assets_are_read_once(self):
+        path = os.path.join(os.path.dirname(__file__), os.pardir, "gallery", "photos", "coffee-time.jpg")
+        asset = upload_assets.get(path)
+        with open(path, "rb") as file:
+            content = file.read()
+
+        with mock.patch("builtins.open") as open_mock:
+            self.assertIs(upload_assets.get(os.path.abspath(path)), asset)
+        open_mock.assert_not_called()
+        self.assertEqual((asset.name, asset.size, asset.content_type), ("coffee-time.jpg", len(content), "image/jpeg"))
+        self.assertIs(asset.upload()[1], asset.data)
+        with self.assertRaises(FileNotFoundError):
+            upload_assets.get(os.path.join(os.path.dirname(path), "missing.jpg"))
+
+    def test_upload(self):
+        server = FakeVionServer(port=0).start()
+        self.addCleanup(server.stop)
+        with tempfile.NamedTemporaryFile(suffix=".png") as file:
+            file.write(b"\x89PNG\r\n\x1a\n")
+            file.flush()
+            asset = upload_assets.get(file.name)
+        scenario = BaseScenario(server.url)
+        tokens, _ = scenario.call(
+            EndPoint(HTTPMethods.POST, "/auths/token/"), {"username": "partner1@offline.test", "password": "offline"}
+        )
+        scenario.headers["Authorization"] = f"Bearer {tokens['access']}"
+
+        for _ in range(2):
+            response, status_code = scenario.call(
+                EndPoint(HTTPMethods.POST, "/filecenter/photo/"), {"title": "Photo"}, files={"file": asset.upload()}
+            )
+            self.assertEqual((status_code, response["title"]), (201, "Photo"))
+            self.assertTrue(response["file"].endswith(f"/{asset.name}"))
+            scenario.assert_uploaded(asset, response["file"])
+        http_session_pool.close()
+
+        response, _ = asyncio.run(self._async_upload(scenario, asset))
+        scenario.assert_uploaded(asset, response["file"])
+        http_session_pool.close()
+
+    async def _async_upload(self, scenario, asset):
+        try:
+            return await scenario.acall(EndPoint(HTTPMethods.POST, "/filecenter/photo/"), files={"file": asset.upload()})
+        finally:
+            await async_http_client.aclose()
+
+    def test_multipart_body_sends_the_mapped_file(self):
+        path = os.path.join(os.path.dirname(__file__), os.pardir, "gallery", "photos", "coffee-time.jpg")
+        asset = upload_assets.get(path)
+        body = MultipartBody({"title": "Photo", "tags": ["a", "b"], "empty": None}, {"file": asset.upload(), "none": None})
+
+        chunks = list(body)
+        self.assertEqual(len(body), sum(chunk.nbytes for chunk in chunks))
+        self.assertTrue(all(isinstance(chunk.obj, mmap.mmap) for chunk in chunks if chunk.nbytes > 1000))
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {body.headers['Content-Type']}\r\n\r\n".encode() + b"".join(chunks)
+        )
+        parts = [(part.get_param("name", header="content-disposition"), part.get_filename()) for part in message.iter_parts()]
+        self.assertEqual(parts, [("title", None), ("tags", None), ("tags", None), ("file", "coffee-time.jpg")])
+        self.assertEqual(hashlib.md5(message.get_payload()[-1].get_payload(decode=True)).hexdigest(), asset.md5)
+
+
+class FrameworkBenchmarkTests(TransactionTestCase):
+    def test_run_and_compare(self):
+        results = run_benchmarks(number=5, repeat=1, scenarios=4, engines=["sequential", "thread"], workers=[2])
+
+        metrics = flatten(json.loads(json.dumps(results))["results"])
+        for metric in ("call.overhead_us", "log.per_log_us", "scenario.per_scenario_ms", "discovery.parsed_ms",
+                       "rendering.render_ms", "engines.sequential/1.seconds", "engines.thread/2.scenarios_per_second"):
+            self.assertIn(metric, metrics)
+        self.assertEqual((metrics["engines.thread/2.failed"], metrics["rendering.queries"]), (0, 3))
+        self.assertEqual(results["meta"]["options"]["engines"], ["sequential", "thread"])
+
+        baseline = {"results": {"call": {"overhead_us": metrics["call.overhead_us"] / 2}, "removed": {"metric": 1}}}
+        [(metric, before, after, change)] = compare(results, baseline)
+        self.assertEqual(metric, "call.overhead_us")
+        self.assertAlmostEqual(change, 1.0)
+
+
+class ProcessScenarioRunnerTests(StubServerMixin, TransactionTestCase):
+    def test_runs_scenarios_in_worker_processes(self):
+        session = Session.objects.create(server="Test Server")
+
+        executed = ProcessScenarioRunner(self.base_url, session, processes=2, threads=2).run(
+            [LoggingPingScenario, PingSyncScenario] * 3
+        )
+        background_writer.drain()
+
+        self.assertEqual(executed, {LoggingPingScenario, PingSyncScenario})
+        session.refresh_from_db()
+        self.assertEqual((session.completed_scenarios, session.failed_scenarios), (6, 3))
+        statuses = list(session.scenarios.values_list("scenario_name", "status").distinct().order_by("scenario_name"))
+        self.assertEqual(statuses, [("LoggingPingScenario", "passed"), ("PingSyncScenario", "failed")])
+        scenario = session.scenarios.filter(scenario_name="LoggingPingScenario").first()
+        self.assertEqual(list(scenario.logs.values_list("text", flat=True)), ["(Ping) Got /ping/"])
+        self.assertLess(scenario.start_time, scenario.end_time)
+        self.assertEqual(scenario.requests.get().step, "Ping")
+        self.assertEqual(RequestRecord.objects.filter(server="Test Server").count(), 6)
+        # The histograms recorded in the workers are merged into the session
+        session.finalize()
+        self.assertEqual(session.latencies["GET /ping/"]["count"], 6)
+
+
+@override_settings(WORK_QUEUE_POLL_INTERVAL=0.01)
+class WorkQueueTests(StubServerMixin, TransactionTestCase):
+    def queue_session(self, scenarios):
+        with mock.patch.object(ScenarioService, "find_scenarios", return_value=scenarios):
+            return ScenarioService.execute_scenarios(self.base_url, "Local", engine="queue")
+
+    def test_workers_share_a_session(self):
+        session = self.queue_session([LoggingPingScenario, PingSyncScenario] * 4)
+        self.assertEqual(session.work_items.count(), 8)
+        self.assertIsNone(session.end_time)
+
+        workers = [DistributedWorker(name=f"worker-{number}", threads=2) for number in range(2)]
+        with override_settings(VION_LOCAL_URL=self.base_url), \
+                mock.patch.dict(TestAllScenariosService.ENVIRONMENT_URLS, {"Local": self.base_url}):
+            threads = [Thread(target=worker.run, kwargs={"exit_when_idle": True}) for worker in workers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        session.refresh_from_db()
+        self.assertEqual(session.state, Session.State.FINISHED)
+        self.assertEqual((session.completed_scenarios, session.failed_scenarios), (8, 4))
+        self.assertEqual(session.executed_apps, "scenario_tester")
+        self.assertFalse(session.work_items.exclude(state=WorkItem.State.DONE).exists())
+        self.assertEqual(set(session.work_items.values_list("worker", flat=True)), {"worker-0", "worker-1"})
+        self.assertEqual(Log.objects.filter(scenario__session=session).count(), 8)
+
+    def test_expired_lease_is_claimed_again(self):
+        session = self.queue_session([PingSyncScenario])
+
+        item = WorkItem.objects.claim("dead-worker", lease_seconds=60)
+        self.assertEqual(item.worker, "dead-worker")
+        self.assertIsNone(WorkItem.objects.claim("other-worker", lease_seconds=60))
+
+        WorkItem.objects.filter(pk=item.pk).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        item = WorkItem.objects.claim("other-worker", lease_seconds=60)
+        self.assertEqual((item.worker, item.attempts), ("other-worker", 2))
+        self.assertEqual(WorkItem.objects.heartbeat("other-worker", lease_seconds=60), 1)
+
+    def test_claims_respect_resources(self):
+        self.queue_session([PartnerListScenario, BackOfficeListScenario, FreeScenario])
+
+        first = WorkItem.objects.claim("worker-0", lease_seconds=60)
+        second = WorkItem.objects.claim("worker-1", lease_seconds=60)
+
+        self.assertEqual(first.scenario_path, "scenario_tester.tests.PartnerListScenario")
+        self.assertEqual(second.scenario_path, "scenario_tester.tests.FreeScenario")
+        self.assertIsNone(WorkItem.objects.claim("worker-2", lease_seconds=60))
+
+    def test_claims_look_past_a_page_of_conflicting_items(self):
+        self.queue_session([PartnerListScenario] + [BackOfficeListScenario] * 5 + [FreeScenario])
+
+        with mock.patch("scenario_tester.models.CLAIM_PAGE_SIZE", 2):
+            first = WorkItem.objects.claim("worker-0", lease_seconds=60)
+            second = WorkItem.objects.claim("worker-1", lease_seconds=60)
+
+        self.assertEqual(first.scenario_path, "scenario_tester.tests.PartnerListScenario")
+        self.assertEqual(second.scenario_path, "scenario_tester.tests.FreeScenario")
+
+
+class RunScenariosCommandTests(StubServerMixin, TransactionTestCase):
+    def run_command(self, scenarios, *args):
+        stdout = StringIO()
+        with mock.patch.object(ScenarioService, "find_scenarios", return_value=scenarios), \
+                mock.patch.dict(TestAllScenariosService.ENVIRONMENT_URLS, {"Local": self.base_url}):
+            call_command("run_scenarios", "--environment", "Local", "--poll-interval", "0.01", *args, stdout=stdout)
+        return stdout.getvalue()
+
+    def test_passing_run_writes_reports(self):
+        with tempfile.TemporaryDirectory() as directory:
+            junit_path, json_lines_path = f"{directory}/report.xml", f"{directory}/report.jsonl"
+            output = self.run_command(
+                [LoggingPingScenario] * 3, "--engine", "thread", "--workers", "2",
+                "--junit-xml", junit_path, "--json-lines", json_lines_path,
+            )
+
+            self.assertIn("[3/3] PASSED LoggingPingScenario", output)
+            self.assertIn("3 passed, 0 failed", output)
+            suite = ElementTree.parse(junit_path).getroot().find("testsuite")
+            self.assertEqual((suite.get("tests"), suite.get("failures"), suite.get("errors")), ("3", "0", "0"))
+            self.assertEqual(
+                suite.find("testcase").get("classname"), "scenario_tester.tests.LoggingPingScenario"
+            )
+            with open(json_lines_path) as json_lines:
+                records = [json.loads(line) for line in json_lines]
+        self.assertEqual([record["status"] for record in records], ["passed"] * 3)
+        self.assertEqual(records[0]["logs"][0]["text"], "(Ping) Got /ping/")
+
+    def test_failing_run_exits_non_zero(self):
+        with self.assertRaises(CommandError) as error:
+            self.run_command([LoggingPingScenario, PingSyncScenario], "--engine", "sequential")
+        self.assertEqual(error.exception.returncode, 1)
+        self.assertEqual(str(error.exception), "1 of 2 scenarios failed")
+
+    @override_settings(LOAD_REPORT_INTERVAL=0.2)
+    def test_load_test_exits_on_error_rate(self):
+        args = ["--engine", "load", "--rate", "20", "--duration", "0.3", "--mix", "PingSyncScenario=1"]
+        with self.assertRaises(CommandError) as error:
+            self.run_command([LoggingPingScenario, PingSyncScenario], *args)
+        self.assertTrue(str(error.exception).endswith("of the scenarios failed"))
+        self.assertEqual(error.exception.returncode, 1)
+
+        output = self.run_command([LoggingPingScenario, PingSyncScenario], *args, "--max-error-rate", "1")
+        self.assertIn(" total ", output)
+
+    def test_scenario_requires_app(self):
+        with self.assertRaises(CommandError):
+            self.run_command([], "--scenario", "CreateGallery")
+
+    def test_changed_paths(self):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            offline_url = f"http://127.0.0.1:{probe.getsockname()[1]}"
+        token_broker.invalidate()
+        self.addCleanup(token_broker.invalidate)
+        self.addCleanup(offline_server.stop)
+        scenarios = ScenarioService.find_scenarios("to_do_list")
+        for scenario_class in scenarios:
+            EndpointUsage.objects.record(scenario_class, {("GET", "/todo/series/partner/")}, complete=True)
+
+        def run(*changed_paths):
+            stdout = StringIO()
+            call_command(
+                "run_scenarios", "-e", "Offline", "--app", "to_do_list", "--engine", "sequential",
+                "--poll-interval", "0.01", "--changed-paths", *changed_paths, stdout=stdout,
+            )
+            return stdout.getvalue()
+
+        with override_settings(VION_OFFLINE_URL=offline_url), \
+                mock.patch.dict(TestAllScenariosService.ENVIRONMENT_URLS, {"Offline": offline_url}):
+            self.assertIn("No scenario is impacted", run("/gallery/*"))
+            # The impact is read from the latest recorded runs, not from a cached selection
+            impacted = next(scenario_class for scenario_class in scenarios if scenario_class.__name__ == "ToDoListTestScenario")
+            EndpointUsage.objects.record(impacted, {("POST", "/gallery/{slug}/")})
+            output = run("/gallery/*", "DELETE /todo/*")
+
+        self.assertIn("running 1 scenarios", output)
+        self.assertIn("PASSED ToDoListTestScenario", output)
+
+
+class ScenarioIndexTests(SimpleTestCase):
+    def test_scan_module(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as module:
+            module.write(
+                "class Base(BaseScenario):\n"
+                "    abstract = True\n"
+                "class Concrete(Base):\n"
+                '    """\n    Does things\n    """\n'
+                "class Helper:\n"
+                "    pass\n"
+            )
+        self.addCleanup(os.remove, module.name)
+
+        classes = {cls["name"]: cls for cls in scan_module(module.name)}
+
+        self.assertEqual(classes["Base"]["abstract"], True)
+        self.assertEqual(classes["Concrete"], {"name": "Concrete", "bases": ["Base"], "abstract": None, "doc": "Does things"})
+        self.assertEqual(ScenarioIndex._concrete_classes(list(classes.values()), {}), ["Concrete"])
+
+    def test_index_matches_imported_scenarios(self):
+        with tempfile.TemporaryDirectory() as directory, \
+                override_settings(SCENARIO_INDEX_CACHE=os.path.join(directory, "index.json")):
+            index = ScenarioIndex()
+            entries = index.scenarios()
+            descriptions = index.descriptions()
+
+            # A new process reads the cache instead of parsing the modules again
+            with mock.patch("scenario_tester.index.scan_module") as scan:
+                self.assertEqual(ScenarioIndex().scenarios(), entries)
+            scan.assert_not_called()
+
+        scenarios = ScenarioService.find_scenarios()
+        self.assertEqual([name for _, _, name in entries], [cls.__name__ for cls in scenarios])
+        self.assertEqual(
+            descriptions, {cls.__name__: cls.__doc__.strip() for cls in scenarios if cls.__doc__}
+        )
+        self.assertIn(("gallery", "gallery.scenarios", "CreateGallery"), index.scenarios("gallery"))
+
+
+class ScenarioSelectionTests(SimpleTestCase):
+    def select(self, expression, app_name=None):
+        return {cls.__name__ for cls in ScenarioService.find_scenarios(app_name, selection=expression)}
+
+    def test_tags_are_added_to_the_base_class_tags(self):
+        [scenario_class] = ScenarioService.find_scenarios("to_do_list", "ToDoListMyTeamTestScenario")
+        self.assertEqual(
+            scenario_class.tags,
+            {"todo", "destructive", "partner1", "partner2"},
+        )
+
+    def test_select_by_expression(self):
+        self.assertEqual(self.select("smoke"), {"ContactsTestScenario", "ToDoListTestScenario"})
+        self.assertEqual(
+            self.select("todo and partner2"), {"ToDoListMyTeamTestScenario", "ToDoListMeAndMyTeamTestScenario"}
+        )
+        self.assertEqual(
+            self.select("name:CreateGallery OR (app:events and pdf)"),
+            {"CreateGallery", "SimpleEventRegistrationScenario"},
+        )
+        self.assertEqual(self.select("not todo", "to_do_list"), set())
+        partner_only = self.select("partner1 and not (backoffice or partner2)", "to_do_list")
+        self.assertIn("ToDoListDailyTestScenario", partner_only)
+        self.assertNotIn("ToDoListMyTeamTestScenario", partner_only)
+
+    def test_invalid_expressions(self):
+        for expression in ("", "smoke and", "(smoke", "smoke)", "not", "smoke partner1", "resource:x"):
+            with self.subTest(expression=expression), self.assertRaises(SelectionError):
+                parse_selection(expression)
+
+
+class _EndpointScenario(BaseScenario):
+    abstract = True
+    item_endpoint = EndPoint(HTTPMethods.GET, "/items/{item_id}/")
+    calls_ping = True
+
+    def run(self):
+        self.call(self.format_endpoint(self.item_endpoint, item_id=3))
+        if self.calls_ping:
+            self.call(EndPoint(HTTPMethods.GET, "/ping/"))
+
+
+@override_settings(BACKGROUND_WRITER=False)
+class EndpointImpactTests(StubServerMixin, TestCase):
+    def test_format_endpoint_keeps_the_template(self):
+        endpoint = BaseScenario("http://testserver").format_endpoint(_EndpointScenario.item_endpoint, item_id=3)
+        self.assertEqual((endpoint.url, endpoint.template), ("/items/3/", "/items/{item_id}/"))
+
+    def test_path_matches(self):
+        self.assertTrue(path_matches("/items/{item_id}/", "/items/3/"))
+        self.assertTrue(path_matches("/items/{item_id}/", "/items/<int:pk>/"))
+        self.assertTrue(path_matches("/items/{item_id}/", "/items/*"))
+        self.assertFalse(path_matches("/items/{item_id}/", "/items/"))
+        self.assertFalse(path_matches("/items/{item_id}/", "/orders/3/"))
+        self.assertEqual(parse_changed_path("put /items/3/"), ("PUT", "/items/3/"))
+
+    def test_runs_record_the_endpoints_they_call(self):
+        with mock.patch("scenario_tester.scenarios.scenario_registry", ScenarioRegistry()):
+            scenario_class = type("ItemScenario", (_EndpointScenario,), {"__module__": "demo.scenarios"})
+        session = Session.objects.create(server="Local")
+
+        scenario_class(self.base_url).execute(session)
+        self.assertEqual(
+            set(EndpointUsage.objects.values_list("app_name", "scenario_name", "method", "template")),
+            {("demo", "ItemScenario", "GET", "/items/{item_id}/"), ("demo", "ItemScenario", "GET", "/ping/")},
+        )
+
+        # A passed run replaces the endpoints of the scenario
+        scenario_class.calls_ping = False
+        scenario_class(self.base_url).execute(session)
+        self.assertEqual(list(EndpointUsage.objects.values_list("template", flat=True)), ["/items/{item_id}/"])
+
+    def test_logins_from_the_token_cache_are_recorded(self):
+        class LoginScenario(_EndpointScenario):
+            calls_ping = False
+
+            def run(self):
+                self.login("partner1", EndPoint(HTTPMethods.POST, "/auths/token/"))
+                super().run()
+
+        with mock.patch("scenario_tester.scenarios.scenario_registry", ScenarioRegistry()):
+            first, second = (
+                type(name, (LoginScenario,), {"__module__": "demo.scenarios"}) for name in ("First", "Second")
+            )
+        session = Session.objects.create(server="Local")
+        token_broker.invalidate()
+        self.addCleanup(token_broker.invalidate)
+        logins = self.server.logins
+
+        with override_settings(VION_LOCAL_URL=self.base_url):
+            for scenario_class in (first, second, first):
+                scenario_class(self.base_url).execute(session)
+
+        # Only the first run reached the login endpoint, every scenario keeps depending on it
+        self.assertEqual(self.server.logins - logins, 1)
+        self.assertEqual(
+            set(EndpointUsage.objects.filter(method="POST").values_list("scenario_name", "template")),
+            {("First", "/auths/token/"), ("Second", "/auths/token/")},
+        )
+
+    def test_impacted_scenarios(self):
+        [gallery] = ScenarioService.find_scenarios("gallery", "CreateGallery")
+        [sales] = ScenarioService.find_scenarios("sales", "SalesTestScenario")
+        [contacts] = ScenarioService.find_scenarios("contacts", "ContactsTestScenario")
+        EndpointUsage.objects.record(gallery, [("POST", "/gallery/"), ("DELETE", "/gallery/{gallery_slug}/")])
+        EndpointUsage.objects.record(sales, [("PUT", "/wishes_and_goals/finalize/{slug}/")])
+
+        self.assertEqual(
+            impacted_scenarios([gallery, sales, contacts], ["/wishes_and_goals/finalize/<slug:slug>/"]),
+            [sales, contacts],
+        )
+        self.assertEqual(impacted_scenarios([gallery, sales], ["GET /gallery/*"]), [])
+        self.assertEqual(impacted_scenarios([gallery, sales], ["DELETE /gallery/*"]), [gallery])
+
+
+class ScenarioRegistryTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = ScenarioRegistry()
+        patcher = mock.patch("scenario_tester.scenarios.scenario_registry", self.registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def define(self, name, base=BaseScenario, module="demo.scenarios", **attributes):
+        return type(name, (base,), {"__module__": module, **attributes})
+
+    def test_registers_concrete_scenarios_of_scenarios_modules(self):
+        base = self.define("DemoBase", abstract=True, resources=frozenset({"demo list"}))
+        first = self.define("First", base, tags=frozenset({"smoke"}))
+        second = self.define("Second", base, module="demo.scenarios_extra")
+        self.define("Helper", module="demo.helpers")
+
+        self.assertFalse(first.abstract)
+        self.assertEqual(self.registry.for_app("demo"), [first, second])
+        self.assertEqual(self.registry.get("demo", "Second"), second)
+        self.assertIsNone(self.registry.get("demo", "DemoBase"))
+        self.assertIsNone(self.registry.get("demo", "Helper"))
+        self.assertEqual(self.registry.with_tag("smoke"), {first})
+        self.assertEqual(self.registry.using_resource("demo list"), {first, second})
+
+    def test_first_definition_of_a_name_wins(self):
+        first = self.define("Same")
+        with self.assertLogs("scenario_tester.registry", "WARNING"):
+            self.define("Same", module="demo.scenarios1")
+        self.assertEqual(self.registry.for_app("demo"), [first])
+
+        # The same module imported again replaces its classes
+        reloaded = self.define("Same")
+        self.assertEqual(self.registry.for_app("demo"), [reloaded])
+
+    def test_find_scenarios_uses_the_registry(self):
+        scenarios = ScenarioService.find_scenarios("to_do_list")
+
+        self.assertEqual(scenarios, scenario_registry.for_app("to_do_list"))
+        self.assertTrue(all(cls.__module__ == "to_do_list.scenarios" for cls in scenarios))
+        self.assertNotIn("PartnerBaseScenario", [cls.__name__ for cls in scenarios])
+        self.assertEqual(
+            ScenarioService.find_scenarios("events", "SimpleEventRegistrationScenario"),
+            [scenario_registry.get("events", "SimpleEventRegistrationScenario")],
+        )
+
+
+class TokenBrokerTests(StubServerMixin, SimpleTestCase):
+    login_endpoint = EndPoint(HTTPMethods.POST, "/auths/token/")
+
+    def setUp(self):
+        token_broker.invalidate()
+        self.server.logins = 0
+        self.server.token_ttl = 3600
+        settings_override = override_settings(VION_LOCAL_URL=self.base_url)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_login_is_shared_between_scenarios(self):
+        first, second = BaseScenario(self.base_url), BaseScenario(self.base_url)
+
+        _, status_code = first.login("partner1", self.login_endpoint)
+        self.assertEqual(status_code, 200)
+        first.logout()
+        self.assertNotIn("Authorization", first.headers)
+        first.login("partner1", self.login_endpoint)
+        _, status_code = second.login("partner1", self.login_endpoint)
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual(self.server.logins, 1)
+        self.assertEqual(first.headers["Authorization"], second.headers["Authorization"])
+
+    def test_concurrent_async_logins_fetch_once(self):
+        fetches = []
+
+        async def fetch():
+            fetches.append(1)
+            await asyncio.sleep(0.01)
+            return {"access": "header.payload.signature"}, 200
+
+        async def login_all():
+            return await asyncio.gather(*(token_broker.alogin("local", "partner1", fetch) for _ in range(10)))
+
+        results = asyncio.run(login_all())
+
+        self.assertEqual(len(fetches), 1)
+        self.assertEqual({response["access"] for response, _ in results}, {"header.payload.signature"})
+        self.assertEqual({status_code for _, status_code in results}, {200})
+
+    def test_roles_are_cached_separately(self):
+        scenario = BaseScenario(self.base_url)
+        scenario.login("partner1", self.login_endpoint)
+        scenario.login("backoffice", self.login_endpoint)
+        self.assertEqual(self.server.logins, 2)
+
+    def test_token_close_to_expiry_is_refreshed(self):
+        self.server.token_ttl = 10  # Below AUTH_TOKEN_REFRESH_MARGIN
+        scenario = BaseScenario(self.base_url)
+        response, _ = scenario.login("partner1", self.login_endpoint)
+        self.assertAlmostEqual(get_token_expiry(response["access"]), time.time() + 10, delta=5)
+
+        scenario.login("partner1", self.login_endpoint)
+        self.assertEqual(self.server.logins, 2)
+
+
+class AssertTests(SimpleTestCase):
+    def test_passing_check_does_not_render_message(self):
+        def message():
+            raise RuntimeError("Message rendered for a passing check")
+
+        Assert.assertEqual(1, 1, message)
+        Assert.assertIn("a", "abc", message)
+
+    def test_standard_message_contains_call_context(self):
+        with self.assertRaises(AssertionError) as ctx:
+            Assert.assertEqual(200, 400)
+        line = sys._getframe().f_lineno - 1
+        self.assertEqual(
+            str(ctx.exception),
+            f"{__file__}:{line} - AssertTests.test_standard_message_contains_call_context - Expected 400, but got 200.",
+        )
+
+    def test_template_message_rendered_on_failure(self):
+        with self.assertRaises(AssertionError) as ctx:
+            Assert.assertEqual(200, 400, "Failed test for Case {}. Got {}", 3, 200)
+        self.assertEqual(str(ctx.exception), "Failed test for Case 3. Got 200")
+
+    def test_callable_and_object_messages(self):
+        with self.assertRaises(AssertionError) as ctx:
+            Assert.assertNotNull(None, lambda: "callable message")
+        self.assertEqual(str(ctx.exception), "callable message")
+
+        with self.assertRaises(AssertionError) as ctx:
+            Assert.assertEqual(500, 200, {"detail": "error"})
+        self.assertEqual(str(ctx.exception), "{'detail': 'error'}")
+
+
+class LoggingScenario(BaseScenario):
+    def run(self):
+        self.set_step("First")
+        self.info("one")
+        self.debug("two")
+        self.set_step("Second")
+        self.warning("three")
+        Assert.assertEqual(1, 2, "four")
+
+
+class LogBufferTests(TransactionTestCase):
+    def test_logs_are_written_in_order(self):
+        session = Session.objects.create(server="Test Server")
+        scenario = LoggingScenario("http://127.0.0.1")
+        scenario.execute(session)
+        background_writer.drain()
+
+        logs = list(scenario.scenario.logs.order_by("id").values_list("level", "text", "created_at"))
+        self.assertEqual(
+            [(level, text) for level, text, _ in logs],
+            [("info", "(First) one"), ("debug", "(First) two"), ("warning", "(Second) three"), ("error", "(Second) Failed: four")],
+        )
+        created_at = [created_at for _, _, created_at in logs]
+        self.assertEqual(created_at, sorted(created_at))
+        self.assertLessEqual(created_at[-1], scenario.scenario.end_time)
+
+    @override_settings(LOG_BUFFER_SIZE=3, LOG_FLUSH_INTERVAL=60)
+    def test_buffer_flushes_at_size_threshold(self):
+        session = Session.objects.create(server="Test Server")
+        scenario = BaseScenario("http://127.0.0.1")
+        scenario.scenario = session.scenarios.create()
+
+        for index in range(5):
+            scenario.info(str(index))
+        background_writer.drain()
+        self.assertEqual(scenario.scenario.logs.count(), 3)
+
+        scenario._logs.flush()
+        background_writer.drain()
+        self.assertEqual(scenario.scenario.logs.count(), 5)
+
+    @override_settings(LOG_BUFFER_SIZE=50, LOG_FLUSH_INTERVAL=0.2)
+    def test_waiting_logs_are_flushed_in_the_background(self):
+        background_writer.drain()  # Wakes the writer up with the new interval
+        session = Session.objects.create(server="Test Server")
+        scenario = BaseScenario("http://127.0.0.1")
+        scenario.scenario = session.scenarios.create()
+
+        scenario.info("Calling a slow endpoint")
+        # No further log, as if the scenario waited on the call
+        deadline = time.monotonic() + 5
+        while not scenario.scenario.logs.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(list(scenario.scenario.logs.values_list("text", flat=True)), ["Calling a slow endpoint"])
@@ -0,0 +1,190 @@
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class ConnectionStats:
+    """
+    Thread-safe counters describing how a pooled session used its connections.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    @property
+    def reused_connections(self) -> int:
+        return max(self.requests - self.new_connections, 0)
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+        }
+
+
+class ConnectionTimings:
+    """
+    Connect and TLS handshake durations of the connections opened by the current thread.
+
+    `reset()` before a request, `pop()` after it returns (None, None) when the request reused a pooled connection.
+    The connect duration includes the name resolution.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def reset(self):
+        self._local.timings = (None, None)
+
+    def record(self, connect_seconds: float, tls_seconds: float = None):
+        self._local.timings = (connect_seconds, tls_seconds)
+
+    def pop(self) -> tuple:
+        timings = getattr(self._local, "timings", (None, None))
+        self._local.timings = (None, None)
+        return timings
+
+
+connection_timings = ConnectionTimings()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose connections report every (re)connect to a `ConnectionStats`.
+
+    urllib3 opens sockets lazily in `connect()`, so counting there also covers
+    connections that were dropped by the server and re-established. Every connect is also
+    timed into `connection_timings`, the socket creation (`_new_conn`) separately from the TLS handshake.
+    """
+
+    def __init__(self, stats: ConnectionStats, **kwargs):
+        self.stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": self._counting_pool(HTTPConnectionPool, HTTPConnection),
+            "https": self._counting_pool(HTTPSConnectionPool, HTTPSConnection),
+        }
+
+    def _counting_pool(self, pool_class, connection_class):
+        stats = self.stats
+        is_tls = issubclass(connection_class, HTTPSConnection)
+
+        class CountingConnection(connection_class):
+            def _new_conn(self):
+                started = time.perf_counter()
+                sock = super()._new_conn()
+                self._socket_seconds = time.perf_counter() - started
+                return sock
+
+            def connect(self):
+                started = time.perf_counter()
+                super().connect()
+                elapsed = time.perf_counter() - started
+                stats.record_new_connection()
+                socket_seconds = getattr(self, "_socket_seconds", elapsed)
+                connection_timings.record(socket_seconds, elapsed - socket_seconds if is_tls else None)
+
+        return type(pool_class.__name__, (pool_class,), {"ConnectionCls": CountingConnection})
+
+
+class HTTPSessionPool:
+    """
+    Hands out one keep-alive `requests.Session` per worker thread and base URL.
+
+    Sessions are never shared between threads (requests.Session is not thread-safe),
+    but every call a thread makes against the same environment reuses the pooled
+    connections of its session instead of opening a new TCP/TLS connection.
+
+    Configured through settings:
+        HTTP_POOL_CONNECTIONS: Number of per-host connection pools cached per session.
+        HTTP_POOL_MAXSIZE: Connections kept alive per host.
+        HTTP_POOL_BLOCK: Wait for a free connection instead of exceeding HTTP_POOL_MAXSIZE.
+        HTTP_KEEP_ALIVE: Set to False to close the connection after every request.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._live_stats = set()  # `ConnectionStats` of the open sessions
+        self._closed_totals = {"requests": 0, "new_connections": 0, "reused_connections": 0}
+
+    def get_session(self, base_url: str) -> requests.Session:
+        sessions = self._thread_sessions()
+        session = sessions.get(base_url)
+        if session is None:
+            session = self._create_session()
+            sessions[base_url] = session
+        return session
+
+    def close(self):
+        """
+        Closes every session owned by the calling thread.
+        Worker threads should call this before they exit.
+        """
+        sessions = self._thread_sessions()
+        for session in sessions.values():
+            session.close()
+            # Fold the counters of the closed session into the totals, the pool keeps no reference to it
+            with self._lock:
+                self._live_stats.discard(session.stats)
+                for key, value in session.stats.as_dict().items():
+                    self._closed_totals[key] += value
+        sessions.clear()
+
+    def stats(self) -> dict:
+        """
+        Aggregated connection counters over all sessions created by this pool.
+        """
+        with self._lock:
+            live_stats = list(self._live_stats)
+            totals = dict(self._closed_totals)
+        for stats in live_stats:
+            for key, value in stats.as_dict().items():
+                totals[key] += value
+        return totals
+
+    def _thread_sessions(self) -> dict:
+        if not hasattr(self._local, "sessions"):
+            self._local.sessions = {}
+        return self._local.sessions
+
+    def _create_session(self) -> requests.Session:
+        stats = ConnectionStats()
+        with self._lock:
+            self._live_stats.add(stats)
+
+        session = requests.Session()
+        session.stats = stats
+        adapter = PooledHTTPAdapter(
+            stats,
+            pool_connections=settings.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=settings.HTTP_POOL_MAXSIZE,
+            pool_block=settings.HTTP_POOL_BLOCK,
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        if not settings.HTTP_KEEP_ALIVE:
+            session.headers["Connection"] = "close"
+        return session
+
+
+http_session_pool = HTTPSessionPool()
@@ -3,5 +3,8 @@ from scenario_tester.views import *
 
 urlpatterns = [
     path('sessions/<int:pk>/', SessionDetailView.as_view(), name='session-detail'),
+    path('sessions/<int:pk>/progress/', SessionProgressView.as_view(), name='session-progress'),
+    path('sessions/<int:pk>/cancel/', SessionCancelView.as_view(), name='session-cancel'),
+    path('request-latencies/', RequestLatencyView.as_view(), name='request-latencies'),
     path('test-scenarios/', TestAllScenariosView.as_view(), name='test-all-scenarios'),
 ]
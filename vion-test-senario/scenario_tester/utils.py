@@ -1,6 +1,4 @@
 from django.conf import settings
-from drf_yasg import openapi
-from drf_yasg.openapi import IN_QUERY, TYPE_STRING
 
 def get_environment(base_url: str) -> str:
     if base_url == settings.VION_DEVELOP_URL:
@@ -9,14 +7,19 @@ def get_environment(base_url: str) -> str:
         return "staging"
     elif base_url == settings.VION_LOCAL_URL:
         return "local"
+    elif base_url == settings.VION_OFFLINE_URL:
+        return "offline"
     else:
         raise ValueError("Unknown base_url provided.")
 
 
-def create_swagger_param(name, description, required, param_type=TYPE_STRING, in_=IN_QUERY, enum=None):
+def create_swagger_param(name, description, required, param_type="string", in_="query", enum=None):
     """
     Utility function to create a Swagger parameter.
+    drf_yasg is imported here, scenarios use this module and the command line runners do not load Swagger.
     """
+    from drf_yasg import openapi
+
     return openapi.Parameter(
         name=name,
         in_=in_,
@@ -1,10 +1,17 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework.views import APIView
+from rest_framework.response import Response
 from rest_framework import generics
 
 from .services import ScenarioService, test_all_scenarios_service
 from .utils import create_swagger_param
 from .models import Session
-from .serializers import SessionSerializer
+from .serializers import SessionSerializer, SessionProgressSerializer
+from .exceptions import InvalidLatencyWindowException, SessionNotCancellableException
 
 from test_api_vion.swagger import swagger_http
 
@@ -32,24 +39,102 @@ scenario_name_manual_param = create_swagger_param(
     required=False,
 )
 
+select_manual_param = create_swagger_param(
+    name="select",
+    description=(
+        "Select scenarios by tags, combined with 'and', 'or', 'not' and parentheses "
+        "(e.g., 'smoke and partner1 and not upload'). 'app:<app>' and 'name:<scenario>' are also accepted."
+    ),
+    required=False,
+)
+
+engine_manual_param = create_swagger_param(
+    name="engine",
+    description=(
+        "Execution engine. Leave blank to run on threads when there are enough scenarios, "
+        "otherwise one by one."
+    ),
+    required=False,
+    enum=list(ScenarioService.ENGINES),
+)
+
+server_manual_param = create_swagger_param(
+    name="server",
+    description="Only include the calls made against this environment. Leave blank for every environment.",
+    required=False,
+    enum=list(test_all_scenarios_service.get_environmental_keys()),
+)
+
+days_manual_param = create_swagger_param(
+    name="days",
+    description="Only include the calls of the last days, 'REQUEST_LATENCY_DAYS' by default.",
+    required=False,
+    param_type="integer",
+)
+
 
 class SessionDetailView(generics.RetrieveAPIView):
     """
     Retrieve details of a specific session
     """
-    queryset = Session.objects.all()
+    queryset = Session.objects.with_scenario_details()
     serializer_class = SessionSerializer
 
 
+class SessionProgressView(generics.RetrieveAPIView):
+    """
+    Retrieve the state and progress counters of a session, cheap enough to poll while it runs
+    """
+    queryset = Session.objects.all()
+    serializer_class = SessionProgressSerializer
+
+
+@swagger_http("post", "Cancels a queued or running session, scenarios that already started are finished")
+class SessionCancelView(APIView):
+    def post(self, request, pk):
+        session = get_object_or_404(Session, pk=pk)
+        if not session.cancel():
+            raise SessionNotCancellableException()
+        return Response(SessionProgressSerializer(session).data)
+
+
 @swagger_http(
     "get",
-    "Executes all scenarios, filters by app name, or filters by a specific scenario name within an app",
-    manual_parameters=[base_url_manual_param, app_name_manual_param, scenario_name_manual_param],
+    "Queues a run of all scenarios, filtered by app name or by a specific scenario name within an app, "
+    "and by a selection expression. "
+    "Returns the queued session, poll its progress until it is finished",
+    manual_parameters=[
+        base_url_manual_param, app_name_manual_param, scenario_name_manual_param, select_manual_param, engine_manual_param
+    ],
 )
 class TestAllScenariosView(APIView):
     def get(self, request):
         app_name = request.query_params.get("app_name", None)
         scenario_name = request.query_params.get("scenario_name", None)
         base_url_key = request.query_params.get("base_url")
+        engine = request.query_params.get("engine", None)
+        selection = request.query_params.get("select", None)
 
-        return test_all_scenarios_service.execute_scenarios(base_url_key, app_name=app_name, scenario_name=scenario_name)
\ No newline at end of file
+        return test_all_scenarios_service.execute_scenarios(
+            base_url_key, app_name=app_name, scenario_name=scenario_name, engine=engine, selection=selection
+        )
+
+@swagger_http(
+    "get",
+    "Returns the p50/p95/p99 total duration (in milliseconds) of the calls to every endpoint template, "
+    "per environment, across sessions. Sessions still running are counted too",
+    manual_parameters=[server_manual_param, days_manual_param],
+)
+class RequestLatencyView(APIView):
+    def get(self, request):
+        try:
+            days = int(request.query_params.get("days") or settings.REQUEST_LATENCY_DAYS)
+        except ValueError:
+            raise InvalidLatencyWindowException()
+        if days < 1:
+            raise InvalidLatencyWindowException()
+        # Merged from the sessions' histograms, the `RequestRecord`s are only read for unfinished sessions
+        sessions = Session.objects.filter(start_time__gte=timezone.now() - timedelta(days=days))
+        if server := request.query_params.get("server"):
+            sessions = sessions.filter(server=server)
+        return Response(sessions.latency_table())
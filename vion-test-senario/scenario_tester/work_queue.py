@@ -0,0 +1,116 @@
+import logging
+import os
+import socket
+from threading import Event, Thread
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .fake_server import offline_server
+from .models import Session, WorkItem
+from .process_engine import import_class
+from .services import ScenarioService, TestAllScenariosService
+from .writers import background_writer
+
+logger = logging.getLogger(__name__)
+
+
+class DistributedWorker:
+    """
+    Runs scenarios of sessions queued with the "queue" engine, pulling them from the `WorkItem` table.
+
+    Any number of workers, on one host or several, can share the database. Items are claimed with a
+    lease that a heartbeat thread keeps extending; items of a worker that died become claimable again
+    once their lease expires. Results are written to the usual `Scenario` and `Log` models, and the worker
+    finishing the last item of a session finalizes it.
+
+    Configured through settings:
+        WORK_QUEUE_THREADS: Scenarios run at the same time by one worker.
+        WORK_QUEUE_LEASE: Seconds an item stays claimed without a heartbeat.
+        WORK_QUEUE_HEARTBEAT: Seconds between two heartbeats.
+        WORK_QUEUE_POLL_INTERVAL: Seconds to wait before looking again when there is nothing to run.
+
+    Args:
+        name (optional): Unique name of the worker, "<host>-<pid>" by default.
+        threads (optional): Overrides `WORK_QUEUE_THREADS`.
+        session_id (optional): Only run the items of this session.
+    """
+
+    def __init__(self, name: str = None, threads: int = None, session_id: int = None):
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.threads = threads or settings.WORK_QUEUE_THREADS
+        self.session_id = session_id
+        self._stop = Event()
+
+    def run(self, exit_when_idle: bool = False):
+        """
+        Blocks until `stop()` is called, or until there is nothing left to claim when `exit_when_idle` is set.
+        """
+        heartbeat = Thread(target=self._heartbeat, name=f"{self.name}-heartbeat", daemon=True)
+        heartbeat.start()
+        threads = [
+            Thread(target=self._work, args=(exit_when_idle,), name=f"{self.name}-{number}")
+            for number in range(self.threads)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self._stop.set()
+        heartbeat.join()
+
+    def stop(self):
+        self._stop.set()
+
+    def _work(self, exit_when_idle):
+        try:
+            while not self._stop.is_set():
+                item = WorkItem.objects.claim(self.name, settings.WORK_QUEUE_LEASE, session_id=self.session_id)
+                if item is None:
+                    if exit_when_idle:
+                        break
+                    self._stop.wait(settings.WORK_QUEUE_POLL_INTERVAL)
+                    continue
+                self._run_item(item)
+        finally:
+            connections.close_all()
+
+    def _heartbeat(self):
+        while not self._stop.wait(settings.WORK_QUEUE_HEARTBEAT):
+            try:
+                WorkItem.objects.heartbeat(self.name, settings.WORK_QUEUE_LEASE)
+            except Exception:
+                logger.exception("Worker %s failed to renew its leases", self.name)
+        connections.close_all()
+
+    def _run_item(self, item: WorkItem):
+        session = item.session
+        base_url = TestAllScenariosService.ENVIRONMENT_URLS.get(session.server)
+        if base_url == settings.VION_OFFLINE_URL:
+            # Workers on other hosts serve the "Offline" environment themselves
+            offline_server.ensure_running()
+        ScenarioService._run_scenario(base_url, import_class(item.scenario_path), session)
+        # The logs are written before the item counts as done, the session may be finalized right after
+        background_writer.drain()
+        completed = WorkItem.objects.filter(pk=item.pk, worker=self.name, state=WorkItem.State.CLAIMED).update(
+            state=WorkItem.State.DONE, lease_expires_at=None
+        )
+        if not completed:
+            logger.warning("Worker %s lost the lease of %s, it was run again by another worker", self.name, item)
+        self._finalize_if_complete(session)
+
+    @staticmethod
+    def _finalize_if_complete(session: Session):
+        remaining = session.work_items.exclude(state=WorkItem.State.DONE)
+        if session.is_cancelled():
+            # Pending items of a cancelled session are never claimed, only wait for the running ones
+            remaining = remaining.filter(state=WorkItem.State.CLAIMED, lease_expires_at__gte=timezone.now())
+        if remaining.exists():
+            return
+        # Only one of the workers finishing at the same time finalizes the session
+        if not Session.objects.filter(pk=session.pk, end_time__isnull=True).update(end_time=timezone.now()):
+            return
+        scenario_paths = session.work_items.filter(state=WorkItem.State.DONE).values_list("scenario_path", flat=True)
+        session.executed_apps = ", ".join(sorted({path.split(".")[0] for path in scenario_paths}))
+        session.finalize()
@@ -0,0 +1,189 @@
+import logging
+import time
+from collections import defaultdict
+from queue import Empty, Queue
+from threading import Event, Lock, Thread
+from weakref import WeakSet
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Log
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWriter:
+    """
+    Persists batches of unsaved model instances with `bulk_create` on a single background thread,
+    so scenario threads never wait on the database write lock.
+
+    Batches are written in the order they were queued. Set `BACKGROUND_WRITER = False`
+    to write synchronously in the calling thread instead.
+
+    The thread also flushes the watched `RecordBuffer`s whose oldest record waited `LOG_FLUSH_INTERVAL`
+    seconds, so a log is written even while its scenario waits on a slow call.
+    """
+
+    def __init__(self):
+        self._queue = Queue()
+        self._thread = None
+        self._lock = Lock()
+        self._buffers = WeakSet()
+        self._buffers_checked_at = time.monotonic()
+
+    def watch(self, buffer: "RecordBuffer"):
+        """
+        Flushes `buffer` once its records are due, until it is garbage collected.
+        """
+        if not settings.BACKGROUND_WRITER:
+            return
+        with self._lock:
+            self._buffers.add(buffer)
+        self._ensure_thread()
+
+    def write(self, instances: list):
+        if not instances:
+            return
+        if not settings.BACKGROUND_WRITER:
+            self._bulk_create(instances)
+            return
+        self._ensure_thread()
+        self._queue.put(instances)
+
+    def drain(self):
+        """
+        Blocks until every batch queued before the call has been written.
+
+        Batches queued afterwards, e.g. by other sessions running at the same time, are not waited for.
+        """
+        if self._thread is None or not self._thread.is_alive():
+            return
+        written = Event()
+        self._queue.put(written)
+        written.wait()
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name="background-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._flush_due_buffers()
+            try:
+                batches = [self._queue.get(timeout=settings.LOG_FLUSH_INTERVAL / 2)]
+            except Empty:
+                continue
+            # Merge whatever else is already queued into the same INSERTs
+            while True:
+                try:
+                    batches.append(self._queue.get_nowait())
+                except Empty:
+                    break
+            # Drain markers are set once everything queued before them is written
+            markers = [batch for batch in batches if isinstance(batch, Event)]
+            instances = [instance for batch in batches if not isinstance(batch, Event) for instance in batch]
+            try:
+                self._bulk_create(instances)
+            except Exception:
+                logger.exception("Background writer failed to write %s records", len(instances))
+            finally:
+                for marker in markers:
+                    marker.set()
+
+    def _flush_due_buffers(self):
+        if time.monotonic() - self._buffers_checked_at < settings.LOG_FLUSH_INTERVAL / 2:
+            return
+        self._buffers_checked_at = time.monotonic()
+        with self._lock:
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            try:
+                buffer.flush_if_due()
+            except Exception:
+                logger.exception("Background writer failed to flush a buffer")
+
+    @staticmethod
+    def _bulk_create(instances: list):
+        by_model = defaultdict(list)
+        for instance in instances:
+            by_model[type(instance)].append(instance)
+        for model, objects in by_model.items():
+            model.objects.bulk_create(objects, batch_size=500)
+
+
+background_writer = BackgroundWriter()
+
+
+class RecordBuffer:
+    """
+    Collects unsaved rows of one scenario in memory and hands them to `background_writer` in batches.
+
+    The buffer is flushed when `LOG_BUFFER_SIZE` records are waiting, when the oldest one is
+    `LOG_FLUSH_INTERVAL` seconds old, and on every `flush()` (step changes and the end of `execute`).
+    The age is checked by the `background_writer` thread for buffers writing through it, and on the
+    next `append` for the others (synchronous writes, custom `executor` or `writer`).
+
+    Args:
+        executor (optional): Executor to submit flushes to, used when recording from an event loop.
+        writer (optional): Callable receiving each batch instead of `background_writer.write`,
+            used by worker processes that send their records to the parent.
+    """
+
+    def __init__(self, executor=None, writer=None):
+        self.executor = executor
+        self.writer = writer or background_writer.write
+        self._records = []
+        self._first_record_at = None
+        # Flushed by the scenario's thread and the background writer's
+        self._lock = Lock()
+        if executor is None and writer is None:
+            background_writer.watch(self)
+
+    def append(self, record):
+        with self._lock:
+            self._records.append(record)
+            if len(self._records) == 1:
+                self._first_record_at = time.monotonic()
+            if len(self._records) >= settings.LOG_BUFFER_SIZE or self._is_due():
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def flush_if_due(self):
+        with self._lock:
+            if self._is_due():
+                self._flush()
+
+    def _is_due(self) -> bool:
+        return bool(self._records) and time.monotonic() - self._first_record_at >= settings.LOG_FLUSH_INTERVAL
+
+    def _flush(self):
+        if not self._records:
+            return
+        records, self._records = self._records, []
+        if self.executor:
+            self.executor.submit(self.writer, records)
+        else:
+            self.writer(records)
+
+
+class LogBuffer(RecordBuffer):
+    """
+    `RecordBuffer` of the `Log` rows of one scenario.
+    `created_at` is set when the message is logged, so timestamps and order are kept.
+
+    Args:
+        scenario: The `Scenario` the logs belong to.
+    """
+
+    def __init__(self, scenario, executor=None, writer=None):
+        super().__init__(executor, writer)
+        self.scenario = scenario
+
+    def add(self, level: str, text: str):
+        self.append(Log(scenario=self.scenario, level=level, text=text, created_at=timezone.now()))
@@ -89,6 +89,9 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Sessions write from several threads at once. The default in-memory test database
+        # fails with "table is locked" instead of waiting for the lock like a file database does
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
@@ -137,6 +140,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 VION_DEVELOP_URL = "https://api.vion.greenhabitat.dev"
 VION_STAGIN_URL = "https://api.vion.greenhabitat.live"
 VION_LOCAL_URL = "http://127.0.0.1:8000"
+# Fake server started by the runs against the "Offline" environment (see scenario_tester/fake_server.py)
+VION_OFFLINE_URL = "http://127.0.0.1:8765"
 
 
 SWAGGER_SETTINGS = {
@@ -152,4 +157,70 @@ SWAGGER_SETTINGS = {
 
 ENABLE_SWAGGER = True
 
-THREAD_WORKERS = 4
\ No newline at end of file
+THREAD_WORKERS = 4
+
+# Process engine (see scenario_tester/process_engine.py), None uses one process per CPU
+SCENARIO_PROCESSES = None
+SCENARIO_PROCESS_THREADS = 4
+
+# Distributed runners pulling from the WorkItem table (see scenario_tester/work_queue.py)
+WORK_QUEUE_THREADS = 4
+WORK_QUEUE_LEASE = 60
+WORK_QUEUE_HEARTBEAT = 20
+WORK_QUEUE_POLL_INTERVAL = 2.0
+
+# Parsed scenario modules, reused while the files do not change (see scenario_tester/index.py). None disables it
+SCENARIO_INDEX_CACHE = BASE_DIR / '.scenario_index.json'
+
+# Number of recent runs per server the longest-first ordering takes the median duration of
+SCENARIO_DURATION_HISTORY = 10
+
+# Connection pooling for scenario HTTP calls (see scenario_tester/transport.py)
+HTTP_POOL_CONNECTIONS = 10
+HTTP_POOL_MAXSIZE = 10
+HTTP_POOL_BLOCK = False
+HTTP_KEEP_ALIVE = True
+
+# Chunk size of the streamed calls (see scenario_tester/streaming.py), in bytes
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# asyncio engine (see scenario_tester/async_engine.py)
+ASYNC_CONCURRENCY = 200
+ASYNC_MAX_CONNECTIONS = 100
+ASYNC_SYNC_WORKERS = None  # Threads running the synchronous scenarios, None uses THREAD_WORKERS
+
+# Login token sharing between scenarios (see scenario_tester/auth.py)
+AUTH_TOKEN_CACHE = True
+AUTH_TOKEN_REFRESH_MARGIN = 60  # Seconds before `exp` at which a token is refreshed
+AUTH_TOKEN_DEFAULT_TTL = 300  # Used when the access token has no readable `exp` claim
+
+# Scenario logs and request records are buffered and written in batches (see scenario_tester/writers.py)
+BACKGROUND_WRITER = True  # Write batches on a background thread instead of the scenario thread
+LOG_BUFFER_SIZE = 50
+LOG_FLUSH_INTERVAL = 2.0  # Seconds a log may wait in the buffer
+
+# Load tests (see scenario_tester/load.py), the defaults of the "load" engine
+LOAD_RATE = 1.0  # Scenarios started per second
+LOAD_DURATION = 60  # Seconds
+LOAD_RAMP_UP = 0  # Seconds
+LOAD_MAX_CONCURRENCY = 50  # Virtual users
+LOAD_REPORT_INTERVAL = 5.0  # Seconds between two live reports
+
+# Fake Vion server of the "Offline" environment (see scenario_tester/fake_server.py)
+FAKE_SERVER_LATENCY = 0.0  # Seconds added to every response
+FAKE_SERVER_JITTER = 0.0  # Up to this many more seconds, random
+FAKE_SERVER_ERROR_RATE = 0.0  # Share of the requests answered with a 500
+FAKE_SERVER_TOKEN_TTL = 3600  # Seconds
+FAKE_SERVER_PROBE_TIMEOUT = 2.0  # Seconds to wait for a fake server already listening at VION_OFFLINE_URL
+
+# HTTP cassettes (see scenario_tester/cassettes.py): "record" saves the calls of every scenario run,
+# "replay" serves them from the saved cassettes without network. None disables them
+CASSETTE_MODE = None
+CASSETTE_DIR = BASE_DIR / "cassettes"
+
+# Window of the request latency table, in days (see RequestLatencyView)
+REQUEST_LATENCY_DAYS = 7
+
+# Background scenario runs (see scenario_tester/jobs.py)
+SCENARIO_JOB_WORKERS = 2
+SCENARIO_JOBS_EAGER = False
@@ -0,0 +1,17 @@
+"""
+Settings for the command line runners (`manage.py run_scenarios` and `manage.py run_worker`).
+
+Same as `settings.py` without the admin, Swagger and the other apps only the web interface needs,
+so a run started from CI does not pay for importing them. `manage.py` selects it for these commands.
+"""
+from .settings import *  # noqa: F401,F403
+
+WEB_ONLY_APPS = (
+    'django.contrib.admin',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'drf_yasg',
+)
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in WEB_ONLY_APPS]
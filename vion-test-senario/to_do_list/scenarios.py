@@ -3,15 +3,11 @@ from scenario_tester.assertions import Assert
 from scenario_tester.services import time
 from scenario_tester.endpoints import EndPoint
 from .endpoints import ToDoListEndpoints
-from threading import Lock
-
-SCENARIO_LOCK = Lock()
 
 # To Do List Base Scenario
 class BaseToDoListScenario(BaseScenario):
-
-    def is_abstract(self):
-        return True
+    abstract = True
+    tags = frozenset({"todo", "destructive"})
 
     def login_user(self, username):
         self.set_step("Login")
@@ -30,8 +26,7 @@ class BaseToDoListScenario(BaseScenario):
             Assert.assertEqual(status_code, 200)
             if list_by_title and list_by_title["count"] > 0:
                 self.warning(
-                    f"Duplicate To Do List found with text: '{
-                        get_list_by_title['text']}'"
+                    f"Duplicate To Do List found with text: '{get_list_by_title['text']}'"
                 )
                 suffix_counter += 1
                 get_list_by_title["text"] = f"{base_title} ({suffix_counter})"
@@ -80,9 +75,10 @@ class PartnerBaseScenario(BaseToDoListScenario):
 
     generate_unique_title_endpoint = ToDoListEndpoints.GET_TO_DO_LIST_BY_TITLE
     delete_endpoint = ToDoListEndpoints.DELETE_TO_DO_LIST
-
-    def is_abstract(self):
-        return True
+    # The scenarios count the items of partner1's list, they can not run next to each other
+    resources = frozenset({"partner1 todo list"})
+    abstract = True
+    tags = frozenset({"partner1"})
 
     def create_series(
         self,
@@ -178,9 +174,10 @@ class BackOfficeBaseScenario(BaseToDoListScenario):
 
     generate_unique_title_endpoint = ToDoListEndpoints.GET_TO_DO_LIST_BY_TITLE_BACKOFFICE
     delete_endpoint = ToDoListEndpoints.DELETE_TO_DO_LIST_BACKOFFICE
-
-    def is_abstract(self):
-        return True
+    # Lists created in the backoffice are assigned to partner1 and checked on their list
+    resources = frozenset({"backoffice todo list", "partner1 todo list"})
+    abstract = True
+    tags = frozenset({"backoffice", "partner1"})
 
     def create_series(
         self,
@@ -267,22 +264,22 @@ class ToDoListTestScenario(PartnerBaseScenario):
     """
     Tets To-Do-List with no frequency
     """
+    tags = frozenset({"smoke"})
 
     def run(self):
-        with SCENARIO_LOCK:
-            self.login_user("partner1")
-            unique_title = self.generate_unique_title()
-            series = self.create_series(
-                title=unique_title,
-                frequency=None,
-                frequency_coefficient="1",
-                start_date="2025-01-01",
-                end_date=None,
-                link="events",
-            )
-            series_items = self.get_series_items(series["title"], 1)
-            self.finish_task(series_items[0]["id"])
-            self.delete_series(series["slug"])
+        self.login_user("partner1")
+        unique_title = self.generate_unique_title()
+        series = self.create_series(
+            title=unique_title,
+            frequency=None,
+            frequency_coefficient="1",
+            start_date="2025-01-01",
+            end_date=None,
+            link="events",
+        )
+        series_items = self.get_series_items(series["title"], 1)
+        self.finish_task(series_items[0]["id"])
+        self.delete_series(series["slug"])
 
 
 class ToDoListDailyTestScenario(PartnerBaseScenario):
@@ -291,20 +288,19 @@ class ToDoListDailyTestScenario(PartnerBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            self.login_user("partner1")
-            unique_title = self.generate_unique_title()
-            series = self.create_series(
-                title=unique_title,
-                frequency="daily",
-                frequency_coefficient="2",
-                start_date="2024-12-29",
-                end_date="2025-01-11",
-            )
-            series_items = self.get_series_items(series["title"], 7)
-            self.finish_task(series_items[0]["id"])
-            self.finish_task(series_items[-1]["id"])
-            self.delete_series(series["slug"])
+        self.login_user("partner1")
+        unique_title = self.generate_unique_title()
+        series = self.create_series(
+            title=unique_title,
+            frequency="daily",
+            frequency_coefficient="2",
+            start_date="2024-12-29",
+            end_date="2025-01-11",
+        )
+        series_items = self.get_series_items(series["title"], 7)
+        self.finish_task(series_items[0]["id"])
+        self.finish_task(series_items[-1]["id"])
+        self.delete_series(series["slug"])
 
 
 class ToDoListWeeklyTestScenario(PartnerBaseScenario):
@@ -313,20 +309,19 @@ class ToDoListWeeklyTestScenario(PartnerBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            self.login_user("partner1")
-            unique_title = self.generate_unique_title()
-            series = self.create_series(
-                title=unique_title,
-                frequency="weekly",
-                frequency_coefficient="2",
-                start_date="2025-01-01",
-                end_date="2025-02-01",
-            )
-            series_items = self.get_series_items(series["title"], 3)
-            self.finish_task(series_items[0]["id"])
-            self.finish_task(series_items[-1]["id"])
-            self.delete_series(series["slug"])
+        self.login_user("partner1")
+        unique_title = self.generate_unique_title()
+        series = self.create_series(
+            title=unique_title,
+            frequency="weekly",
+            frequency_coefficient="2",
+            start_date="2025-01-01",
+            end_date="2025-02-01",
+        )
+        series_items = self.get_series_items(series["title"], 3)
+        self.finish_task(series_items[0]["id"])
+        self.finish_task(series_items[-1]["id"])
+        self.delete_series(series["slug"])
 
 
 class ToDoListMonthlyTestScenario(PartnerBaseScenario):
@@ -335,20 +330,19 @@ class ToDoListMonthlyTestScenario(PartnerBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            self.login_user("partner1")
-            unique_title = self.generate_unique_title()
-            series = self.create_series(
-                title=unique_title,
-                frequency="monthly",
-                frequency_coefficient="6",
-                start_date="2025-01-01",
-                end_date="2030-01-01",
-            )
-            series_items = self.get_series_items(series["title"], 11)
-            self.finish_task(series_items[0]["id"])
-            self.finish_task(series_items[-1]["id"])
-            self.delete_series(series["slug"])
+        self.login_user("partner1")
+        unique_title = self.generate_unique_title()
+        series = self.create_series(
+            title=unique_title,
+            frequency="monthly",
+            frequency_coefficient="6",
+            start_date="2025-01-01",
+            end_date="2030-01-01",
+        )
+        series_items = self.get_series_items(series["title"], 11)
+        self.finish_task(series_items[0]["id"])
+        self.finish_task(series_items[-1]["id"])
+        self.delete_series(series["slug"])
 
 
 class ToDoListYearlyTestScenario(PartnerBaseScenario):
@@ -357,20 +351,19 @@ class ToDoListYearlyTestScenario(PartnerBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            self.login_user("partner1")
-            unique_title = self.generate_unique_title()
-            series = self.create_series(
-                title=unique_title,
-                frequency="yearly",
-                frequency_coefficient="3",
-                start_date="2025-01-01",
-                end_date="2035-02-01",
-            )
-            series_items = self.get_series_items(series["title"], 4)
-            self.finish_task(series_items[0]["id"])
-            self.finish_task(series_items[-1]["id"])
-            self.delete_series(series["slug"])
+        self.login_user("partner1")
+        unique_title = self.generate_unique_title()
+        series = self.create_series(
+            title=unique_title,
+            frequency="yearly",
+            frequency_coefficient="3",
+            start_date="2025-01-01",
+            end_date="2035-02-01",
+        )
+        series_items = self.get_series_items(series["title"], 4)
+        self.finish_task(series_items[0]["id"])
+        self.finish_task(series_items[-1]["id"])
+        self.delete_series(series["slug"])
 
 
 class ToDoListUpdateTestScenario(PartnerBaseScenario):
@@ -379,97 +372,96 @@ class ToDoListUpdateTestScenario(PartnerBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            self.login_user("partner1")
-            unique_title = self.generate_unique_title()
-            series = self.create_series(
-                title=unique_title,
-                frequency="monthly",
-                frequency_coefficient="6",
-                start_date="2025-01-01",
-                end_date="2030-01-01",
-            )
-            series_items = self.get_series_items(series["title"], 11)
-            self.finish_task(series_items[0]["id"])
-            self.finish_task(series_items[-1]["id"])
+        self.login_user("partner1")
+        unique_title = self.generate_unique_title()
+        series = self.create_series(
+            title=unique_title,
+            frequency="monthly",
+            frequency_coefficient="6",
+            start_date="2025-01-01",
+            end_date="2030-01-01",
+        )
+        series_items = self.get_series_items(series["title"], 11)
+        self.finish_task(series_items[0]["id"])
+        self.finish_task(series_items[-1]["id"])
 
-            # Update
-            self.update_series(
-                slug=series["slug"],
-                title=unique_title,
-                frequency="weekly",
-                frequency_coefficient="2",
-                start_date="2025-01-01",
-                end_date="2025-02-01",
-            )
+        # Update
+        self.update_series(
+            slug=series["slug"],
+            title=unique_title,
+            frequency="weekly",
+            frequency_coefficient="2",
+            start_date="2025-01-01",
+            end_date="2025-02-01",
+        )
 
-            self.delete_series(series["slug"])
+        self.delete_series(series["slug"])
 
 
 class ToDoListMyTeamTestScenario(PartnerBaseScenario):
     """
     Tets To-Do-List for My Team
     """
+    tags = frozenset({"partner2"})
 
     def run(self):
-        with SCENARIO_LOCK:
-            self.login_user("partner1")
-            unique_title = self.generate_unique_title()
-            series = self.create_series(
-                title=unique_title,
-                frequency="monthly",
-                frequency_coefficient="6",
-                start_date="2025-01-01",
-                end_date="2030-01-01",
-                criteria="my_team"
-            )
-            self.get_series_items(series["title"], 11)
-            self.get_series_items_for_team(series["title"], 0, origin="my_tasks")
-            self.get_series_items_for_team(
-                series["title"], 11, origin="my_team_tasks")
+        self.login_user("partner1")
+        unique_title = self.generate_unique_title()
+        series = self.create_series(
+            title=unique_title,
+            frequency="monthly",
+            frequency_coefficient="6",
+            start_date="2025-01-01",
+            end_date="2030-01-01",
+            criteria="my_team"
+        )
+        self.get_series_items(series["title"], 11)
+        self.get_series_items_for_team(series["title"], 0, origin="my_tasks")
+        self.get_series_items_for_team(
+            series["title"], 11, origin="my_team_tasks")
 
-            # Check for the team member
-            self.logout()
-            self.login_user("partner2")
-            self.get_series_items_for_team(series["title"], 11)
+        # Check for the team member
+        self.logout()
+        self.login_user("partner2")
+        self.get_series_items_for_team(series["title"], 11)
 
-            # Delete
-            self.logout()
-            self.login_user("partner1")
-            self.delete_series(series["slug"])
+        # Delete
+        self.logout()
+        self.login_user("partner1")
+        self.delete_series(series["slug"])
 
 
 class ToDoListMeAndMyTeamTestScenario(PartnerBaseScenario):
     """
     Tets To-Do-List for Me and My Team
     """
+    tags = frozenset({"partner2"})
 
     def run(self):
-        with SCENARIO_LOCK:
-            self.login_user("partner1")
-            unique_title = self.generate_unique_title()
-            series = self.create_series(
-                title=unique_title,
-                frequency="monthly",
-                frequency_coefficient="6",
-                start_date="2025-01-01",
-                end_date="2030-01-01",
-                criteria="my_team_and_my_self"
-            )
-            self.get_series_items(series["title"], 11)
-            self.get_series_items_for_team(series["title"], 11, origin="my_tasks")
-            self.get_series_items_for_team(
-                series["title"], 11, origin="my_team_tasks")
+        self.login_user("partner1")
+        unique_title = self.generate_unique_title()
+        series = self.create_series(
+            title=unique_title,
+            frequency="monthly",
+            frequency_coefficient="6",
+            start_date="2025-01-01",
+            end_date="2030-01-01",
+            criteria="my_team_and_my_self"
+        )
+        self.get_series_items(series["title"], 11)
+        self.get_series_items_for_team(series["title"], 11, origin="my_tasks")
+        self.get_series_items_for_team(
+            series["title"], 11, origin="my_team_tasks")
 
-            # Check for the team member
-            self.logout()
-            self.login_user("partner2")
-            self.get_series_items_for_team(series["title"], 11)
+        # Check for the team member
+        self.logout()
+        self.login_user("partner2")
+        self.get_series_items_for_team(series["title"], 11)
 
-            # Delete
-            self.logout()
-            self.login_user("partner1")
-            self.delete_series(series["slug"])
+        # Delete
+        self.logout()
+        self.login_user("partner1")
+        self.delete_series(series["slug"])
 
 
 class ToDoListBadDataTestScenario(PartnerBaseScenario):
@@ -478,43 +470,42 @@ class ToDoListBadDataTestScenario(PartnerBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            self.login_user("partner1")
-
-            # List of bad data cases
-            bad_data_cases = [
-                {"frequency": "invalid_frequency", "frequency_coefficient": "1",
-                    "start_date": "2025-01-01", "end_date": "2025-01-10"},
-                {"frequency": "daily", "frequency_coefficient": "-1",
-                    "start_date": "2025-01-01", "end_date": "2025-01-10"},
-                {"frequency": "daily", "frequency_coefficient": "2", "start_date": "2025-01-10",
-                    "end_date": "2025-01-01"},  # End date before start date
-                {"frequency": "weekly", "frequency_coefficient": "1",
-                    "start_date": "invalid_date", "end_date": "2025-02-01"},
-                {"frequency": "monthly", "frequency_coefficient": "abc",
-                    "start_date": "2025-01-01", "end_date": "2025-12-01"},
-                {"frequency": "monthly", "frequency_coefficient": "0",
-                    "start_date": "2025-01-01", "end_date": "2025-12-01"},
-                {"frequency": "monthly", "start_date": "2025-01-01",
-                    "end_date": "2025-12-01"},
-            ]
-
-            for index, bad_data in enumerate(bad_data_cases, start=1):
-                self.set_step(f"Bad Data Case {index}")
-                to_do_list_data = {
-                    "title": self.generate_unique_title(),
-                    "frequency": bad_data["frequency"],
-                    "start_date": bad_data["start_date"],
-                    "end_date": bad_data["end_date"],
-                    "link": "external_link",
-                    "criteria": "my_self",
-                    "external_link": "https://somelink.com",
-                }
-                if "frequency_coefficient" in bad_data:
-                    to_do_list_data["frequency_coefficient"] = bad_data["frequency_coefficient"]
-                _, status_code = self.call(
-                    ToDoListEndpoints.CREATE_TO_DO_LIST, to_do_list_data)
-                Assert.assertEqual(status_code, 400, f"Failed test for {index}. Expected 400 but got {status_code}")
+        self.login_user("partner1")
+
+        # List of bad data cases
+        bad_data_cases = [
+            {"frequency": "invalid_frequency", "frequency_coefficient": "1",
+                "start_date": "2025-01-01", "end_date": "2025-01-10"},
+            {"frequency": "daily", "frequency_coefficient": "-1",
+                "start_date": "2025-01-01", "end_date": "2025-01-10"},
+            {"frequency": "daily", "frequency_coefficient": "2", "start_date": "2025-01-10",
+                "end_date": "2025-01-01"},  # End date before start date
+            {"frequency": "weekly", "frequency_coefficient": "1",
+                "start_date": "invalid_date", "end_date": "2025-02-01"},
+            {"frequency": "monthly", "frequency_coefficient": "abc",
+                "start_date": "2025-01-01", "end_date": "2025-12-01"},
+            {"frequency": "monthly", "frequency_coefficient": "0",
+                "start_date": "2025-01-01", "end_date": "2025-12-01"},
+            {"frequency": "monthly", "start_date": "2025-01-01",
+                "end_date": "2025-12-01"},
+        ]
+
+        for index, bad_data in enumerate(bad_data_cases, start=1):
+            self.set_step(f"Bad Data Case {index}")
+            to_do_list_data = {
+                "title": self.generate_unique_title(),
+                "frequency": bad_data["frequency"],
+                "start_date": bad_data["start_date"],
+                "end_date": bad_data["end_date"],
+                "link": "external_link",
+                "criteria": "my_self",
+                "external_link": "https://somelink.com",
+            }
+            if "frequency_coefficient" in bad_data:
+                to_do_list_data["frequency_coefficient"] = bad_data["frequency_coefficient"]
+            _, status_code = self.call(
+                ToDoListEndpoints.CREATE_TO_DO_LIST, to_do_list_data)
+            Assert.assertEqual(status_code, 400, "Failed test for {}. Expected 400 but got {}", index, status_code)
 # ----------------------- End of Partner Scenarios -----------------------
 
 
@@ -525,40 +516,39 @@ class ToDoListBackOfficeCareerLevelTestScenario(BackOfficeBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            # Extract career_level and partner_type of a Partner
-            self.login_user("partner1")
-            career_level, partner_type = self.get_user_type_and_level()
-
-            # Log in as Backoffice and Create a To-do List
-            self.logout()
-            self.login_user("backoffice")
-
-            unique_title = self.generate_unique_title()
-
-            career_levels = [career_level]
-            todo_assignments = self.create_todo_assignments_list_data(
-                career_levels=career_levels)
-
-            series = self.create_series(
-                title=unique_title,
-                frequency="weekly",
-                frequency_coefficient="2",
-                start_date="2025-01-01",
-                end_date="2025-02-01",
-                todo_assignments=todo_assignments,
-            )
-            self.get_series_items(series["title"], 3)
+        # Extract career_level and partner_type of a Partner
+        self.login_user("partner1")
+        career_level, partner_type = self.get_user_type_and_level()
+
+        # Log in as Backoffice and Create a To-do List
+        self.logout()
+        self.login_user("backoffice")
+
+        unique_title = self.generate_unique_title()
+
+        career_levels = [career_level]
+        todo_assignments = self.create_todo_assignments_list_data(
+            career_levels=career_levels)
+
+        series = self.create_series(
+            title=unique_title,
+            frequency="weekly",
+            frequency_coefficient="2",
+            start_date="2025-01-01",
+            end_date="2025-02-01",
+            todo_assignments=todo_assignments,
+        )
+        self.get_series_items(series["title"], 3)
 
-            # Log in as Partner to see if the list is there
-            self.logout()
-            self.login_user("partner1")
-            self.get_series_items_for_team(series["title"], 3)
+        # Log in as Partner to see if the list is there
+        self.logout()
+        self.login_user("partner1")
+        self.get_series_items_for_team(series["title"], 3)
 
-            # Log in as backoffice to Delete the series
-            self.logout()
-            self.login_user("backoffice")
-            self.delete_series(series["slug"])
+        # Log in as backoffice to Delete the series
+        self.logout()
+        self.login_user("backoffice")
+        self.delete_series(series["slug"])
 
 
 class ToDoListBackOfficePartnerTypeTestScenario(BackOfficeBaseScenario):
@@ -567,39 +557,38 @@ class ToDoListBackOfficePartnerTypeTestScenario(BackOfficeBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            # Extract career_level and partner_type of a Partner
-            self.login_user("partner1")
-            career_level, partner_type = self.get_user_type_and_level()
-
-            # Log in as Backoffice and Create a To-do List
-            self.logout()
-            self.login_user("backoffice")
-
-            unique_title = self.generate_unique_title()
-            career_levels = [career_level]
-            partner_types = [partner_type]
-            todo_assignments = self.create_todo_assignments_list_data(
-                partner_types=partner_types)
-            series = self.create_series(
-                title=unique_title,
-                frequency="weekly",
-                frequency_coefficient="2",
-                start_date="2025-01-01",
-                end_date="2025-02-01",
-                todo_assignments=todo_assignments,
-            )
-            self.get_series_items(series["title"], 3)
+        # Extract career_level and partner_type of a Partner
+        self.login_user("partner1")
+        career_level, partner_type = self.get_user_type_and_level()
+
+        # Log in as Backoffice and Create a To-do List
+        self.logout()
+        self.login_user("backoffice")
+
+        unique_title = self.generate_unique_title()
+        career_levels = [career_level]
+        partner_types = [partner_type]
+        todo_assignments = self.create_todo_assignments_list_data(
+            partner_types=partner_types)
+        series = self.create_series(
+            title=unique_title,
+            frequency="weekly",
+            frequency_coefficient="2",
+            start_date="2025-01-01",
+            end_date="2025-02-01",
+            todo_assignments=todo_assignments,
+        )
+        self.get_series_items(series["title"], 3)
 
-            # Log in as Partner to see if the list is there
-            self.logout()
-            self.login_user("partner1")
-            self.get_series_items_for_team(series["title"], 3)
+        # Log in as Partner to see if the list is there
+        self.logout()
+        self.login_user("partner1")
+        self.get_series_items_for_team(series["title"], 3)
 
-            # Log in as backoffice to Delete the series
-            self.logout()
-            self.login_user("backoffice")
-            self.delete_series(series["slug"])
+        # Log in as backoffice to Delete the series
+        self.logout()
+        self.login_user("backoffice")
+        self.delete_series(series["slug"])
 
 
 class ToDoListBackOfficePartnerAndCareerLevelTestScenario(BackOfficeBaseScenario):
@@ -608,39 +597,38 @@ class ToDoListBackOfficePartnerAndCareerLevelTestScenario(BackOfficeBaseScenario
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            # Extract career_level and partner_type of a Partner
-            self.login_user("partner1")
-            career_level, partner_type = self.get_user_type_and_level()
+        # Extract career_level and partner_type of a Partner
+        self.login_user("partner1")
+        career_level, partner_type = self.get_user_type_and_level()
+
+        # Log in as Backoffice and Create a To-do List
+        self.logout()
+        self.login_user("backoffice")
+
+        unique_title = self.generate_unique_title()
+        career_levels = [career_level]
+        partner_types = [partner_type]
+        todo_assignments = self.create_todo_assignments_list_data(
+            career_levels, partner_types)
+        series = self.create_series(
+            title=unique_title,
+            frequency="weekly",
+            frequency_coefficient="2",
+            start_date="2025-01-01",
+            end_date="2025-02-01",
+            todo_assignments=todo_assignments,
+        )
+        self.get_series_items(series["title"], 3)
 
-            # Log in as Backoffice and Create a To-do List
-            self.logout()
-            self.login_user("backoffice")
+        # Log in as Partner to see if the list is there
+        self.logout()
+        self.login_user("partner1")
+        self.get_series_items_for_team(series["title"], 3)
 
-            unique_title = self.generate_unique_title()
-            career_levels = [career_level]
-            partner_types = [partner_type]
-            todo_assignments = self.create_todo_assignments_list_data(
-                career_levels, partner_types)
-            series = self.create_series(
-                title=unique_title,
-                frequency="weekly",
-                frequency_coefficient="2",
-                start_date="2025-01-01",
-                end_date="2025-02-01",
-                todo_assignments=todo_assignments,
-            )
-            self.get_series_items(series["title"], 3)
-
-            # Log in as Partner to see if the list is there
-            self.logout()
-            self.login_user("partner1")
-            self.get_series_items_for_team(series["title"], 3)
-
-            # Log in as backoffice to Delete the series
-            self.logout()
-            self.login_user("backoffice")
-            self.delete_series(series["slug"])
+        # Log in as backoffice to Delete the series
+        self.logout()
+        self.login_user("backoffice")
+        self.delete_series(series["slug"])
 
 
 class ToDoListBackOfficeMultipleCareerLevelTestScenario(BackOfficeBaseScenario):
@@ -649,7 +637,6 @@ class ToDoListBackOfficeMultipleCareerLevelTestScenario(BackOfficeBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
         # Extract career_level and partner_type of a Partner
             self.login_user("partner1")
             career_level, partner_type = self.get_user_type_and_level()
@@ -689,39 +676,38 @@ class ToDoListBackOfficeMultiplePartnerTestScenario(BackOfficeBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            # Extract career_level and partner_type of a Partner
-            self.login_user("partner1")
-            career_level, partner_type = self.get_user_type_and_level()
+        # Extract career_level and partner_type of a Partner
+        self.login_user("partner1")
+        career_level, partner_type = self.get_user_type_and_level()
+
+        # Log in as Backoffice and Create a To-do List
+        self.logout()
+        self.login_user("backoffice")
+
+        unique_title = self.generate_unique_title()
+        partner_types = [partner_type, "2"]
+        todo_assignments = self.create_todo_assignments_list_data(
+            partner_types=partner_types)
+
+        series = self.create_series(
+            title=unique_title,
+            frequency="weekly",
+            frequency_coefficient="2",
+            start_date="2025-01-01",
+            end_date="2025-02-01",
+            todo_assignments=todo_assignments,
+        )
+        self.get_series_items(series["title"], 3)
 
-            # Log in as Backoffice and Create a To-do List
-            self.logout()
-            self.login_user("backoffice")
+        # Log in as Partner to see if the list is there
+        self.logout()
+        self.login_user("partner1")
+        self.get_series_items_for_team(series["title"], 3)
 
-            unique_title = self.generate_unique_title()
-            partner_types = [partner_type, "2"]
-            todo_assignments = self.create_todo_assignments_list_data(
-                partner_types=partner_types)
-
-            series = self.create_series(
-                title=unique_title,
-                frequency="weekly",
-                frequency_coefficient="2",
-                start_date="2025-01-01",
-                end_date="2025-02-01",
-                todo_assignments=todo_assignments,
-            )
-            self.get_series_items(series["title"], 3)
-
-            # Log in as Partner to see if the list is there
-            self.logout()
-            self.login_user("partner1")
-            self.get_series_items_for_team(series["title"], 3)
-
-            # Log in as backoffice to Delete the series
-            self.logout()
-            self.login_user("backoffice")
-            self.delete_series(series["slug"])
+        # Log in as backoffice to Delete the series
+        self.logout()
+        self.login_user("backoffice")
+        self.delete_series(series["slug"])
 
 
 class ToDoListBackOfficeMultiplePartnerAndCareerLevelTestScenario(BackOfficeBaseScenario):
@@ -730,40 +716,39 @@ class ToDoListBackOfficeMultiplePartnerAndCareerLevelTestScenario(BackOfficeBase
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            # Extract career_level and partner_type of a Partner
-            self.login_user("partner1")
-            career_level, partner_type = self.get_user_type_and_level()
-
-            # Log in as Backoffice and Create a To-do List
-            self.logout()
-            self.login_user("backoffice")
-
-            unique_title = self.generate_unique_title()
-            career_levels = [career_level, 1, 2]
-            partner_types = [partner_type, "2"]
-            todo_assignments = self.create_todo_assignments_list_data(
-                career_levels, partner_types)
-
-            series = self.create_series(
-                title=unique_title,
-                frequency="weekly",
-                frequency_coefficient="2",
-                start_date="2025-01-01",
-                end_date="2025-02-01",
-                todo_assignments=todo_assignments,
-            )
-            self.get_series_items(series["title"], 3)
+        # Extract career_level and partner_type of a Partner
+        self.login_user("partner1")
+        career_level, partner_type = self.get_user_type_and_level()
+
+        # Log in as Backoffice and Create a To-do List
+        self.logout()
+        self.login_user("backoffice")
+
+        unique_title = self.generate_unique_title()
+        career_levels = [career_level, 1, 2]
+        partner_types = [partner_type, "2"]
+        todo_assignments = self.create_todo_assignments_list_data(
+            career_levels, partner_types)
+
+        series = self.create_series(
+            title=unique_title,
+            frequency="weekly",
+            frequency_coefficient="2",
+            start_date="2025-01-01",
+            end_date="2025-02-01",
+            todo_assignments=todo_assignments,
+        )
+        self.get_series_items(series["title"], 3)
 
-            # Log in as Partner to see if the list is there
-            self.logout()
-            self.login_user("partner1")
-            self.get_series_items_for_team(series["title"], 3)
+        # Log in as Partner to see if the list is there
+        self.logout()
+        self.login_user("partner1")
+        self.get_series_items_for_team(series["title"], 3)
 
-            # Log in as backoffice to Delete the series
-            self.logout()
-            self.login_user("backoffice")
-            self.delete_series(series["slug"])
+        # Log in as backoffice to Delete the series
+        self.logout()
+        self.login_user("backoffice")
+        self.delete_series(series["slug"])
 
 
 class ToDoListBackOfficeNotInTheListTestScenario(BackOfficeBaseScenario):
@@ -772,46 +757,45 @@ class ToDoListBackOfficeNotInTheListTestScenario(BackOfficeBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            # Extract career_level and partner_type of a Partner
-            self.login_user("partner1")
-            career_level, partner_type = self.get_user_type_and_level()
-
-            # Log in as Backoffice and Create a To-do List
-            self.logout()
-            self.login_user("backoffice")
-
-            unique_title = self.generate_unique_title()
-            career_levels = [1, 2, 3, 4, 5, 6, 7, 8]
-            partner_types = ["2", "3"]
-
-            if career_level in career_levels:
-                career_levels.remove(career_level)
-            if partner_type in partner_types:
-                partner_types.remove(partner_type)
-
-            todo_assignments = self.create_todo_assignments_list_data(
-                career_levels, partner_types)
-
-            series = self.create_series(
-                title=unique_title,
-                frequency="weekly",
-                frequency_coefficient="2",
-                start_date="2025-01-01",
-                end_date="2025-02-01",
-                todo_assignments=todo_assignments,
-            )
-            self.get_series_items(series["title"], 3)
+        # Extract career_level and partner_type of a Partner
+        self.login_user("partner1")
+        career_level, partner_type = self.get_user_type_and_level()
+
+        # Log in as Backoffice and Create a To-do List
+        self.logout()
+        self.login_user("backoffice")
+
+        unique_title = self.generate_unique_title()
+        career_levels = [1, 2, 3, 4, 5, 6, 7, 8]
+        partner_types = ["2", "3"]
+
+        if career_level in career_levels:
+            career_levels.remove(career_level)
+        if partner_type in partner_types:
+            partner_types.remove(partner_type)
+
+        todo_assignments = self.create_todo_assignments_list_data(
+            career_levels, partner_types)
+
+        series = self.create_series(
+            title=unique_title,
+            frequency="weekly",
+            frequency_coefficient="2",
+            start_date="2025-01-01",
+            end_date="2025-02-01",
+            todo_assignments=todo_assignments,
+        )
+        self.get_series_items(series["title"], 3)
 
-            # Log in as Partner to see if the list is there
-            self.logout()
-            self.login_user("partner1")
-            self.get_series_items_for_team(series["title"], 0)
+        # Log in as Partner to see if the list is there
+        self.logout()
+        self.login_user("partner1")
+        self.get_series_items_for_team(series["title"], 0)
 
-            # Log in as backoffice to Delete the series
-            self.logout()
-            self.login_user("backoffice")
-            self.delete_series(series["slug"])
+        # Log in as backoffice to Delete the series
+        self.logout()
+        self.login_user("backoffice")
+        self.delete_series(series["slug"])
 
 
 class ToDoListBackOfficeBadDataTestScenario(BackOfficeBaseScenario):
@@ -820,43 +804,42 @@ class ToDoListBackOfficeBadDataTestScenario(BackOfficeBaseScenario):
     """
 
     def run(self):
-        with SCENARIO_LOCK:
-            self.login_user("backoffice")
-
-            career_levels = [1, 2, 8]
-            partner_types = ["2"]
-            valid_assignments = self.create_todo_assignments_list_data(career_levels, partner_types)
-
-            # Bad data cases
-            bad_data_cases = [
-                {"frequency": "invalid_frequency", "frequency_coefficient": "1",
-                    "start_date": "2025-01-01", "end_date": "2025-01-10", "todo_assignments": valid_assignments},
-                {"frequency": "daily", "frequency_coefficient": "-1",
-                    "start_date": "2025-01-01", "end_date": "2025-01-10", "todo_assignments": valid_assignments},
-                {"frequency": "daily", "frequency_coefficient": "2", "start_date": "2025-01-10",
-                    "end_date": "2025-01-01", "todo_assignments": valid_assignments},  # End date before start date
-                {"frequency": "weekly", "frequency_coefficient": "1",
-                    "start_date": "invalid_date", "end_date": "2025-02-01", "todo_assignments": valid_assignments},
-                {"frequency": "monthly", "frequency_coefficient": "abc",
-                    "start_date": "2025-01-01", "end_date": "2025-12-01", "todo_assignments": valid_assignments},
-                {"frequency": "monthly", "frequency_coefficient": "0",
-                    "start_date": "2025-01-01", "end_date": "2025-12-01", "todo_assignments": valid_assignments},
-            ]
-
-            for index, bad_data in enumerate(bad_data_cases, start=1):
-                self.set_step(f"Bad Data Case {index}")
-                to_do_list_data = {
-                    "title": self.generate_unique_title(),
-                    "frequency": bad_data["frequency"],
-                    "frequency_coefficient": bad_data["frequency_coefficient"],
-                    "start_date": bad_data["start_date"],
-                    "end_date": bad_data["end_date"],
-                    "link": "external_link",
-                    "todo_assignments": bad_data["todo_assignments"],
-                    "external_link": "https://somelink.com",
-                }
-
-                _, status_code = self.call(
-                    ToDoListEndpoints.CREATE_TO_DO_LIST_BACKOFFICE, to_do_list_data
-                )
-                Assert.assertEqual(status_code, 400, f"Failed test for Case {index}. Expected 400 but got {status_code}")
+        self.login_user("backoffice")
+
+        career_levels = [1, 2, 8]
+        partner_types = ["2"]
+        valid_assignments = self.create_todo_assignments_list_data(career_levels, partner_types)
+
+        # Bad data cases
+        bad_data_cases = [
+            {"frequency": "invalid_frequency", "frequency_coefficient": "1",
+                "start_date": "2025-01-01", "end_date": "2025-01-10", "todo_assignments": valid_assignments},
+            {"frequency": "daily", "frequency_coefficient": "-1",
+                "start_date": "2025-01-01", "end_date": "2025-01-10", "todo_assignments": valid_assignments},
+            {"frequency": "daily", "frequency_coefficient": "2", "start_date": "2025-01-10",
+                "end_date": "2025-01-01", "todo_assignments": valid_assignments},  # End date before start date
+            {"frequency": "weekly", "frequency_coefficient": "1",
+                "start_date": "invalid_date", "end_date": "2025-02-01", "todo_assignments": valid_assignments},
+            {"frequency": "monthly", "frequency_coefficient": "abc",
+                "start_date": "2025-01-01", "end_date": "2025-12-01", "todo_assignments": valid_assignments},
+            {"frequency": "monthly", "frequency_coefficient": "0",
+                "start_date": "2025-01-01", "end_date": "2025-12-01", "todo_assignments": valid_assignments},
+        ]
+
+        for index, bad_data in enumerate(bad_data_cases, start=1):
+            self.set_step(f"Bad Data Case {index}")
+            to_do_list_data = {
+                "title": self.generate_unique_title(),
+                "frequency": bad_data["frequency"],
+                "frequency_coefficient": bad_data["frequency_coefficient"],
+                "start_date": bad_data["start_date"],
+                "end_date": bad_data["end_date"],
+                "link": "external_link",
+                "todo_assignments": bad_data["todo_assignments"],
+                "external_link": "https://somelink.com",
+            }
+
+            _, status_code = self.call(
+                ToDoListEndpoints.CREATE_TO_DO_LIST_BACKOFFICE, to_do_list_data
+            )
+            Assert.assertEqual(status_code, 400, "Failed test for Case {}. Expected 400 but got {}", index, status_code)
@@ -9,8 +9,7 @@ class ToDoListBaseScenario(BaseScenario):
     Base class for To Do List scenarios
     """
 
-    def is_abstract(self):
-        return True
+    abstract = True
 
     def login_user(self, username):
         self.set_step("Login")
@@ -401,8 +400,7 @@ class ToDoListBadDataTestScenario(ToDoListBaseScenario):
 
             _, status_code = self.call(
                 ToDoListEndpoints.CREATE_TO_DO_LIST, to_do_list_data)
-            Assert.assertEqual(status_code, 400, f"Failed test for {
-                               index}. Expected 400 but got {status_code}")
+            Assert.assertEqual(status_code, 400, f"Failed test for {index}. Expected 400 but got {status_code}")
 # ---------------- End of Partner Scenarios ----------------
 
 # Backoffice Base Scenario
@@ -411,8 +409,7 @@ class ToDoListBaseBackOfficeScenario(BaseScenario):
     Base class for To Do List BACKOFFICE  Scenarios 
     """
 
-    def is_abstract(self):
-        return True
+    abstract = True
 
     def login_user(self, username):
         self.set_step("Login")
@@ -445,8 +442,7 @@ class ToDoListBaseBackOfficeScenario(BaseScenario):
             if list_by_title and list_by_title["count"] > 0:
                 # Title exists, append a counter to make it unique
                 self.warning(
-                    f"Duplicate To Do List found with text: '{
-                        get_list_by_title['text']}'"
+                    f"Duplicate To Do List found with text: '{get_list_by_title['text']}'"
                 )
                 suffix_counter += 1
                 get_list_by_title["text"] = f"{base_title} ({suffix_counter})"